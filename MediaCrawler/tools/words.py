@@ -19,9 +19,12 @@
 
 
 import asyncio
+import hashlib
 import json
 import logging
+import os
 from collections import Counter
+from typing import Dict, List
 
 import aiofiles
 import jieba
@@ -42,6 +45,75 @@ from tools import utils
 plot_lock = asyncio.Lock()
 
 
+class TokenCache:
+    """
+    Persistent segmentation cache: sha1(content) -> token ids into a shared vocabulary.
+    Comments that were already segmented in a previous run are not cut again.
+    """
+
+    FILE_NAME = "token_cache.json"
+
+    def __init__(self, directory: str, fingerprint: str):
+        self.path = os.path.join(directory, self.FILE_NAME)
+        self.fingerprint = fingerprint
+        self.vocab: List[str] = []
+        self.word_ids: Dict[str, int] = {}
+        self.entries: Dict[str, List[int]] = {}
+        self.dirty = False
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            utils.logger.info(f"[TokenCache.load] Ignore broken token cache {self.path}: {e}")
+            return
+        # Stop words or custom words changed: cached tokens are no longer valid
+        if data.get('fingerprint') != self.fingerprint:
+            return
+        self.vocab = data.get('vocab', [])
+        self.word_ids = {word: index for index, word in enumerate(self.vocab)}
+        self.entries = data.get('entries', {})
+
+    @staticmethod
+    def key(content: str) -> str:
+        return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+    def get(self, key: str):
+        ids = self.entries.get(key)
+        if ids is None:
+            return None
+        return [self.vocab[index] for index in ids]
+
+    def put(self, key: str, words: List[str]):
+        ids = []
+        for word in words:
+            index = self.word_ids.get(word)
+            if index is None:
+                index = len(self.vocab)
+                self.vocab.append(word)
+                self.word_ids[word] = index
+            ids.append(index)
+        self.entries[key] = ids
+        self.dirty = True
+
+    async def save(self):
+        if not self.dirty:
+            return
+        tmp_path = self.path + '.tmp'
+        async with aiofiles.open(tmp_path, 'w', encoding='utf-8') as file:
+            await file.write(json.dumps({
+                'fingerprint': self.fingerprint,
+                'vocab': self.vocab,
+                'entries': self.entries
+            }, ensure_ascii=False, separators=(',', ':')))
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
+
 class AsyncWordCloudGenerator:
     def __init__(self):
         logging.getLogger('jieba').setLevel(logging.WARNING)
@@ -51,15 +123,21 @@ class AsyncWordCloudGenerator:
         self.custom_words = config.CUSTOM_WORDS
         for word, group in self.custom_words.items():
             jieba.add_word(word)
+        self.fingerprint = hashlib.sha1(
+            '\n'.join(sorted(self.stop_words) + ['#'] + sorted(self.custom_words)).encode('utf-8')
+        ).hexdigest()
+        self.token_caches: Dict[str, TokenCache] = {}
 
     def load_stop_words(self):
         with open(self.stop_words_file, 'r', encoding='utf-8') as f:
             return set(f.read().strip().split('\n'))
 
     async def generate_word_frequency_and_cloud(self, data, save_words_prefix):
-        all_text = ' '.join(item['content'] for item in data)
-        words = [word for word in jieba.lcut(all_text) if word not in self.stop_words and len(word.strip()) > 0]
-        word_freq = Counter(words)
+        word_freq = Counter()
+        token_cache = self.get_token_cache(os.path.dirname(save_words_prefix) or '.')
+        for item in data:
+            word_freq.update(self.segment(item['content'], token_cache))
+        await token_cache.save()
 
         # Save word frequency to file
         freq_file = f"{save_words_prefix}_word_freq.json"
@@ -73,6 +151,20 @@ class AsyncWordCloudGenerator:
 
         await self.generate_word_cloud(word_freq, save_words_prefix)
 
+    def get_token_cache(self, directory: str) -> TokenCache:
+        if directory not in self.token_caches:
+            self.token_caches[directory] = TokenCache(directory, self.fingerprint)
+        return self.token_caches[directory]
+
+    def segment(self, content: str, token_cache: TokenCache) -> List[str]:
+        """Segment one comment, reusing the cached tokens of identical content"""
+        key = token_cache.key(content)
+        words = token_cache.get(key)
+        if words is None:
+            words = [word for word in jieba.lcut(content) if word not in self.stop_words and len(word.strip()) > 0]
+            token_cache.put(key, words)
+        return words
+
     async def generate_word_cloud(self, word_freq, save_words_prefix):
         await plot_lock.acquire()
         top_20_word_freq = {word: freq for word, freq in
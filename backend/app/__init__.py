@@ -6,12 +6,17 @@ from app.config import config
 # Initialize extensions
 db = SQLAlchemy()
 
-def create_app(config_name='default'):
-    """Application factory pattern"""
+def create_app(config_name='default', test_config=None):
+    """Application factory pattern（test_config: 覆盖的配置项，测试用临时数据库等）"""
     app = Flask(__name__)
     app.config.from_object(config[config_name])
+    if test_config:
+        app.config.update(test_config)
     
     # Initialize extensions
+    from app.utils.sqlite_profile import apply_engine_options, install_pragmas
+    from app.utils.text_search import install_functions
+    apply_engine_options(app.config)
     db.init_app(app)
     CORS(app)
     
@@ -28,7 +33,18 @@ def create_app(config_name='default'):
     
     # Create database tables
     with app.app_context():
+        install_pragmas(db.engine, app.config)
+        install_functions(db.engine)
         db.create_all()
+        # 已有数据库补齐新增的列和索引（create_all不会修改已有表）
+        from app.migrations import run_migrations
+        run_migrations(db)
+    
+    # 预热模型和NLP资源（脚本默认不预热，服务进程可设置MODEL_WARMUP=background）
+    warmup_mode = app.config.get('MODEL_WARMUP', 'none')
+    if warmup_mode in ('sync', 'background'):
+        from app.services.model_registry import start_warmup
+        start_warmup(app, background=(warmup_mode == 'background'))
     
     @app.route('/')
     def index():
@@ -75,10 +75,19 @@ def search_topic():
 
 @crawler_bp.route('/sync', methods=['POST'])
 def sync_data():
-    """从MediaCrawler同步数据"""
+    """
+    从MediaCrawler增量同步数据
+    
+    Request Body (可选):
+    {
+        "full": false  // true时忽略水位线全量重新同步
+    }
+    """
     try:
+        data = request.get_json(silent=True) or {}
+        
         crawler_service = CrawlerService()
-        result = crawler_service.sync_mediacrawler_data()
+        result = crawler_service.sync_mediacrawler_data(full_sync=bool(data.get('full', False)))
         
         return jsonify(result), 200 if result['status'] == 'success' else 400
         
@@ -1,9 +1,9 @@
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from app.models import Topic, WeiboPost
 from app import db
-from datetime import datetime
-import csv
-import io
+from app.services.data_export import FORMATS as EXPORT_FORMATS, export_fields, export_posts
+from app.services.post_query import list_posts, search_posts
+from datetime import datetime, timedelta
 
 manage_bp = Blueprint('manage', __name__)
 
@@ -97,17 +97,67 @@ def delete_topic(topic_id):
 
 @manage_bp.route('/data/export', methods=['GET'])
 def export_data():
-    """导出数据"""
+    """
+    导出微博及情感结果（流式下载，边查询边发送）
+    
+    Query Parameters:
+        format: csv / jsonl，默认csv
+        topic_id: 话题ID，默认全部话题
+        start_date: 起始日期 YYYY-MM-DD（含），可选
+        end_date: 结束日期 YYYY-MM-DD（含），可选
+        include: 额外导出的大字段，逗号分隔（topic_text,comment_text,raw_data），可选
+        gzip: 1时输出gzip压缩文件（.gz）
+    """
     try:
         topic_id = request.args.get('topic_id', type=int)
         format_type = request.args.get('format', 'csv')
+        start_date = request.args.get('start_date')
+        end_date = request.args.get('end_date')
+        include = [name.strip() for name in request.args.get('include', '').split(',') if name.strip()]
+        compress = request.args.get('gzip', '0') in ('1', 'true')
         
-        # TODO: 实现数据导出逻辑
+        if format_type not in EXPORT_FORMATS:
+            return jsonify({
+                'success': False,
+                'message': f"format必须是{'/'.join(EXPORT_FORMATS)}之一"
+            }), 400
         
-        return jsonify({
-            'success': True,
-            'message': '导出功能待实现'
-        }), 200
+        try:
+            start = datetime.strptime(start_date, '%Y-%m-%d') if start_date else None
+            end = datetime.strptime(end_date, '%Y-%m-%d') + timedelta(days=1) if end_date else None
+        except ValueError:
+            return jsonify({
+                'success': False,
+                'message': '日期格式应为YYYY-MM-DD'
+            }), 400
+        
+        # 参数错误要在开始发送之前返回
+        try:
+            export_fields(include)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
+        
+        if topic_id is not None and db.session.get(Topic, topic_id) is None:
+            return jsonify({
+                'success': False,
+                'message': '话题不存在'
+            }), 404
+        
+        filename = f"weibo_posts_{topic_id or 'all'}_{datetime.now().strftime('%Y%m%d%H%M%S')}.{format_type}"
+        mimetype = EXPORT_FORMATS[format_type]
+        if compress:
+            filename += '.gz'
+            mimetype = 'application/gzip'
+        
+        chunks = export_posts(format_type, topic_id=topic_id, start=start, end=end,
+                              include=include, gzip=compress)
+        return Response(stream_with_context(chunks), content_type=mimetype, headers={
+            'Content-Disposition': f'attachment; filename="{filename}"',
+            'X-Accel-Buffering': 'no'  # 反向代理不缓冲，边生成边下发
+        })
     except Exception as e:
         return jsonify({
             'success': False,
@@ -117,18 +167,67 @@ def export_data():
 
 @manage_bp.route('/data/query', methods=['GET'])
 def query_data():
-    """查询历史数据"""
+    """
+    查询历史数据
+    
+    不带keyword时按发布时间倒序列出；带keyword时全文检索，按相关度排序。两种方式的返回结构相同，
+    都用上一页返回的next_cursor翻页（游标不透明，列表和检索的游标不能混用）。
+    游标记录上一页最后一条的排序位置而不是偏移量，翻页深度不影响查询代价。
+    全文检索的相关度随全文索引整体变化，翻页期间有新数据写入时后续页可能个别重复或遗漏
+    
+    Query Parameters:
+        topic_id: 话题ID，可选
+        start_date: 起始日期 YYYY-MM-DD（含），可选
+        end_date: 结束日期 YYYY-MM-DD（含），可选
+        keyword: 全文检索关键词（空格分隔为AND），可选
+        include: 额外返回的大字段，逗号分隔（topic_text,comment_text,raw_data），可选
+        limit: 每页条数，默认50，最大200
+        cursor: 上一页返回的next_cursor，第一页不传
+    
+    Response:
+    {
+        "success": true,
+        "items": [...],       // 检索时每条附带相关度rank
+        "next_cursor": "...", // 没有下一页时为null
+        "has_more": true
+    }
+    """
     try:
         topic_id = request.args.get('topic_id', type=int)
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
         keyword = request.args.get('keyword')
+        include = [name.strip() for name in request.args.get('include', '').split(',') if name.strip()]
+        limit = min(max(request.args.get('limit', 50, type=int), 1), 200)
+        cursor = request.args.get('cursor') or None
+        
+        try:
+            start = datetime.strptime(start_date, '%Y-%m-%d') if start_date else None
+            end = datetime.strptime(end_date, '%Y-%m-%d') + timedelta(days=1) if end_date else None
+        except ValueError:
+            return jsonify({
+                'success': False,
+                'message': '日期格式应为YYYY-MM-DD'
+            }), 400
         
-        # TODO: 实现数据查询逻辑
+        try:
+            if keyword and keyword.strip():
+                result = search_posts(keyword, topic_id=topic_id, start=start, end=end,
+                                      cursor=cursor, limit=limit, include=include)
+            else:
+                result = list_posts(topic_id=topic_id, start=start, end=end,
+                                    cursor=cursor, limit=limit, include=include)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
         
         return jsonify({
             'success': True,
-            'data': []
+            'items': result['items'],
+            'next_cursor': result['next_cursor'],
+            'has_more': result['has_more']
         }), 200
     except Exception as e:
         return jsonify({
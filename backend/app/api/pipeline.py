@@ -2,8 +2,9 @@
 Pipeline API接口
 提供完整的数据处理流程
 """
-from flask import Blueprint, request, jsonify
-from app.services.pipeline_service import DataPipelineService
+from flask import Blueprint, request, jsonify, current_app
+from app.services.job_manager import job_manager
+from app.services.pipeline_service import DataPipelineService, PIPELINE_STAGES, TOPIC_STAGES
 
 pipeline_bp = Blueprint('pipeline', __name__, url_prefix='/api/pipeline')
 
@@ -11,13 +12,14 @@ pipeline_bp = Blueprint('pipeline', __name__, url_prefix='/api/pipeline')
 @pipeline_bp.route('/run', methods=['POST'])
 def run_pipeline():
     """
-    运行完整pipeline
+    提交完整pipeline任务（后台执行，立即返回任务ID）
     
     Request Body:
     {
         "mode": "hot_topics",  // 'hot_topics' 或 'search'
         "keyword": "春节",  // mode='search'时必需
         "limit": 10,  // mode='hot_topics'时的数量，默认10
+        "force": false,  // 可选，true时重新处理所有活跃话题（默认跳过没有新微博的话题）
         "steps": {  // 可选，默认全部执行
             "crawl": true,
             "sync": true,
@@ -26,18 +28,14 @@ def run_pipeline():
         }
     }
     
-    Response:
+    Response (202):
     {
-        "status": "success",
-        "results": {
-            "topics_added": 5,
-            "posts_synced": 150,
-            "keywords_extracted": 400,
-            "sentiments_analyzed": 150,
-            "errors": []
-        },
-        "message": "..."
+        "status": "accepted",
+        "job_id": "...",
+        "job": {...}  // 同 GET /api/pipeline/jobs/<job_id>
     }
+    
+    已有任务在排队或运行时返回409，job_id为该任务
     """
     try:
         data = request.get_json() or {}
@@ -46,6 +44,7 @@ def run_pipeline():
         keyword = data.get('keyword')
         limit = data.get('limit', 10)
         steps = data.get('steps')
+        force = bool(data.get('force', False))
         
         # 验证参数
         if mode not in ['hot_topics', 'search']:
@@ -60,16 +59,23 @@ def run_pipeline():
                 'message': 'search模式需要提供keyword参数'
             }), 400
         
-        # 运行pipeline
-        pipeline_service = DataPipelineService()
-        result = pipeline_service.run_full_pipeline(
-            mode=mode,
-            keyword=keyword,
-            limit=limit,
-            steps=steps
+        # 提交到后台执行
+        job, created = job_manager.submit(
+            current_app._get_current_object(),
+            'pipeline',
+            lambda job: DataPipelineService().run_full_pipeline(
+                mode=mode,
+                keyword=keyword,
+                limit=limit,
+                steps=steps,
+                job=job,
+                force=force
+            ),
+            stages=PIPELINE_STAGES,
+            params={'mode': mode, 'keyword': keyword, 'limit': limit, 'steps': steps, 'force': force}
         )
         
-        return jsonify(result), 200 if result['status'] == 'success' else 400
+        return _submit_response(job, created)
         
     except Exception as e:
         return jsonify({
@@ -81,24 +87,25 @@ def run_pipeline():
 @pipeline_bp.route('/process/<int:topic_id>', methods=['POST'])
 def process_topic(topic_id):
     """
-    处理单个话题（仅数据处理，不包括爬取）
+    提交单个话题的处理任务（仅数据处理，不包括爬取）
     
-    Response:
+    Response (202):
     {
-        "status": "success",
-        "results": {
-            "keywords_count": 50,
-            "sentiments_count": 100,
-            "errors": []
-        },
-        "message": "..."
+        "status": "accepted",
+        "job_id": "...",
+        "job": {...}  // 完成后results为 {"keywords_count", "sentiments_count", "errors"}
     }
     """
     try:
-        pipeline_service = DataPipelineService()
-        result = pipeline_service.process_topic(topic_id)
+        job, created = job_manager.submit(
+            current_app._get_current_object(),
+            'process_topic',
+            lambda job: DataPipelineService().process_topic(topic_id, job=job),
+            stages=TOPIC_STAGES,
+            params={'topic_id': topic_id}
+        )
         
-        return jsonify(result), 200 if result['status'] == 'success' else 400
+        return _submit_response(job, created)
         
     except Exception as e:
         return jsonify({
@@ -107,6 +114,93 @@ def process_topic(topic_id):
         }), 500
 
 
+def _submit_response(job, created):
+    """提交成功返回202；已有任务在运行时返回409"""
+    if not created:
+        return jsonify({
+            'status': 'error',
+            'message': 'Pipeline已在运行中',
+            'job_id': job.id,
+            'job': job.to_dict()
+        }), 409
+    
+    return jsonify({
+        'status': 'accepted',
+        'job_id': job.id,
+        'job': job.to_dict()
+    }), 202
+
+
+@pipeline_bp.route('/jobs', methods=['GET'])
+def list_jobs():
+    """
+    最近的任务列表（新的在前）
+    
+    Query Parameters:
+        limit: 返回数量，默认20
+    """
+    limit = request.args.get('limit', 20, type=int)
+    return jsonify({
+        'status': 'success',
+        'jobs': [job.to_dict() for job in job_manager.list_jobs(limit)]
+    }), 200
+
+
+@pipeline_bp.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """
+    查询任务状态
+    
+    Response:
+    {
+        "status": "success",
+        "job": {
+            "job_id": "...",
+            "kind": "pipeline",
+            "status": "queued" | "running" | "success" | "error" | "cancelled",
+            "progress": 0.5,
+            "stages": [
+                {"name": "crawl", "status": "success", "done": 5, "total": null, "elapsed": 12.3, "message": ""},
+                {"name": "keywords", "status": "running", "done": 3, "total": 8, "elapsed": null, "message": ""},
+                ...
+            ],
+            "results": {...},  // 完成后同原同步接口的results
+            "message": "..."
+        }
+    }
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({
+            'status': 'error',
+            'message': '任务不存在'
+        }), 404
+    
+    return jsonify({
+        'status': 'success',
+        'job': job.to_dict()
+    }), 200
+
+
+@pipeline_bp.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """
+    取消任务（协作式: 任务在当前话题/阶段结束后退出）
+    """
+    job = job_manager.cancel(job_id)
+    if job is None:
+        return jsonify({
+            'status': 'error',
+            'message': '任务不存在'
+        }), 404
+    
+    return jsonify({
+        'status': 'success',
+        'message': '已请求取消' if job.cancel_requested else '任务已结束',
+        'job': job.to_dict()
+    }), 200
+
+
 @pipeline_bp.route('/status', methods=['GET'])
 def get_status():
     """
@@ -115,7 +209,10 @@ def get_status():
     Response:
     {
         "is_running": false,
-        "crawler_status": {...}
+        "active_job": null,  // 排队或运行中的任务
+        "crawler_status": {...},
+        "models": {...},
+        "database": {"journal_mode": "wal", ...}  // SQLite连接参数
     }
     """
     try:
@@ -89,3 +89,17 @@ def predict_text():
             'message': f'预测失败: {str(e)}'
         }), 500
 
+
+@sentiment_bp.route('/feature-cache', methods=['GET'])
+def get_feature_cache_stats():
+    """获取特征缓存命中统计"""
+    try:
+        return jsonify({
+            'success': True,
+            'data': sentiment_service.get_feature_cache_stats()
+        }), 200
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'查询失败: {str(e)}'
+        }), 500
@@ -1,7 +1,11 @@
 from flask import Blueprint, request, jsonify
-from app.models import WeiboPost, SentimentResult, Keyword, Topic
+from app.models import WeiboPost, SentimentResult, Keyword, KeywordBucket, Topic
 from app import db
 from sqlalchemy import func
+from app.services.hourly_stats import get_trend
+from app.services.region_stats import get_regions
+from app.services.sentiment_stats import get_topic_sentiment_stat
+from app.utils.time_buckets import GRANULARITIES
 from datetime import datetime, timedelta
 
 visualization_bp = Blueprint('visualization', __name__)
@@ -59,9 +63,15 @@ def get_topic_keywords(topic_id):
                 'message': f'话题ID {topic_id} 不存在'
             }), 404
         
+        # 只取最近一次整体快照（time_period不带时间桶前缀），避免与时间桶关键词混在一起
+        snapshot_filter = [Keyword.topic_id == topic_id, ~Keyword.time_period.contains(':')]
+        latest_period = db.session.query(func.max(Keyword.time_period)).filter(*snapshot_filter).scalar()
+        if latest_period:
+            snapshot_filter.append(Keyword.time_period == latest_period)
+        
         # 获取关键词数据,按频次降序排序,取前50个
-        keywords = Keyword.query.filter_by(
-            topic_id=topic_id
+        keywords = Keyword.query.filter(
+            *snapshot_filter
         ).order_by(
             Keyword.frequency.desc()
         ).limit(50).all()
@@ -84,6 +94,68 @@ def get_topic_keywords(topic_id):
         }), 500
 
 
+@visualization_bp.route('/topics/<int:topic_id>/keywords/evolution', methods=['GET'])
+def get_topic_keyword_evolution(topic_id):
+    """获取指定话题按时间桶的关键词演变
+    
+    Query参数:
+        granularity: hour/day/week，默认day
+        top_n: 每个时间段返回的关键词数量，默认10
+        limit: 返回最近多少个时间段，默认30
+    """
+    try:
+        topic = db.session.get(Topic, topic_id)
+        if not topic:
+            return jsonify({
+                'success': False,
+                'message': f'话题ID {topic_id} 不存在'
+            }), 404
+        
+        granularity = request.args.get('granularity', 'day')
+        top_n = request.args.get('top_n', 10, type=int)
+        limit = request.args.get('limit', 30, type=int)
+        
+        # 最近的limit个时间桶，按时间正序返回
+        buckets = KeywordBucket.query.filter_by(
+            topic_id=topic_id,
+            granularity=granularity
+        ).order_by(
+            KeywordBucket.start_time.desc()
+        ).limit(limit).all()
+        buckets.reverse()
+        
+        keywords_by_period = {bucket.time_period: [] for bucket in buckets}
+        if buckets:
+            for kw in Keyword.query.filter(
+                Keyword.topic_id == topic_id,
+                Keyword.time_period.in_(list(keywords_by_period))
+            ).order_by(Keyword.frequency.desc()):
+                period_keywords = keywords_by_period[kw.time_period]
+                if len(period_keywords) < top_n:
+                    period_keywords.append({'name': kw.keyword, 'value': kw.frequency})
+        
+        periods = [{
+            'period': bucket.time_period.split(':', 1)[1],
+            'start_time': bucket.start_time.isoformat(),
+            'end_time': bucket.end_time.isoformat(),
+            'post_count': bucket.post_count,
+            'sealed': bucket.sealed,
+            'keywords': keywords_by_period[bucket.time_period]
+        } for bucket in buckets]
+        
+        return jsonify({
+            'success': True,
+            'granularity': granularity,
+            'periods': periods
+        }), 200
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'查询关键词演变失败: {str(e)}'
+        }), 500
+
+
 @visualization_bp.route('/topics/<int:topic_id>/sentiments', methods=['GET'])
 def get_topic_sentiments(topic_id):
     """获取指定话题的情感分布统计"""
@@ -96,35 +168,15 @@ def get_topic_sentiments(topic_id):
                 'message': f'话题ID {topic_id} 不存在'
             }), 404
         
-        # 查询该话题下所有微博的情感分析结果
-        sentiment_stats = db.session.query(
-            SentimentResult.sentiment_label,
-            func.count(SentimentResult.id).label('count')
-        ).join(
-            WeiboPost, SentimentResult.weibo_id == WeiboPost.id
-        ).filter(
-            WeiboPost.topic_id == topic_id
-        ).group_by(
-            SentimentResult.sentiment_label
-        ).all()
+        # 读取话题情感汇总（按主键取一行）
+        stat = get_topic_sentiment_stat(topic_id)
         
-        # 初始化情感统计
         sentiments = {
-            'positive': 0,
-            'negative': 0,
-            'neutral': 0
+            'positive': stat.positive_count if stat else 0,
+            'negative': stat.negative_count if stat else 0,
+            'neutral': stat.neutral_count if stat else 0
         }
         
-        # 填充统计数据
-        for label, count in sentiment_stats:
-            label_lower = label.lower()
-            if '正' in label or 'positive' in label_lower:
-                sentiments['positive'] = count
-            elif '负' in label or 'negative' in label_lower:
-                sentiments['negative'] = count
-            elif '中' in label or 'neutral' in label_lower:
-                sentiments['neutral'] = count
-        
         return jsonify({
             'success': True,
             'sentiments': sentiments
@@ -139,21 +191,41 @@ def get_topic_sentiments(topic_id):
 
 @visualization_bp.route('/trend', methods=['GET'])
 def get_trend_data():
-    """获取热度趋势数据"""
+    """
+    获取热度趋势数据（由话题小时汇总聚合）
+    
+    Query Parameters:
+        topic_id: 话题ID，默认全部话题
+        period: hour / day / week，默认day
+        start_date: 起始日期 YYYY-MM-DD（含），可选
+        end_date: 结束日期 YYYY-MM-DD（含），可选
+    """
     try:
         topic_id = request.args.get('topic_id', type=int)
         period = request.args.get('period', 'day')  # hour, day, week
+        start_date = request.args.get('start_date')
+        end_date = request.args.get('end_date')
         
-        # TODO: 实现趋势数据统计逻辑
-        data = {
-            'timestamps': [],
-            'comment_counts': [],
-            'like_counts': [],
-            'repost_counts': []
-        }
+        if period not in GRANULARITIES:
+            return jsonify({
+                'success': False,
+                'message': f"period必须是{'/'.join(GRANULARITIES)}之一"
+            }), 400
+        
+        try:
+            start = datetime.strptime(start_date, '%Y-%m-%d') if start_date else None
+            end = datetime.strptime(end_date, '%Y-%m-%d') + timedelta(days=1) if end_date else None
+        except ValueError:
+            return jsonify({
+                'success': False,
+                'message': '日期格式应为YYYY-MM-DD'
+            }), 400
+        
+        data = get_trend(topic_id=topic_id, period=period, start=start, end=end)
         
         return jsonify({
             'success': True,
+            'period': period,
             'data': data
         }), 200
     except Exception as e:
@@ -165,13 +237,28 @@ def get_trend_data():
 
 @visualization_bp.route('/geographic', methods=['GET'])
 def get_geographic_data():
-    """获取地域分析数据"""
+    """
+    获取地域分析数据（读取话题地域汇总）
+    
+    Query Parameters:
+        topic_id: 话题ID，默认全部话题
+    
+    Response:
+    {
+        "success": true,
+        "data": {
+            "regions": [
+                {"code": "110000", "name": "北京", "post_count": 120, "positive": 40, "negative": 50, "neutral": 30},
+                ...  // 按微博数降序，海外为code=overseas，无法识别的为code=unknown
+            ]
+        }
+    }
+    """
     try:
         topic_id = request.args.get('topic_id', type=int)
         
-        # TODO: 实现地域数据统计逻辑
         data = {
-            'regions': []
+            'regions': get_regions(topic_id)
         }
         
         return jsonify({
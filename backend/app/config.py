@@ -3,12 +3,26 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
 class Config:
     """Base configuration"""
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-in-production'
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URI') or 'sqlite:///weibo_sentiment.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # SQLite连接参数（engine connect时设置，见app/utils/sqlite_profile.py）
+    # WAL模式下同步/情感分析批量写入时看板仍可并发读取
+    SQLITE_WAL = os.environ.get('SQLITE_WAL', '1') not in ('0', 'false', 'False', '')
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 10000))
+    SQLITE_CACHE_SIZE_KB = int(os.environ.get('SQLITE_CACHE_SIZE_KB', 65536))
+    SQLITE_MMAP_SIZE_MB = int(os.environ.get('SQLITE_MMAP_SIZE_MB', 256))
+    # 连接池: 每个工作线程（请求线程、Pipeline后台任务）占用一个连接
+    SQLITE_POOL_SIZE = int(os.environ.get('SQLITE_POOL_SIZE', 8))
+    SQLITE_MAX_OVERFLOW = int(os.environ.get('SQLITE_MAX_OVERFLOW', 8))
+    SQLITE_POOL_TIMEOUT = int(os.environ.get('SQLITE_POOL_TIMEOUT', 30))
+    
     # CORS settings
     CORS_HEADERS = 'Content-Type'
     
@@ -18,6 +32,30 @@ class Config:
     
     # Model settings
     SENTIMENT_MODEL_PATH = os.environ.get('SENTIMENT_MODEL_PATH', 'models/sentiment_model.pkl')
+    SENTIMENT_BATCH_SIZE = int(os.environ.get('SENTIMENT_BATCH_SIZE', 512))
+    SENTIMENT_FLUSH_SIZE = int(os.environ.get('SENTIMENT_FLUSH_SIZE', 5000))
+    # 启动时预热模型和NLP资源: none=首次使用时加载, sync=启动时加载完成后再提供服务, background=后台线程加载
+    MODEL_WARMUP = os.environ.get('MODEL_WARMUP', 'none')
+    
+    # Feature extraction settings (encoder: 本地CPU文本编码器，需要torch和transformers; hashing: 哈希向量化，用于测试)
+    FEATURIZER_BACKEND = os.environ.get('FEATURIZER_BACKEND', 'encoder')
+    FEATURIZER_MODEL = os.environ.get('FEATURIZER_MODEL', 'bert-base-chinese')
+    FEATURIZER_BATCH_SIZE = int(os.environ.get('FEATURIZER_BATCH_SIZE', 32))
+    # 编码器池化方式: cls 或 mean（分类器训练时的取法未留档，可用 check_featurizer.py 核对）
+    FEATURIZER_POOLING = os.environ.get('FEATURIZER_POOLING', 'cls')
+    FEATURE_DIM = int(os.environ.get('FEATURE_DIM', 768))
+    FEATURE_CACHE_SIZE = int(os.environ.get('FEATURE_CACHE_SIZE', 50000))
+    # 磁盘特征缓存目录，置空则只使用进程内缓存
+    FEATURE_CACHE_DIR = os.environ.get('FEATURE_CACHE_DIR', os.path.join(BACKEND_DIR, 'instance', 'feature_cache'))
+    FEATURE_CACHE_MAX_MB = int(os.environ.get('FEATURE_CACHE_MAX_MB', 512))
+    
+    # Keyword extraction settings (并行提取关键词的进程数，1为顺序执行)
+    KEYWORD_WORKERS = int(os.environ.get('KEYWORD_WORKERS', 1))
+    # TF-IDF的文档频率范围: topic=话题内统计, global=全部话题统计（突出话题特有词）
+    KEYWORD_IDF_SCOPE = os.environ.get('KEYWORD_IDF_SCOPE', 'topic')
+    # 按微博发布时间分桶提取关键词的粒度: hour/day/week，留空则不分桶
+    KEYWORD_BUCKET_GRANULARITY = os.environ.get('KEYWORD_BUCKET_GRANULARITY', 'day')
+    KEYWORD_BUCKET_TOP_N = int(os.environ.get('KEYWORD_BUCKET_TOP_N', 20))
     
     # API Keys
     OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY')
@@ -45,6 +83,16 @@ class TestingConfig(Config):
     DEBUG = True
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///test.db'
+    FEATURIZER_BACKEND = 'hashing'
+    FEATURE_CACHE_DIR = ''
+
+
+def get_setting(key, default=None):
+    """优先读取当前Flask应用配置，脱离应用上下文时（脚本、子进程）读取默认Config"""
+    from flask import current_app, has_app_context
+    if has_app_context():
+        return current_app.config.get(key, default)
+    return getattr(Config, key, default)
 
 
 config = {
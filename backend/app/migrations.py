@@ -0,0 +1,197 @@
+"""
+轻量级数据库迁移
+
+db.create_all 只会创建不存在的表，不会给已有表增加列或索引。这里的迁移按版本号顺序执行，
+已执行的版本记录在 schema_migrations 表中；每个迁移在一个事务里执行并登记，
+都写成可重复执行的形式（IF NOT EXISTS / 先检查再修改），因此新库（create_all已按模型
+建好列和索引）和旧库走同一套流程。
+
+新增迁移: 在 MIGRATIONS 末尾追加 Migration(版本号, 说明, upgrade函数)，
+需要的列/索引同时在模型中声明，保证新库和迁移后的旧库结构一致。迁移用SQLAlchemy的inspect检查
+表结构、只使用各数据库通用的DDL；只适用于特定数据库的迁移（如SQLite的FTS5全文索引）在
+dialects中声明，其他数据库上跳过并登记，相应功能自行降级（见 post_query.search_posts）。
+"""
+from collections import namedtuple
+from datetime import datetime
+from typing import Dict, List
+
+from sqlalchemy import Column, DateTime, MetaData, String, Table, inspect, select, text
+
+from app.utils.text_search import FTS_TABLE
+
+
+# dialects: 适用的数据库（engine.dialect.name），None表示全部
+Migration = namedtuple('Migration', ['version', 'description', 'upgrade', 'dialects'], defaults=(None,))
+
+_migrations_table = Table(
+    'schema_migrations', MetaData(),
+    Column('version', String(20), primary_key=True),
+    Column('description', String(200)),
+    Column('applied_at', DateTime)
+)
+
+
+def _has_column(connection, table: str, column: str) -> bool:
+    return any(info['name'] == column for info in inspect(connection).get_columns(table))
+
+
+def _add_column(connection, table: str, column: str, ddl_type: str) -> None:
+    if not _has_column(connection, table, column):
+        connection.execute(text(f'ALTER TABLE {table} ADD COLUMN {column} {ddl_type}'))
+
+
+def _create_index(connection, name: str, table: str, columns, unique: bool = False) -> None:
+    if any(index['name'] == name for index in inspect(connection).get_indexes(table)):
+        return
+    connection.execute(text(
+        f"CREATE {'UNIQUE ' if unique else ''}INDEX {name} ON {table} ({', '.join(columns)})"
+    ))
+
+
+# ====== 迁移 ======
+
+def _weibo_posts_region_code(connection):
+    # 已有微博的region_code由迁移0007（重建地域汇总）回填
+    _add_column(connection, 'weibo_posts', 'region_code', 'VARCHAR(10)')
+
+
+def _weibo_posts_topic_publish_time(connection):
+    # 按话题过滤、按发布时间范围查询（趋势/时间桶/话题微博数）
+    _create_index(connection, 'ix_weibo_posts_topic_id_publish_time', 'weibo_posts', ('topic_id', 'publish_time'))
+
+
+def _sentiment_results_unique_weibo_id(connection):
+    # 每条微博只保留最新的一条情感结果，再建唯一索引（子查询包一层派生表，MySQL不允许直接引用被删除的表）
+    deleted = connection.execute(text(
+        'DELETE FROM sentiment_results WHERE id NOT IN '
+        '(SELECT keep.id FROM (SELECT MAX(id) AS id FROM sentiment_results GROUP BY weibo_id) keep)'
+    )).rowcount
+    if deleted:
+        print(f"[Migrations] 删除重复的情感结果 {deleted} 条（汇总表由0007重建）")
+    _create_index(connection, 'ux_sentiment_results_weibo_id', 'sentiment_results', ('weibo_id',), unique=True)
+
+
+def _keywords_topic_time_period(connection):
+    # 话题关键词快照/时间桶关键词查询
+    _create_index(connection, 'ix_keywords_topic_id_time_period', 'keywords', ('topic_id', 'time_period'))
+
+
+def _weibo_posts_fts(connection):
+    # 微博正文全文检索: 无内容FTS5表（只存倒排索引），rowid即weibo_posts.id，
+    # 写入的是cjk_tokens预切分的词（见app/utils/text_search.py），由触发器与weibo_posts保持同步
+    table = FTS_TABLE
+    connection.execute(text(f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5(tokens, content='')"))
+    insert = f"INSERT INTO {table} (rowid, tokens) VALUES (new.id, cjk_tokens(new.content));"
+    delete = (f"INSERT INTO {table} ({table}, rowid, tokens) "
+              f"VALUES ('delete', old.id, cjk_tokens(old.content));")
+    connection.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS {table}_ai AFTER INSERT ON weibo_posts BEGIN {insert} END"
+    ))
+    connection.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS {table}_ad AFTER DELETE ON weibo_posts BEGIN {delete} END"
+    ))
+    connection.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS {table}_au AFTER UPDATE OF content ON weibo_posts BEGIN {delete} {insert} END"
+    ))
+    # 回填已有微博
+    connection.execute(text(f"INSERT INTO {table} ({table}) VALUES ('delete-all')"))
+    connection.execute(text(f"INSERT INTO {table} (rowid, tokens) SELECT id, cjk_tokens(content) FROM weibo_posts"))
+
+
+def _weibo_posts_publish_time(connection):
+    # 不限话题的历史数据列表按发布时间倒序游标翻页
+    _create_index(connection, 'ix_weibo_posts_publish_time', 'weibo_posts', ('publish_time',))
+
+
+def _topic_processing_states_bucket_watermark(connection):
+    # 时间桶关键词的话题级水位线，为空时按已有时间桶的max_post_id继续
+    _add_column(connection, 'topic_processing_states', 'bucket_granularity', 'VARCHAR(10)')
+    _add_column(connection, 'topic_processing_states', 'bucket_post_id', 'INTEGER DEFAULT 0')
+
+
+def _rebuild_rollups(connection):
+    # 从明细重建情感/小时/地域汇总表（引入汇总表之前的数据、0003删除的重复结果都在此计入），
+    # 之后汇总表只随写入增量维护，读取时不再检查是否需要重建
+    from app.services import hourly_stats, region_stats, sentiment_stats
+    for service in (sentiment_stats, hourly_stats, region_stats):
+        service.recount(connection)
+
+
+MIGRATIONS = [
+    Migration('0001', 'weibo_posts.region_code', _weibo_posts_region_code),
+    Migration('0002', 'index weibo_posts(topic_id, publish_time)', _weibo_posts_topic_publish_time),
+    Migration('0003', 'unique index sentiment_results(weibo_id)', _sentiment_results_unique_weibo_id),
+    Migration('0004', 'index keywords(topic_id, time_period)', _keywords_topic_time_period),
+    Migration('0005', 'fts5 weibo_posts_fts + sync triggers', _weibo_posts_fts, dialects=('sqlite',)),
+    Migration('0006', 'index weibo_posts(publish_time)', _weibo_posts_publish_time),
+    Migration('0007', 'rebuild rollup tables', _rebuild_rollups),
+    Migration('0008', 'topic_processing_states keyword bucket watermark', _topic_processing_states_bucket_watermark),
+]
+
+
+# ====== 执行 ======
+
+def applied_versions(db) -> Dict[str, str]:
+    """已执行的迁移 {版本号: 执行时间}"""
+    with db.engine.begin() as connection:
+        _migrations_table.create(connection, checkfirst=True)
+        return {
+            version: applied_at.isoformat(sep=' ') if isinstance(applied_at, datetime) else applied_at
+            for version, applied_at in connection.execute(
+                select(_migrations_table.c.version, _migrations_table.c.applied_at)
+            )
+        }
+
+
+def run_migrations(db) -> List[str]:
+    """
+    按顺序执行未执行过的迁移（在db.create_all之后调用）
+
+    Returns:
+        本次执行的版本号列表
+    """
+    applied = applied_versions(db)
+    dialect = db.engine.dialect.name
+    executed = []
+    for migration in MIGRATIONS:
+        if migration.version in applied:
+            continue
+        skipped = migration.dialects is not None and dialect not in migration.dialects
+        with db.engine.begin() as connection:
+            if not skipped:
+                migration.upgrade(connection)
+            connection.execute(_migrations_table.insert().values(
+                version=migration.version, description=migration.description, applied_at=datetime.utcnow()
+            ))
+        executed.append(migration.version)
+        if skipped:
+            print(f"[Migrations] 跳过 {migration.version}: {migration.description}（仅适用于 {', '.join(migration.dialects)}）")
+        else:
+            print(f"[Migrations] 已执行 {migration.version}: {migration.description}")
+
+    missing = verify_indexes(db)
+    if missing:
+        print(f"[Migrations] ⚠️ 缺少索引: {', '.join(missing)}")
+    return executed
+
+
+def verify_indexes(db) -> List[str]:
+    """检查模型声明的索引是否都已存在，返回缺失的索引名"""
+    inspector = inspect(db.engine)
+    missing = []
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        missing.extend(index.name for index in table.indexes if index.name not in existing)
+    return missing
+
+
+def migration_status(db) -> List[Dict]:
+    """全部迁移及其执行状态"""
+    applied = applied_versions(db)
+    return [{
+        'version': migration.version,
+        'description': migration.description,
+        'applied_at': applied.get(migration.version)
+    } for migration in MIGRATIONS]
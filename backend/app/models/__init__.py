@@ -1,6 +1,9 @@
 from app.models.topic import Topic
 from app.models.weibo import WeiboPost
-from app.models.sentiment import SentimentResult
-from app.models.keyword import Keyword
+from app.models.sentiment import SentimentResult, TopicSentimentStat
+from app.models.keyword import Keyword, KeywordBucket
+from app.models.sync_state import SyncState, SyncRetryRow, TopicProcessingState
+from app.models.segment import Vocabulary, PostSegment, TermStat, CorpusStat
+from app.models.rollup import TopicHourlyStat, TopicRegionStat
 
-__all__ = ['Topic', 'WeiboPost', 'SentimentResult', 'Keyword']
+__all__ = ['Topic', 'WeiboPost', 'SentimentResult', 'TopicSentimentStat', 'Keyword', 'KeywordBucket', 'SyncState', 'SyncRetryRow', 'TopicProcessingState', 'Vocabulary', 'PostSegment', 'TermStat', 'CorpusStat', 'TopicHourlyStat', 'TopicRegionStat']
@@ -5,6 +5,9 @@ from app import db
 class Keyword(db.Model):
     """关键词表"""
     __tablename__ = 'keywords'
+    __table_args__ = (
+        db.Index('ix_keywords_topic_id_time_period', 'topic_id', 'time_period'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     topic_id = db.Column(db.Integer, db.ForeignKey('topics.id'), nullable=False)
@@ -25,3 +28,38 @@ class Keyword(db.Model):
     
     def __repr__(self):
         return f'<Keyword {self.keyword}>'
+
+
+class KeywordBucket(db.Model):
+    """关键词时间桶状态表（时间桶结束后封存，之后只有迟到的微博才会触发重算）"""
+    __tablename__ = 'keyword_buckets'
+    __table_args__ = (
+        db.UniqueConstraint('topic_id', 'time_period', name='uq_keyword_bucket_period'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    topic_id = db.Column(db.Integer, db.ForeignKey('topics.id'), nullable=False)
+    granularity = db.Column(db.String(10), nullable=False)  # hour/day/week
+    time_period = db.Column(db.String(50), nullable=False)  # e.g. "day:2024-12-16"
+    start_time = db.Column(db.DateTime, nullable=False)
+    end_time = db.Column(db.DateTime, nullable=False)
+    post_count = db.Column(db.Integer, default=0)
+    max_post_id = db.Column(db.Integer, default=0)  # 计算时话题已处理到的最大微博id
+    sealed = db.Column(db.Boolean, default=False)
+    computed_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'topic_id': self.topic_id,
+            'granularity': self.granularity,
+            'time_period': self.time_period,
+            'start_time': self.start_time.isoformat() if self.start_time else None,
+            'end_time': self.end_time.isoformat() if self.end_time else None,
+            'post_count': self.post_count,
+            'sealed': self.sealed,
+            'computed_at': self.computed_at.isoformat() if self.computed_at else None
+        }
+    
+    def __repr__(self):
+        return f'<KeywordBucket {self.topic_id} {self.time_period}>'
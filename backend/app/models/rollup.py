@@ -0,0 +1,58 @@
+from datetime import datetime
+from app import db
+
+
+class TopicHourlyStat(db.Model):
+    """话题小时汇总表（按微博发布时间所在小时累计，同步/情感分析时增量维护）"""
+    __tablename__ = 'topic_hourly_stats'
+    
+    topic_id = db.Column(db.Integer, db.ForeignKey('topics.id'), primary_key=True)
+    hour_start = db.Column(db.DateTime, primary_key=True)  # 发布时间所在小时的起始时间
+    post_count = db.Column(db.Integer, default=0, nullable=False)
+    likes_sum = db.Column(db.Integer, default=0, nullable=False)
+    reposts_sum = db.Column(db.Integer, default=0, nullable=False)
+    comments_sum = db.Column(db.Integer, default=0, nullable=False)
+    positive_count = db.Column(db.Integer, default=0, nullable=False)
+    negative_count = db.Column(db.Integer, default=0, nullable=False)
+    neutral_count = db.Column(db.Integer, default=0, nullable=False)
+    
+    def to_dict(self):
+        return {
+            'topic_id': self.topic_id,
+            'hour_start': self.hour_start.isoformat() if self.hour_start else None,
+            'post_count': self.post_count,
+            'likes_sum': self.likes_sum,
+            'reposts_sum': self.reposts_sum,
+            'comments_sum': self.comments_sum,
+            'positive_count': self.positive_count,
+            'negative_count': self.negative_count,
+            'neutral_count': self.neutral_count
+        }
+    
+    def __repr__(self):
+        return f'<TopicHourlyStat {self.topic_id} @ {self.hour_start}>'
+
+
+class TopicRegionStat(db.Model):
+    """话题地域汇总表（按归一化后的地域代码累计微博数和各情感标签条数，同步/情感分析时增量维护）"""
+    __tablename__ = 'topic_region_stats'
+    
+    topic_id = db.Column(db.Integer, db.ForeignKey('topics.id'), primary_key=True)
+    region_code = db.Column(db.String(10), primary_key=True)
+    post_count = db.Column(db.Integer, default=0, nullable=False)
+    positive_count = db.Column(db.Integer, default=0, nullable=False)
+    negative_count = db.Column(db.Integer, default=0, nullable=False)
+    neutral_count = db.Column(db.Integer, default=0, nullable=False)
+    
+    def to_dict(self):
+        return {
+            'topic_id': self.topic_id,
+            'region_code': self.region_code,
+            'post_count': self.post_count,
+            'positive_count': self.positive_count,
+            'negative_count': self.negative_count,
+            'neutral_count': self.neutral_count
+        }
+    
+    def __repr__(self):
+        return f'<TopicRegionStat {self.topic_id} @ {self.region_code}>'
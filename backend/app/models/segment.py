@@ -0,0 +1,63 @@
+from datetime import datetime
+from app import db
+
+
+class Vocabulary(db.Model):
+    """分词词表（词 <-> 整数id，分词缓存中只保存id）"""
+    __tablename__ = 'vocabulary'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    word = db.Column(db.String(200), unique=True, nullable=False)
+    
+    def __repr__(self):
+        return f'<Vocabulary {self.id}:{self.word}>'
+
+
+class PostSegment(db.Model):
+    """微博分词结果缓存表"""
+    __tablename__ = 'post_segments'
+    
+    post_id = db.Column(db.Integer, db.ForeignKey('weibo_posts.id'), primary_key=True)
+    topic_id = db.Column(db.Integer, nullable=False)  # 词频统计计入的话题
+    fingerprint = db.Column(db.String(40), nullable=False)  # 分词规则指纹（停用词表+规则版本）
+    content_hash = db.Column(db.String(40), nullable=False)  # sha1(分词规则指纹 + 原文)
+    token_ids = db.Column(db.LargeBinary, nullable=False)  # int32小端数组，元素为vocabulary.id
+    token_count = db.Column(db.Integer, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<PostSegment {self.post_id} ({self.token_count} tokens)>'
+
+
+class TermStat(db.Model):
+    """词频统计表（按话题累计，topic_id=0为全部话题），随分词缓存增量更新"""
+    __tablename__ = 'term_stats'
+    
+    topic_id = db.Column(db.Integer, primary_key=True)
+    word_id = db.Column(db.Integer, db.ForeignKey('vocabulary.id'), primary_key=True)
+    doc_freq = db.Column(db.Integer, default=0)  # 包含该词的微博数
+    term_freq = db.Column(db.Integer, default=0)  # 该词出现的总次数
+    
+    def __repr__(self):
+        return f'<TermStat {self.topic_id}:{self.word_id} df={self.doc_freq} tf={self.term_freq}>'
+
+
+class CorpusStat(db.Model):
+    """语料规模统计表（按话题，topic_id=0为全部话题）"""
+    __tablename__ = 'corpus_stats'
+    
+    topic_id = db.Column(db.Integer, primary_key=True)
+    doc_count = db.Column(db.Integer, default=0)  # 已计入统计的微博数
+    token_count = db.Column(db.Integer, default=0)  # 分词总数
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'topic_id': self.topic_id,
+            'doc_count': self.doc_count,
+            'token_count': self.token_count,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+    
+    def __repr__(self):
+        return f'<CorpusStat {self.topic_id}: {self.doc_count} docs>'
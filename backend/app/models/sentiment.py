@@ -5,6 +5,9 @@ from app import db
 class SentimentResult(db.Model):
     """情感分析结果表"""
     __tablename__ = 'sentiment_results'
+    __table_args__ = (
+        db.Index('ux_sentiment_results_weibo_id', 'weibo_id', unique=True),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     weibo_id = db.Column(db.Integer, db.ForeignKey('weibo_posts.id'), nullable=False)
@@ -25,3 +28,39 @@ class SentimentResult(db.Model):
     
     def __repr__(self):
         return f'<SentimentResult {self.id} - {self.sentiment_label}>'
+
+
+class TopicSentimentStat(db.Model):
+    """话题情感汇总表（每个话题一行，随情感结果写入在同一事务中增量维护）"""
+    __tablename__ = 'topic_sentiment_stats'
+    
+    LABEL_KEYS = {'正面': 'positive', '负面': 'negative', '中性': 'neutral'}
+    
+    topic_id = db.Column(db.Integer, db.ForeignKey('topics.id'), primary_key=True)
+    positive_count = db.Column(db.Integer, default=0, nullable=False)
+    negative_count = db.Column(db.Integer, default=0, nullable=False)
+    neutral_count = db.Column(db.Integer, default=0, nullable=False)
+    positive_intensity_sum = db.Column(db.Float, default=0.0, nullable=False)
+    negative_intensity_sum = db.Column(db.Float, default=0.0, nullable=False)
+    neutral_intensity_sum = db.Column(db.Float, default=0.0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    @property
+    def total(self):
+        return (self.positive_count or 0) + (self.negative_count or 0) + (self.neutral_count or 0)
+    
+    def to_dict(self):
+        return {
+            'topic_id': self.topic_id,
+            'positive_count': self.positive_count,
+            'negative_count': self.negative_count,
+            'neutral_count': self.neutral_count,
+            'positive_intensity_sum': self.positive_intensity_sum,
+            'negative_intensity_sum': self.negative_intensity_sum,
+            'neutral_intensity_sum': self.neutral_intensity_sum,
+            'total': self.total,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+    
+    def __repr__(self):
+        return f'<TopicSentimentStat {self.topic_id} - {self.total}>'
@@ -0,0 +1,94 @@
+from datetime import datetime
+from app import db
+
+
+class SyncState(db.Model):
+    """数据同步水位线表（记录每个外部数据源已同步到的位置）"""
+    __tablename__ = 'sync_states'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    source = db.Column(db.String(100), unique=True, nullable=False)  # e.g. "mediacrawler.weibo_note"
+    last_modify_ts = db.Column(db.BigInteger, default=0)  # 已同步行的最大 last_modify_ts
+    last_row_id = db.Column(db.Integer, default=0)  # 同一时间戳内已同步的最大行id
+    rows_synced = db.Column(db.Integer, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'source': self.source,
+            'last_modify_ts': self.last_modify_ts,
+            'last_row_id': self.last_row_id,
+            'rows_synced': self.rows_synced,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+    
+    def __repr__(self):
+        return f'<SyncState {self.source} @ {self.last_modify_ts}>'
+
+
+class SyncRetryRow(db.Model):
+    """同步重试表（水位线已越过但未能写入的外部数据行: 转换出错或没有可归属的话题），每次同步先重试"""
+    __tablename__ = 'sync_retry_rows'
+    __table_args__ = (
+        db.UniqueConstraint('source', 'row_id', name='uq_sync_retry_rows_source_row'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    source = db.Column(db.String(100), nullable=False)  # 与SyncState.source相同
+    row_id = db.Column(db.Integer, nullable=False)  # 外部表中的行id
+    reason = db.Column(db.String(20), nullable=False)  # error / unmatched
+    last_error = db.Column(db.Text)
+    attempts = db.Column(db.Integer, default=1)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'source': self.source,
+            'row_id': self.row_id,
+            'reason': self.reason,
+            'last_error': self.last_error,
+            'attempts': self.attempts,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+    
+    def __repr__(self):
+        return f'<SyncRetryRow {self.source}#{self.row_id} ({self.reason})>'
+
+
+class TopicProcessingState(db.Model):
+    """话题处理水位线表（同步写入的最大微博id，以及关键词/情感分析已处理到的微博id）"""
+    __tablename__ = 'topic_processing_states'
+    
+    STAGES = ('keywords', 'sentiment')
+    
+    topic_id = db.Column(db.Integer, db.ForeignKey('topics.id'), primary_key=True)
+    last_post_id = db.Column(db.Integer, default=0)  # 同步写入该话题的最大微博id
+    last_synced_at = db.Column(db.DateTime)
+    keywords_post_id = db.Column(db.Integer, default=0)  # 关键词已处理到的微博id
+    keywords_processed_at = db.Column(db.DateTime)
+    sentiment_post_id = db.Column(db.Integer, default=0)  # 情感分析已处理到的微博id
+    sentiment_processed_at = db.Column(db.DateTime)
+    bucket_granularity = db.Column(db.String(10))  # 时间桶关键词上次刷新的粒度
+    bucket_post_id = db.Column(db.Integer, default=0)  # 时间桶关键词已检查到的微博id（含没有发布时间的微博）
+    
+    def is_dirty(self, stage: str) -> bool:
+        """该阶段处理之后是否又同步了新微博"""
+        return (self.last_post_id or 0) > (getattr(self, f'{stage}_post_id') or 0)
+    
+    def to_dict(self):
+        return {
+            'topic_id': self.topic_id,
+            'last_post_id': self.last_post_id,
+            'last_synced_at': self.last_synced_at.isoformat() if self.last_synced_at else None,
+            'keywords_post_id': self.keywords_post_id,
+            'keywords_processed_at': self.keywords_processed_at.isoformat() if self.keywords_processed_at else None,
+            'sentiment_post_id': self.sentiment_post_id,
+            'sentiment_processed_at': self.sentiment_processed_at.isoformat() if self.sentiment_processed_at else None,
+            'bucket_granularity': self.bucket_granularity,
+            'bucket_post_id': self.bucket_post_id
+        }
+    
+    def __repr__(self):
+        return f'<TopicProcessingState {self.topic_id} @ {self.last_post_id}>'
@@ -16,6 +16,11 @@ class Topic(db.Model):
     # Relationships
     weibo_posts = db.relationship('WeiboPost', backref='topic', lazy='dynamic', cascade='all, delete-orphan')
     keywords = db.relationship('Keyword', backref='topic', lazy='dynamic', cascade='all, delete-orphan')
+    keyword_buckets = db.relationship('KeywordBucket', backref='topic', lazy='dynamic', cascade='all, delete-orphan')
+    processing_state = db.relationship('TopicProcessingState', uselist=False, cascade='all, delete-orphan')
+    sentiment_stat = db.relationship('TopicSentimentStat', uselist=False, cascade='all, delete-orphan')
+    hourly_stats = db.relationship('TopicHourlyStat', lazy='dynamic', cascade='all, delete-orphan')
+    region_stats = db.relationship('TopicRegionStat', lazy='dynamic', cascade='all, delete-orphan')
     
     def to_dict(self):
         return {
@@ -1,10 +1,20 @@
 from datetime import datetime
 from app import db
+from app.utils.region import region_code as normalize_region_code
+
+
+def _default_region_code(context):
+    """插入时由location计算region_code（ORM插入和bulk_insert_mappings都会调用）"""
+    return normalize_region_code(context.get_current_parameters().get('location'))
 
 
 class WeiboPost(db.Model):
     """微博数据表"""
     __tablename__ = 'weibo_posts'
+    __table_args__ = (
+        db.Index('ix_weibo_posts_topic_id_publish_time', 'topic_id', 'publish_time'),
+        db.Index('ix_weibo_posts_publish_time', 'publish_time'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     topic_id = db.Column(db.Integer, db.ForeignKey('topics.id'), nullable=False)
@@ -19,11 +29,13 @@ class WeiboPost(db.Model):
     reposts_count = db.Column(db.Integer, default=0)
     comments_count = db.Column(db.Integer, default=0)
     location = db.Column(db.String(200))
+    region_code = db.Column(db.String(10), default=_default_region_code)  # location归一化后的省级代码 / overseas / unknown（见app/utils/region.py）
     raw_data = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relationships
     sentiment_result = db.relationship('SentimentResult', backref='weibo_post', uselist=False, cascade='all, delete-orphan')
+    segment = db.relationship('PostSegment', uselist=False, cascade='all, delete-orphan')
     
     def to_dict(self):
         return {
@@ -40,6 +52,7 @@ class WeiboPost(db.Model):
             'reposts_count': self.reposts_count,
             'comments_count': self.comments_count,
             'location': self.location,
+            'region_code': self.region_code,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
     
@@ -7,15 +7,24 @@ import os
 import sys
 import re
 import sqlite3
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Optional
 from datetime import datetime
 
 # 添加项目路径以便导入crawl_hot_topics
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
 from app import db
-from app.models import Topic, WeiboPost
-from crawl_hot_topics import HotTopicCrawler
+from app.models import Topic, WeiboPost, SyncState, SyncRetryRow
+from app.services import hourly_stats, region_stats
+from app.services.job_manager import JobCancelled
+from app.services.topic_state import record_synced_posts
+from app.utils.batching import chunked
+from app.utils.data_cleaner import clean_batch
+from app.utils.topic_matcher import get_topic_matcher
+
+
+# 每批从MediaCrawler数据库读取的行数
+SYNC_BATCH_SIZE = 1000
 
 
 class CrawlerService:
@@ -31,6 +40,7 @@ class CrawlerService:
     def __init__(self):
         self.hot_topic_crawler = None
         self.is_running = False
+        self._topic_matcher = None
         
     def _is_sensitive_topic(self, topic_name: str) -> bool:
         """检查话题是否包含敏感词"""
@@ -57,7 +67,8 @@ class CrawlerService:
             }
         """
         try:
-            # 初始化爬虫
+            # 初始化爬虫（selenium只在真正爬取时导入）
+            from crawl_hot_topics import HotTopicCrawler
             self.hot_topic_crawler = HotTopicCrawler()
             
             # 爬取更多话题以便过滤后还有足够数量
@@ -249,97 +260,177 @@ class CrawlerService:
             print(f"[CrawlerService] 更新配置失败: {e}")
             return False
     
-    def sync_mediacrawler_data(self) -> Dict:
+    def sync_mediacrawler_data(self, full_sync: bool = False, batch_size: int = SYNC_BATCH_SIZE,
+                               checkpoint: Optional[Callable[[], None]] = None) -> Dict:
         """
-        从MediaCrawler同步数据到主数据库
+        从MediaCrawler增量同步数据到主数据库
         基于sync_crawler_data.py的逻辑
         
+        按 (last_modify_ts, id) 顺序用fetchmany分批流式读取，只读取上次同步水位线之后的行，
+        每批提交一次并把水位线持久化到sync_states表，内存占用与MediaCrawler数据库大小无关。
+        微博和评论的content保存原文，comment_text保存删除URL和@用户名后的正文（见_sync_batch）
+        
+        水位线越过整批行，其中转换出错或没有可归属话题（没有活跃话题）的行记录到sync_retry_rows，
+        每次同步先按行id重新读取这些行重试，写入成功（或外部表中已删除）后移出重试表。
+        
+        Args:
+            full_sync: 忽略水位线，从头重新同步
+            batch_size: 每批读取的行数
+            checkpoint: 每批提交后调用，抛出JobCancelled（任务取消）时停止同步，已提交的批次保留
+        
         Returns:
             {
                 'status': 'success' | 'error',
                 'posts_added': int,
-                'posts_skipped': int,
+                'posts_skipped': int,   已存在或没有可归属话题的行
+                'posts_failed': int,    转换出错的行
+                'retry_pending': int,   同步后仍在重试表中的行
                 'message': str
             }
         """
+        mc_conn = None
         try:
-            # 修复: 从 app/services/crawler_service.py 到项目根目录
-            # __file__: backend/app/services/crawler_service.py
-            # dirname 1: backend/app/services
-            # dirname 2: backend/app
-            # dirname 3: backend
-            # dirname 4: project_root
-            current_file = os.path.abspath(__file__)
-            services_dir = os.path.dirname(current_file)  # backend/app/services
-            app_dir = os.path.dirname(services_dir)  # backend/app
-            backend_dir = os.path.dirname(app_dir)  # backend
-            project_root = os.path.dirname(backend_dir)  # 项目根目录
-            mc_db_path = os.path.join(project_root, 'MediaCrawler', 'database', 'sqlite_tables.db')
-            
-            print(f"[CrawlerService] Current file: {current_file}")
-            print(f"[CrawlerService] Backend dir: {backend_dir}")
-            print(f"[CrawlerService] Project root: {project_root}")
+            mc_db_path = self._get_mc_db_path()
             print(f"[CrawlerService] MC DB path: {mc_db_path}")
-            print(f"[CrawlerService] DB exists: {os.path.exists(mc_db_path)}")
             
             if not os.path.exists(mc_db_path):
                 return {
                     'status': 'error',
                     'message': f'MediaCrawler数据库不存在: {mc_db_path}',
                     'posts_added': 0,
-                    'posts_skipped': 0
+                    'posts_skipped': 0,
+                    'posts_failed': 0,
+                    'retry_pending': 0
                 }
             
             mc_conn = sqlite3.connect(mc_db_path)
             mc_conn.row_factory = sqlite3.Row
-            mc_cursor = mc_conn.cursor()
-            
-            # 查询数据
-            mc_cursor.execute("SELECT * FROM weibo_note ORDER BY add_ts DESC")
-            notes = mc_cursor.fetchall()
-            
-            mc_cursor.execute("SELECT * FROM weibo_note_comment ORDER BY add_ts DESC")
-            comments = mc_cursor.fetchall()
             
             added_posts = 0
             skipped_posts = 0
-            
-            # 同步微博
-            for note in notes:
-                added, skipped = self._sync_single_note(note)
-                added_posts += added
-                skipped_posts += skipped
+            failed_posts = 0
+            retry_pending = 0
+            
+            # 每次同步只构建一次话题索引（话题未变化时直接复用）
+            self._topic_matcher = get_topic_matcher()
+            self._topic_matcher.stats.clear()
+            
+            # 先同步微博，再同步评论
+            for table, id_column, build_post in (
+                ('weibo_note', 'note_id', self._build_note_post),
+                ('weibo_note_comment', 'comment_id', self._build_comment_post)
+            ):
+                source = f'mediacrawler.{table}'
+                state = self._get_sync_state(source, reset=full_sync)
                 
-                if added_posts % 10 == 0 and added_posts > 0:
-                    db.session.commit()
-            
-            # 同步评论
-            for comment in comments:
-                added, skipped = self._sync_single_comment(comment)
-                added_posts += added
-                skipped_posts += skipped
+                # 先重试之前失败/未匹配的行
+                added_posts += self._retry_rows(mc_conn, table, source, id_column, build_post)
                 
-                if added_posts % 10 == 0:
+                for batch in self._iter_new_rows(mc_conn, table, state, batch_size):
+                    added, skipped, retry = self._sync_batch(batch, id_column, build_post)
+                    added_posts += added
+                    skipped_posts += skipped
+                    failed_posts += sum(1 for reason, _ in retry.values() if reason == 'error')
+                    self._save_retries(source, retry)
+                    
+                    # 与本批数据在同一事务中推进水位线
+                    last_row = batch[-1]
+                    state.last_modify_ts = self._row_watermark(last_row)
+                    state.last_row_id = last_row['id']
+                    state.rows_synced = (state.rows_synced or 0) + len(batch)
                     db.session.commit()
+                    if checkpoint:
+                        checkpoint()
+                
+                pending = SyncRetryRow.query.filter_by(source=source).count()
+                retry_pending += pending
+                print(f"[CrawlerService] {table} 已同步到 last_modify_ts={state.last_modify_ts}, "
+                      f"待重试 {pending} 行")
             
-            db.session.commit()
-            mc_conn.close()
+            print(f"[Sync] 话题匹配统计: {dict(self._topic_matcher.stats)}")
             
             return {
                 'status': 'success',
                 'posts_added': added_posts,
                 'posts_skipped': skipped_posts,
-                'message': f'同步完成: 新增{added_posts}条, 跳过{skipped_posts}条'
+                'posts_failed': failed_posts,
+                'retry_pending': retry_pending,
+                'message': f'同步完成: 新增{added_posts}条, 跳过{skipped_posts}条, '
+                           f'出错{failed_posts}条, 待重试{retry_pending}条'
             }
             
+        except JobCancelled:
+            raise
         except Exception as e:
             db.session.rollback()
             return {
                 'status': 'error',
                 'message': f'同步失败: {str(e)}',
                 'posts_added': 0,
-                'posts_skipped': 0
+                'posts_skipped': 0,
+                'posts_failed': 0,
+                'retry_pending': 0
             }
+        finally:
+            self._topic_matcher = None
+            if mc_conn is not None:
+                mc_conn.close()
+    
+    def _get_mc_db_path(self) -> str:
+        """MediaCrawler SQLite数据库路径"""
+        # __file__: backend/app/services/crawler_service.py
+        # dirname 1: backend/app/services
+        # dirname 2: backend/app
+        # dirname 3: backend
+        # dirname 4: project_root
+        current_file = os.path.abspath(__file__)
+        services_dir = os.path.dirname(current_file)  # backend/app/services
+        app_dir = os.path.dirname(services_dir)  # backend/app
+        backend_dir = os.path.dirname(app_dir)  # backend
+        project_root = os.path.dirname(backend_dir)  # 项目根目录
+        return os.path.join(project_root, 'MediaCrawler', 'database', 'sqlite_tables.db')
+    
+    def _get_sync_state(self, source: str, reset: bool = False) -> SyncState:
+        """获取（必要时创建）数据源的同步水位线"""
+        state = SyncState.query.filter_by(source=source).first()
+        if not state:
+            state = SyncState(source=source, last_modify_ts=0, last_row_id=0, rows_synced=0)
+            db.session.add(state)
+        elif reset:
+            state.last_modify_ts = 0
+            state.last_row_id = 0
+        return state
+    
+    def _row_watermark(self, row) -> int:
+        """行的水位线时间戳：优先last_modify_ts，缺失时使用add_ts（与SQL中的COALESCE一致）"""
+        for key in ('last_modify_ts', 'add_ts'):
+            if row[key] is not None:
+                return self._safe_int(row[key])
+        return 0
+    
+    def _iter_new_rows(self, mc_conn, table: str, state: SyncState, batch_size: int):
+        """
+        按 (水位线时间戳, id) 升序分批读取水位线之后的行
+        
+        Yields:
+            每批sqlite3.Row列表
+        """
+        watermark = "COALESCE(last_modify_ts, add_ts, 0)"
+        cursor = mc_conn.cursor()
+        cursor.execute(
+            f"SELECT * FROM {table} "
+            f"WHERE {watermark} > ? OR ({watermark} = ? AND id > ?) "
+            f"ORDER BY {watermark}, id",
+            (state.last_modify_ts or 0, state.last_modify_ts or 0, state.last_row_id or 0)
+        )
+        try:
+            while True:
+                batch = cursor.fetchmany(batch_size)
+                if not batch:
+                    break
+                yield batch
+        finally:
+            cursor.close()
     
     def _safe_get(self, row, key, default=''):
         """安全获取sqlite3.Row的值"""
@@ -348,130 +439,169 @@ class CrawlerService:
         except (KeyError, IndexError):
             return default
     
-    def _sync_single_note(self, note) -> tuple:
-        """同步单条微博"""
-        try:
-            note_id = str(note['note_id'])
-            if WeiboPost.query.filter_by(weibo_id=note_id).first():
-                return 0, 1
-            
-            content = self._safe_get(note, 'content', '')
-            topic = self._find_topic_for_content(content, self._safe_get(note, 'source_keyword', ''))
-            
-            if not topic:
-                return 0, 1
-            
-            post = WeiboPost(
-                topic_id=topic.id,
-                weibo_id=note_id,
-                content=content,
-                topic_text=topic.topic_tag,
-                comment_text=content,
-                user_nickname=self._safe_get(note, 'nickname', '未知用户'),
-                user_fans_count=0,
-                publish_time=self._parse_timestamp(self._safe_get(note, 'create_time')),
-                likes_count=self._safe_int(self._safe_get(note, 'liked_count')),
-                reposts_count=self._safe_int(self._safe_get(note, 'shared_count')),
-                comments_count=self._safe_int(self._safe_get(note, 'comments_count')),
-                location=self._safe_get(note, 'ip_location', ''),
-                created_at=datetime.utcnow()
-            )
-            
-            db.session.add(post)
-            return 1, 0
+    def _sync_batch(self, batch, id_column: str, build_post) -> tuple:
+        """
+        同步一批行：一次IN查询过滤已存在的weibo_id，其余行一次批量插入
+        
+        Args:
+            batch: sqlite3.Row列表
+            id_column: 行中作为weibo_id的列名
+            build_post: 将行转换为WeiboPost字段字典的函数，无法归属话题时返回None
             
-        except Exception as e:
-            print(f"[CrawlerService] Error syncing note: {e}")
-            return 0, 0
-    
-    def _sync_single_comment(self, comment) -> tuple:
-        """同步单条评论"""
-        try:
-            comment_id = str(comment['comment_id'])
-            if WeiboPost.query.filter_by(weibo_id=comment_id).first():
-                return 0, 1
-            
-            content = self._safe_get(comment, 'content', '')
-            topic = self._find_topic_for_content(content, None)
-            
-            if not topic:
-                return 0, 1
-            
-            post = WeiboPost(
-                topic_id=topic.id,
-                weibo_id=comment_id,
-                content=content,
-                topic_text=topic.topic_tag,
-                comment_text=content,
-                user_nickname=self._safe_get(comment, 'nickname', '未知用户'),
-                user_fans_count=0,
-                publish_time=self._parse_timestamp(self._safe_get(comment, 'create_time')),
-                likes_count=self._safe_int(self._safe_get(comment, 'comment_like_count')),
-                reposts_count=0,
-                comments_count=self._safe_int(self._safe_get(comment, 'sub_comment_count')),
-                location=self._safe_get(comment, 'ip_location', ''),
-                created_at=datetime.utcnow()
+        Returns:
+            (新增数, 跳过数, 需要重试的行 {行id: (原因 'error'/'unmatched', 错误信息)})，
+            没有可归属话题的行同时计入跳过数
+        """
+        weibo_ids = [str(row[id_column]) for row in batch]
+        
+        seen = set()
+        for chunk in chunked(weibo_ids):
+            seen.update(
+                weibo_id for (weibo_id,) in
+                db.session.query(WeiboPost.weibo_id).filter(WeiboPost.weibo_id.in_(chunk))
             )
-            
-            db.session.add(post)
-            return 1, 0
-            
-        except Exception as e:
-            print(f"[CrawlerService] Error syncing comment: {e}")
-            return 0, 0
+        
+        mappings = []
+        skipped = 0
+        retry = {}
+        for weibo_id, row in zip(weibo_ids, batch):
+            if weibo_id in seen:
+                skipped += 1
+                continue
+            
+            try:
+                post = build_post(row, weibo_id)
+            except Exception as e:
+                print(f"[CrawlerService] Error syncing {id_column}={weibo_id}: {e}")
+                retry[row['id']] = ('error', str(e))
+                continue
+            
+            if not post:
+                skipped += 1
+                retry[row['id']] = ('unmatched', None)
+                continue
+            
+            seen.add(weibo_id)
+            mappings.append(post)
+        
+        if mappings:
+            # comment_text保存轻度清洗后的正文: 删除URL和@用户名、合并空白，保留标点和表情供情感分析使用；
+            # content仍是原文。此前同步的微博comment_text与content相同（未清洗），不做回填
+            for post, comment_text in zip(mappings, clean_batch([post['content'] for post in mappings])):
+                post['comment_text'] = comment_text
+            db.session.bulk_insert_mappings(WeiboPost, mappings)
+            # 记录各话题新写入的最大微博id，供后续阶段判断哪些话题需要重新处理
+            record_synced_posts([post['weibo_id'] for post in mappings])
+            # 计入话题小时汇总（趋势图）和地域汇总（地域图）
+            hourly_stats.record_posts(mappings)
+            region_stats.record_posts(mappings)
+        
+        return len(mappings), skipped, retry
+    
+    def _save_retries(self, source: str, retry: Dict) -> None:
+        """把需要重试的行写入重试表（不提交，与该批数据和水位线一起提交）"""
+        if not retry:
+            return
+        existing = {}
+        for chunk in chunked(list(retry)):
+            for entry in SyncRetryRow.query.filter(SyncRetryRow.source == source, SyncRetryRow.row_id.in_(chunk)):
+                existing[entry.row_id] = entry
+        for row_id, (reason, error) in retry.items():
+            entry = existing.get(row_id)
+            if entry is None:
+                db.session.add(SyncRetryRow(source=source, row_id=row_id, reason=reason,
+                                            last_error=error, attempts=1))
+            else:
+                entry.reason = reason
+                entry.last_error = error
+                entry.attempts = (entry.attempts or 0) + 1
     
-    def _find_topic_for_content(self, content: str, source_keyword: Optional[str]) -> Optional[Topic]:
-        """为内容查找话题 - 使用多层匹配策略"""
+    def _retry_rows(self, mc_conn, table: str, source: str, id_column: str, build_post) -> int:
+        """
+        按行id重新读取重试表中的行并同步，每批提交一次
         
-        # 策略1: 从内容提取话题标签 (#话题名#)
-        if content:
-            match = re.search(r'#([^#]+)#', content)
-            if match:
-                topic_name = match.group(1).strip()
-                topic = Topic.query.filter(
-                    (Topic.topic_name == topic_name) |
-                    (Topic.topic_tag.contains(topic_name))
-                ).first()
-                if topic:
-                    print(f"[Sync] 精确匹配话题标签: {topic.topic_name}")
-                    return topic
+        Returns:
+            新增数
+        """
+        row_ids = [row_id for (row_id,) in db.session.query(SyncRetryRow.row_id).filter(
+            SyncRetryRow.source == source
+        ).order_by(SyncRetryRow.row_id)]
+        added_posts = 0
+        for chunk in chunked(row_ids):
+            rows = mc_conn.execute(
+                f"SELECT * FROM {table} WHERE id IN ({', '.join('?' * len(chunk))})", list(chunk)
+            ).fetchall()
+            added, _, retry = self._sync_batch(rows, id_column, build_post) if rows else (0, 0, {})
+            added_posts += added
+            # 已写入、已存在或外部表中已删除的行移出重试表
+            resolved = [row_id for row_id in chunk if row_id not in retry]
+            if resolved:
+                SyncRetryRow.query.filter(
+                    SyncRetryRow.source == source, SyncRetryRow.row_id.in_(resolved)
+                ).delete(synchronize_session=False)
+            self._save_retries(source, retry)
+            db.session.commit()
+        if row_ids:
+            print(f"[CrawlerService] {table} 重试 {len(row_ids)} 行, 新增 {added_posts} 条")
+        return added_posts
+    
+    def _build_note_post(self, note, note_id: str) -> Optional[Dict]:
+        """将单条微博转换为WeiboPost字段字典"""
+        content = self._safe_get(note, 'content', '')
+        topic = self._find_topic_for_content(content, self._safe_get(note, 'source_keyword', ''))
         
-        # 策略2: 使用source_keyword精确匹配
-        if source_keyword:
-            topic = Topic.query.filter(
-                (Topic.topic_name == source_keyword) |
-                (Topic.topic_tag.contains(source_keyword))
-            ).first()
-            if topic:
-                print(f"[Sync] 精确匹配source_keyword: {topic.topic_name}")
-                return topic
+        if not topic:
+            return None
         
-        # 策略3: source_keyword模糊匹配 - 检查是否包含任何话题关键词
-        if source_keyword:
-            all_topics = Topic.query.filter_by(is_active=True).all()
-            for topic in all_topics:
-                # 检查source_keyword是否包含话题名
-                if topic.topic_name in source_keyword or source_keyword in topic.topic_name:
-                    print(f"[Sync] 模糊匹配source_keyword '{source_keyword}' -> {topic.topic_name}")
-                    return topic
+        return {
+            'topic_id': topic.id,
+            'weibo_id': note_id,
+            'content': content,
+            'topic_text': topic.topic_tag,
+            'user_nickname': self._safe_get(note, 'nickname', '未知用户'),
+            'user_fans_count': 0,
+            'publish_time': self._parse_timestamp(self._safe_get(note, 'create_time')),
+            'likes_count': self._safe_int(self._safe_get(note, 'liked_count')),
+            'reposts_count': self._safe_int(self._safe_get(note, 'shared_count')),
+            'comments_count': self._safe_int(self._safe_get(note, 'comments_count')),
+            'location': self._safe_get(note, 'ip_location', ''),
+            'created_at': datetime.utcnow()
+        }
+    
+    def _build_comment_post(self, comment, comment_id: str) -> Optional[Dict]:
+        """将单条评论转换为WeiboPost字段字典"""
+        content = self._safe_get(comment, 'content', '')
+        topic = self._find_topic_for_content(content, None)
         
-        # 策略4: 从内容模糊匹配 - 检查内容是否包含任何话题关键词
-        if content:
-            all_topics = Topic.query.filter_by(is_active=True).all()
-            for topic in all_topics:
-                if topic.topic_name in content:
-                    print(f"[Sync] 内容包含话题名: {topic.topic_name}")
-                    return topic
+        if not topic:
+            return None
         
-        # 策略5: 使用默认话题(第一个活跃话题)
-        default_topic = Topic.query.filter_by(is_active=True).first()
-        if default_topic:
-            print(f"[Sync] 使用默认话题: {default_topic.topic_name}")
-            return default_topic
+        return {
+            'topic_id': topic.id,
+            'weibo_id': comment_id,
+            'content': content,
+            'topic_text': topic.topic_tag,
+            'user_nickname': self._safe_get(comment, 'nickname', '未知用户'),
+            'user_fans_count': 0,
+            'publish_time': self._parse_timestamp(self._safe_get(comment, 'create_time')),
+            'likes_count': self._safe_int(self._safe_get(comment, 'comment_like_count')),
+            'reposts_count': 0,
+            'comments_count': self._safe_int(self._safe_get(comment, 'sub_comment_count')),
+            'location': self._safe_get(comment, 'ip_location', ''),
+            'created_at': datetime.utcnow()
+        }
+    
+    def _find_topic_for_content(self, content: str, source_keyword: Optional[str]):
+        """为内容查找话题 - 使用多层匹配策略（内存索引，不查询数据库）
         
-        # 如果都没有话题,返回None
-        print(f"[Sync] ⚠️  无可用话题,跳过此条数据")
-        return None
+        Returns:
+            带id/topic_name/topic_tag属性的话题引用，无可用话题时为None
+        """
+        matcher = self._topic_matcher or get_topic_matcher()
+        topic = matcher.match(content, source_keyword)
+        if topic is None:
+            print(f"[Sync] ⚠️  无可用话题,跳过此条数据")
+        return topic
     
     def _parse_timestamp(self, ts) -> datetime:
         """解析时间戳"""
@@ -498,17 +628,13 @@ class CrawlerService:
     
     def get_status(self) -> Dict:
         """获取爬虫状态"""
-        current_file = os.path.abspath(__file__)
-        services_dir = os.path.dirname(current_file)
-        app_dir = os.path.dirname(services_dir)
-        backend_dir = os.path.dirname(app_dir)
-        project_root = os.path.dirname(backend_dir)
-        mc_db_path = os.path.join(project_root, 'MediaCrawler', 'database', 'sqlite_tables.db')
+        mc_db_path = self._get_mc_db_path()
         
         return {
             'status': 'ready',
             'mediacrawler_db_exists': os.path.exists(mc_db_path),
             'topics_count': Topic.query.count(),
             'posts_count': WeiboPost.query.count(),
+            'sync_states': [state.to_dict() for state in SyncState.query.all()],
             'is_running': self.is_running
         }
@@ -0,0 +1,103 @@
+"""
+数据导出 - 把微博及情感结果编码为CSV / JSON Lines字节流
+
+逐行从数据库游标读取（见 post_query.iter_posts），每攒够一块就编码输出，可选边生成边gzip压缩；
+内存占用与导出行数无关，接口返回流式响应，第一块数据生成后即开始发送。
+gzip时每块以Z_SYNC_FLUSH结束，客户端每收到一块即可解压出完整的行，而不必等压缩器缓冲区攒满。
+"""
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, Optional
+
+from app.services.post_query import OPTIONAL_COLUMNS, POST_COLUMNS, RESULT_COLUMNS, iter_posts
+
+
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+}
+
+# 每块编码的行数（也是从游标取行的批大小）
+CHUNK_ROWS = 1000
+
+
+def export_fields(include: Iterable[str] = ()) -> list:
+    """导出的字段名（与post_query的列顺序一致，未知字段名抛出ValueError）"""
+    include = list(dict.fromkeys(include or ()))
+    unknown = [name for name in include if name not in OPTIONAL_COLUMNS]
+    if unknown:
+        raise ValueError(f"include只能是{'/'.join(OPTIONAL_COLUMNS)}: {', '.join(unknown)}")
+    return [column.key for column in POST_COLUMNS] + include + [column.key for column in RESULT_COLUMNS]
+
+
+def _value(value):
+    return value.isoformat(sep=' ') if isinstance(value, datetime) else value
+
+
+def _csv_chunks(rows: Iterator[Dict], fields: list) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # BOM让Excel按UTF-8打开中文
+    buffer.write('\ufeff')
+    writer.writerow(fields)
+    yield buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    count = 0
+    for row in rows:
+        writer.writerow([_value(row[name]) for name in fields])
+        count += 1
+        if count % CHUNK_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _jsonl_chunks(rows: Iterator[Dict], fields: list) -> Iterator[str]:
+    lines = []
+    for row in rows:
+        lines.append(json.dumps({name: _value(row[name]) for name in fields}, ensure_ascii=False))
+        if len(lines) == CHUNK_ROWS:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+def _gzip(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31: 带gzip头和校验
+    for chunk in chunks:
+        # 每块（CHUNK_ROWS行）同步刷新一次，输出字节对齐的完整数据块
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_posts(format_type: str = 'csv', topic_id: Optional[int] = None, start: Optional[datetime] = None,
+                 end: Optional[datetime] = None, include: Iterable[str] = (), gzip: bool = False) -> Iterator[bytes]:
+    """
+    逐块生成导出文件内容
+
+    Args:
+        format_type: csv / jsonl
+        topic_id: 话题ID，默认全部话题
+        start: 发布时间下限（含），可选
+        end: 发布时间上限（不含），可选
+        include: 额外导出的大字段（topic_text / comment_text / raw_data）
+        gzip: 是否gzip压缩
+
+    Returns:
+        字节块生成器（需在应用上下文中迭代）
+    """
+    if format_type not in FORMATS:
+        raise ValueError(f"format必须是{'/'.join(FORMATS)}之一")
+    fields = export_fields(include)
+    rows = iter_posts(topic_id=topic_id, start=start, end=end, include=include, batch_size=CHUNK_ROWS)
+    encode = _csv_chunks if format_type == 'csv' else _jsonl_chunks
+    chunks = (text.encode('utf-8') for text in encode(rows, fields))
+    return _gzip(chunks) if gzip else chunks
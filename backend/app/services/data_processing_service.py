@@ -2,42 +2,36 @@
 数据处理服务 - 负责清洗、分词、关键词提取
 """
 
-import re
-import os
-import jieba
-from typing import List, Dict, Tuple
+import time
+import logging
+from typing import Callable, List, Dict, Tuple, Optional
 from datetime import datetime
 from collections import Counter
-from sklearn.feature_extraction.text import TfidfVectorizer
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from app import db
+from app.config import get_setting
 from app.models import Topic, WeiboPost, Keyword
+from app.services.job_manager import JobCancelled
+from app.services.keyword_bucket_service import KeywordBucketService
+from app.services.model_registry import model_registry
+from app.services.segmentation_cache import SegmentationCache
+from app.services.term_stats import ensure_term_stats, rank_topic_keywords, score_keywords
+from app.services.topic_state import begin_processing, mark_processed, split_changed_topics
+from app.utils.batching import chunked
+from app.utils.data_cleaner import STRICT_CLEANER
+
+
+# 增量分词每批的微博数（每批提交一次，也是任务取消的检查点）
+REFRESH_BATCH_SIZE = 2000
 
 
 class DataProcessingService:
     """数据处理服务类"""
     
-    def __init__(self):
-        # 加载停用词
-        self.stopwords = self._load_stopwords()
-        
-    def _load_stopwords(self) -> set:
-        """加载停用词表"""
-        try:
-            # 获取stopwords.txt的绝对路径
-            current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-            stopwords_path = os.path.join(current_dir, 'utils', 'stopwords.txt')
-            
-            if os.path.exists(stopwords_path):
-                with open(stopwords_path, 'r', encoding='utf-8') as f:
-                    stopwords = set(line.strip() for line in f if line.strip())
-                print(f"[INFO] 成功加载 {len(stopwords)} 个停用词")
-                return stopwords
-            else:
-                print(f"[WARNING] 停用词文件不存在: {stopwords_path}，使用默认停用词")
-                return {'的', '了', '是', '在', '我', '有', '和', '就', '不', '人', '都'}
-        except Exception as e:
-            print(f"[ERROR] 加载停用词失败: {e}，使用默认停用词")
-            return {'的', '了', '是', '在', '我', '有', '和', '就', '不', '人', '都'}
+    def __init__(self, stopwords: Optional[set] = None):
+        # 停用词取自进程级注册表（只读取一次文件）；子进程中由主进程直接传入
+        self.stopwords = stopwords if stopwords is not None else model_registry.stopwords()
+        self._segment_cache = None
     
     # ====== 阶段一：数据读取 ======
     
@@ -70,14 +64,13 @@ class DataProcessingService:
     
     def clean_text(self, raw_text: str) -> str:
         """
-        清洗单条文本
+        清洗单条文本（共用清洗引擎，一次扫描完成）
         
         处理步骤:
         1. 去除URL
         2. 去除@用户名
-        3. 去除emoji表情
-        4. 去除特殊字符
-        5. 去除多余空格
+        3. 去除emoji和特殊字符
+        4. 去除多余空格
         
         Args:
             raw_text: 原始文本
@@ -85,28 +78,11 @@ class DataProcessingService:
         Returns:
             清洗后的文本
         """
-        if not raw_text:
-            return ""
-        
-        text = raw_text
-        
-        # 1. 去除URL链接
-        text = re.sub(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+', '', text)
-        
-        # 2. 去除@用户名
-        text = re.sub(r'@[\w\u4e00-\u9fa5]+', '', text)
-        
-        # 3. 去除话题标签#(可选，根据需求)
-        # text = re.sub(r'#[^#]+#', '', text)
-        
-        # 4. 去除emoji和特殊符号
-        # TODO: 更完善的emoji过滤
-        text = re.sub(r'[^\u4e00-\u9fa5a-zA-Z0-9\s]', '', text)
-        
-        # 5. 去除多余空格
-        text = re.sub(r'\s+', ' ', text).strip()
-        
-        return text
+        return STRICT_CLEANER.clean(raw_text)
+    
+    def clean_batch(self, texts: List[str]) -> List[str]:
+        """批量清洗文本，返回与输入顺序一致的列表"""
+        return STRICT_CLEANER.clean_batch(texts)
     
     # ====== 阶段三：分词处理 ======
     
@@ -123,8 +99,8 @@ class DataProcessingService:
         if not text:
             return []
         
-        # 1. jieba分词
-        words = jieba.cut(text)
+        # 1. jieba分词（词典由注册表在首次使用时加载一次）
+        words = model_registry.jieba().cut(text)
         
         # 2. 过滤处理
         filtered_words = []
@@ -142,6 +118,37 @@ class DataProcessingService:
         
         return filtered_words
     
+    def tokenize_text(self, raw_text: str) -> List[str]:
+        """清洗并分词单条原始文本"""
+        return self.segment_text(self.clean_text(raw_text))
+    
+    def tokenize_texts(self, texts: List[str]) -> List[List[str]]:
+        """批量清洗并分词原始文本（不使用缓存）"""
+        return [self.segment_text(text) for text in self.clean_batch(texts)]
+    
+    @property
+    def segment_cache(self) -> SegmentationCache:
+        """分词结果缓存（首次使用时创建，子进程中不会用到）"""
+        if self._segment_cache is None:
+            self._segment_cache = SegmentationCache(self)
+        return self._segment_cache
+    
+    def tokenize_posts(self, posts: List[WeiboPost]) -> List[List[str]]:
+        """
+        获取微博的分词结果，已缓存且内容未变化的微博不再重新分词
+        
+        Args:
+            posts: 微博列表
+            
+        Returns:
+            与posts顺序一致的分词列表
+        """
+        cache = self.segment_cache
+        hits, misses = cache.hits, cache.misses
+        tokens = cache.get_tokens((post.id, post.content, post.topic_id) for post in posts)
+        print(f"      分词缓存命中 {cache.hits - hits} 条，新分词 {cache.misses - misses} 条")
+        return tokens
+    
     # ====== 阶段四：关键词提取 ======
     
     def extract_keywords_tf(self, posts: List[WeiboPost], top_n: int = 50) -> List[Dict]:
@@ -158,13 +165,17 @@ class DataProcessingService:
                 ...
             ]
         """
+        return self.keywords_tf_from_tokens(self.tokenize_posts(posts), top_n)
+    
+    def keywords_tf_from_texts(self, texts: List[str], top_n: int = 50) -> List[Dict]:
+        """对原始文本列表做清洗、分词并按词频提取关键词"""
+        return self.keywords_tf_from_tokens(self.tokenize_texts(texts), top_n)
+    
+    def keywords_tf_from_tokens(self, token_lists: List[List[str]], top_n: int = 50) -> List[Dict]:
+        """按词频从分词结果提取关键词"""
         # 1. 收集所有分词
         all_words = []
-        for post in posts:
-            # 清洗文本
-            cleaned = self.clean_text(post.content)
-            # 分词
-            words = self.segment_text(cleaned)
+        for words in token_lists:
             all_words.extend(words)
         
         # 2. 统计词频
@@ -196,67 +207,39 @@ class DataProcessingService:
         Returns:
             关键词列表
         """
-        if not posts:
+        return self.keywords_tfidf_from_tokens(self.tokenize_posts(posts), top_n)
+    
+    def keywords_tfidf_from_texts(self, texts: List[str], top_n: int = 50) -> List[Dict]:
+        """对原始文本列表做清洗、分词并按TF-IDF提取关键词"""
+        return self.keywords_tfidf_from_tokens(self.tokenize_texts(texts), top_n)
+    
+    def keywords_tfidf_from_tokens(self, token_lists: List[List[str]], top_n: int = 50) -> List[Dict]:
+        """按TF-IDF从分词结果提取关键词（每条微博是一个文档，打分公式与增量统计一致）"""
+        if not token_lists:
             return []
         
-        # 1. 准备文档列表和统计词频（每条微博是一个文档）
-        documents = []
-        word_freq_counter = Counter()
-        
-        for post in posts:
-            # 清洗文本
-            cleaned = self.clean_text(post.content)
-            # 分词
-            words = self.segment_text(cleaned)
-            # 用空格连接分词结果作为文档
-            documents.append(' '.join(words))
-            # 同时统计全局词频
-            word_freq_counter.update(words)
-        
-        # 如果文档为空，返回空结果
-        if not documents or all(not doc for doc in documents):
-            return []
+        # 统计词频和文档频率
+        term_freq = Counter()
+        doc_freq = Counter()
+        for words in token_lists:
+            term_freq.update(words)
+            doc_freq.update(set(words))
         
-        # 2. 使用TfidfVectorizer计算TF-IDF
-        try:
-            vectorizer = TfidfVectorizer(max_features=top_n * 2)  # 提取更多特征避免丢失
-            tfidf_matrix = vectorizer.fit_transform(documents)
-            
-            # 3. 提取特征词和权重
-            feature_names = vectorizer.get_feature_names_out()
-            
-            # 计算每个词的平均TF-IDF分数（跨所有文档）
-            tfidf_scores = tfidf_matrix.sum(axis=0).A1
-            
-            # 4. 为每个词创建(词, TF-IDF分数, 词频)的元组
-            keyword_data = []
-            for idx, word in enumerate(feature_names):
-                keyword_data.append({
-                    'keyword': word,
-                    'tfidf_score': float(tfidf_scores[idx]),
-                    'frequency': word_freq_counter.get(word, 0)
-                })
-            
-            # 5. 按TF-IDF分数排序并取Top N
-            keyword_data.sort(key=lambda x: x['tfidf_score'], reverse=True)
-            top_keywords = keyword_data[:top_n]
-            
-            # 6. 格式化结果（保留频率和权重）
-            results = []
-            for kw in top_keywords:
-                results.append({
-                    'keyword': kw['keyword'],
-                    'frequency': kw['frequency'],
-                    'weight': kw['tfidf_score']
-                })
-            
-            return results
-            
-        except Exception as e:
-            print(f"[ERROR] TF-IDF提取失败: {e}")
-            # 降级到TF方法
-            print("[INFO] 降级使用TF方法")
-            return self.extract_keywords_tf(posts, top_n)
+        return score_keywords(term_freq, doc_freq, len(token_lists),
+                              sum(term_freq.values()), 'tfidf', top_n)
+    
+    def extract_keywords_from_texts(self, texts: List[str], method: str = 'tf', top_n: int = 50) -> List[Dict]:
+        """按指定方法从原始文本列表提取关键词"""
+        return self.extract_keywords_from_tokens(self.tokenize_texts(texts), method, top_n)
+    
+    def extract_keywords_from_tokens(self, token_lists: List[List[str]], method: str = 'tf',
+                                     top_n: int = 50) -> List[Dict]:
+        """按指定方法从分词结果提取关键词"""
+        if method == 'tf':
+            return self.keywords_tf_from_tokens(token_lists, top_n)
+        if method == 'tfidf':
+            return self.keywords_tfidf_from_tokens(token_lists, top_n)
+        raise ValueError(f'不支持的提取方法: {method}')
     
     # ====== 阶段五：数据保存 ======
     
@@ -267,7 +250,7 @@ class DataProcessingService:
         Args:
             topic_id: 话题ID
             keywords: 关键词列表 [{'keyword': str, 'frequency': int}, ...]
-            time_period: 时间段标识，如 '2024-12-16'
+            time_period: 时间段标识，如 '2024-12-16'（整体快照）或 'day:2024-12-16'（时间桶）
             
         Returns:
             是否成功
@@ -313,18 +296,66 @@ class DataProcessingService:
     
     # ====== 主处理函数 ======
     
-    def process_topic(self, topic_id: int, method: str = 'tf', top_n: int = 50) -> Dict:
+    def refresh_topic_terms(self, topic_id: int, full: bool = False,
+                            checkpoint: Optional[Callable[[], None]] = None) -> Dict:
+        """
+        为话题中尚未计入词频统计的微博分词，每批（REFRESH_BATCH_SIZE条）的分词结果和词频增量在同一事务中写入
+        
+        Args:
+            topic_id: 话题ID
+            full: 重新校验话题下所有微博的内容哈希（微博内容被修改过时使用）
+            checkpoint: 每批提交后调用，抛出异常（如任务取消）时停止，已提交的批次保留
+            
+        Returns:
+            {'scanned': 检查的微博数, 'segmented': 重新分词的微博数,
+             'failed': 保存失败（已回滚）的批次数，非0时词频统计不完整，话题不应标记为已处理}
+        """
+        ensure_term_stats()
+        cache = self.segment_cache
+        rows = cache.topic_posts(topic_id, stale_only=not full)
+        misses, failed = cache.misses, cache.failed_batches
+        for batch in chunked(rows, REFRESH_BATCH_SIZE):
+            cache.get_tokens(batch)
+            if checkpoint:
+                checkpoint()
+        return {'scanned': len(rows), 'segmented': cache.misses - misses,
+                'failed': cache.failed_batches - failed}
+    
+    def refresh_keyword_buckets(self, topic_id: int, method: str = 'tf') -> Optional[Dict]:
+        """按配置KEYWORD_BUCKET_GRANULARITY刷新话题的时间桶关键词，未配置时跳过"""
+        granularity = get_setting('KEYWORD_BUCKET_GRANULARITY', 'day')
+        if not granularity:
+            return None
+        try:
+            return KeywordBucketService(self).refresh_topic(
+                topic_id, granularity, method, get_setting('KEYWORD_BUCKET_TOP_N', 20)
+            )
+        except Exception as e:
+            db.session.rollback()
+            print(f"[ERROR] 刷新话题 {topic_id} 的时间桶关键词失败: {e}")
+            return {'status': 'error', 'message': str(e)}
+    
+    def process_topic(self, topic_id: int, method: str = 'tf', top_n: int = 50,
+                      full: bool = False, checkpoint: Optional[Callable[[], None]] = None) -> Dict:
         """
         处理单个话题的完整流程
         
+        只对新增微博分词并增量更新词频统计，关键词直接由统计计数器排名，
+        耗时与新增微博数成正比，而不是话题的全部历史数据
+        
         Args:
             topic_id: 话题ID
             method: 关键词提取方法 'tf' 或 'tfidf'
             top_n: 提取前N个关键词
+            full: 是否全量校验话题下所有微博的分词结果
+            checkpoint: 分词每提交一批调用一次（见refresh_topic_terms）
             
         Returns:
             处理结果统计
         """
+        if method not in ('tf', 'tfidf'):
+            return {'status': 'error', 'message': '不支持的提取方法'}
+        
         start_time = datetime.now()
         
         print(f"\n{'='*60}")
@@ -333,30 +364,52 @@ class DataProcessingService:
         
         # 1. 读取数据
         print("[1/4] 读取数据...")
-        topic_data = self.fetch_topic_posts(topic_id)
-        if not topic_data:
+        stage_start = time.perf_counter()
+        topic = db.session.get(Topic, topic_id)
+        if not topic:
             return {'status': 'error', 'message': '话题不存在'}
         
-        posts = topic_data['posts']
-        print(f"      读取到 {len(posts)} 条微博")
+        watermark = begin_processing(topic_id)
+        post_count = WeiboPost.query.filter_by(topic_id=topic_id).count()
+        fetch_time = time.perf_counter() - stage_start
+        print(f"      话题共有 {post_count} 条微博")
         
-        # 2. 数据清洗（在分词时处理）
+        # 2. 数据清洗和分词（只处理新增微博）
         print("[2/4] 数据清洗和分词...")
+        stage_start = time.perf_counter()
+        refresh = self.refresh_topic_terms(topic_id, full=full, checkpoint=checkpoint)
+        segment_time = time.perf_counter() - stage_start
+        print(f"      新分词 {refresh['segmented']} 条微博")
+        if refresh['failed']:
+            # 词频统计缺少未保存的批次，不排名关键词、不标记已处理，话题下次继续处理
+            print(f"[ERROR] 话题 {topic_id} 有 {refresh['failed']} 批分词结果保存失败")
+            return {
+                'status': 'error',
+                'topic_id': topic_id,
+                'topic_name': topic.topic_name,
+                'message': f"{refresh['failed']}批分词结果保存失败，下次处理时重试"
+            }
         
         # 3. 提取关键词
         print("[3/4] 提取关键词...")
-        if method == 'tf':
-            keywords = self.extract_keywords_tf(posts, top_n)
-        elif method == 'tfidf':
-            keywords = self.extract_keywords_tfidf(posts, top_n)
-        else:
-            return {'status': 'error', 'message': '不支持的提取方法'}
-        
+        stage_start = time.perf_counter()
+        keywords = rank_topic_keywords(topic_id, method, top_n)
+        extract_time = time.perf_counter() - stage_start
         print(f"      提取到 {len(keywords)} 个关键词")
         
         # 4. 保存结果
         print("[4/4] 保存关键词...")
+        stage_start = time.perf_counter()
         success = self.save_keywords(topic_id, keywords)
+        save_time = time.perf_counter() - stage_start
+        
+        # 按发布时间分桶的关键词（只重算有新微博的时间桶）
+        stage_start = time.perf_counter()
+        buckets = self.refresh_keyword_buckets(topic_id, method)
+        bucket_time = time.perf_counter() - stage_start
+        
+        if success:
+            mark_processed(topic_id, 'keywords', watermark)
         
         # 5. 统计信息
         end_time = datetime.now()
@@ -365,11 +418,20 @@ class DataProcessingService:
         result = {
             'status': 'success' if success else 'error',
             'topic_id': topic_id,
-            'topic_name': topic_data['topic_name'],
-            'processed_posts': len(posts),
+            'topic_name': topic.topic_name,
+            'processed_posts': post_count,
+            'segmented_posts': refresh['segmented'],
             'keywords_count': len(keywords),
             'top_10_keywords': keywords[:10],
-            'processing_time': f"{processing_time:.2f}s"
+            'keyword_buckets': buckets,
+            'processing_time': f"{processing_time:.2f}s",
+            'timings': {
+                'fetch': round(fetch_time, 3),
+                'segment': round(segment_time, 3),
+                'extract': round(extract_time, 3),
+                'save': round(save_time, 3),
+                'buckets': round(bucket_time, 3)
+            }
         }
         
         print(f"\n{'='*60}")
@@ -382,28 +444,64 @@ class DataProcessingService:
         
         return result
     
-    def process_all_topics(self, method: str = 'tf', top_n: int = 50) -> List[Dict]:
+    def process_all_topics(self, method: str = 'tf', top_n: int = 50,
+                           workers: Optional[int] = None, full: bool = False,
+                           progress_callback: Optional[Callable[[int, int], None]] = None,
+                           only_changed: bool = False,
+                           checkpoint: Optional[Callable[[], None]] = None) -> List[Dict]:
         """
         批量处理所有活跃话题
         
+        workers > 1 时使用进程池: 主进程查询各话题需要分词的微博，由子进程清洗和分词，
+        分词结果回到主进程后写入缓存并更新词频统计，再由计数器排名关键词
+        
         Args:
             method: 关键词提取方法
             top_n: 每个话题提取的关键词数量
+            workers: 并行进程数，默认读取配置KEYWORD_WORKERS，1表示顺序执行
+            full: 是否全量校验所有微博的分词结果
+            progress_callback: 每处理完一个话题调用 progress_callback(已完成数, 话题总数)，
+                抛出异常（如任务取消）会中止剩余话题的处理
+            only_changed: 只处理上次提取关键词之后同步了新微博的话题，
+                其余话题返回 {'status': 'skipped'}（full=True时忽略）
+            checkpoint: 顺序执行时传给process_topic，分词每提交一批调用一次
             
         Returns:
-            所有话题的处理结果列表
+            所有话题的处理结果列表（含每个话题的分阶段耗时）
         """
+        if method not in ('tf', 'tfidf'):
+            return [{'status': 'error', 'message': '不支持的提取方法'}]
+        
+        if workers is None:
+            workers = get_setting('KEYWORD_WORKERS', 1)
+        workers = max(1, int(workers))
+        
         # 1. 查询所有活跃话题
         active_topics = Topic.query.filter_by(is_active=True).all()
         print(f"\n[INFO] 找到 {len(active_topics)} 个活跃话题\n")
         
+        skipped = []
+        if only_changed and not full:
+            active_topics, unchanged = split_changed_topics(active_topics, 'keywords')
+            skipped = [
+                {'status': 'skipped', 'topic_id': topic.id, 'message': '没有新微博，跳过'}
+                for topic in unchanged
+            ]
+            print(f"[INFO] {len(active_topics)} 个话题有新微博, 跳过 {len(skipped)} 个未变化的话题")
+        
+        if workers > 1 and len(active_topics) > 1:
+            return self._process_topics_parallel(active_topics, method, top_n, workers, full,
+                                                 progress_callback) + skipped
+        
         # 2. 遍历处理
         results = []
         for i, topic in enumerate(active_topics, 1):
             print(f"\n处理进度: {i}/{len(active_topics)}")
             try:
-                result = self.process_topic(topic.id, method, top_n)
+                result = self.process_topic(topic.id, method, top_n, full=full, checkpoint=checkpoint)
                 results.append(result)
+            except JobCancelled:
+                raise
             except Exception as e:
                 print(f"[ERROR] 处理话题 {topic.id} 失败: {e}")
                 results.append({
@@ -411,8 +509,120 @@ class DataProcessingService:
                     'topic_id': topic.id,
                     'message': str(e)
                 })
+            if progress_callback:
+                progress_callback(i, len(active_topics))
         
-        return results
+        return results + skipped
+    
+    def _process_topics_parallel(self, topics: List[Topic], method: str, top_n: int,
+                                 workers: int, full: bool = False,
+                                 progress_callback: Optional[Callable[[int, int], None]] = None) -> List[Dict]:
+        """使用进程池并行分词，数据库读写和关键词排名只在主进程进行"""
+        start_time = time.perf_counter()
+        results = {}
+        futures = {}
+        
+        print(f"[INFO] 使用 {workers} 个进程并行分词")
+        ensure_term_stats()
+        
+        with ProcessPoolExecutor(max_workers=workers,
+                                 initializer=_init_keyword_worker,
+                                 initargs=(self.stopwords,)) as executor:
+            # 1. 主进程逐个查询需要分词的微博并立即提交，读取与计算重叠
+            for topic in topics:
+                fetch_start = time.perf_counter()
+                watermark = begin_processing(topic.id)
+                post_count = WeiboPost.query.filter_by(topic_id=topic.id).count()
+                rows = self.segment_cache.topic_posts(topic.id, stale_only=not full)
+                _, pending = self.segment_cache.lookup(rows)
+                fetch_time = time.perf_counter() - fetch_start
+                
+                future = executor.submit(_segment_texts_worker,
+                                         [pending_item[3] for pending_item in pending])
+                futures[future] = (topic.id, topic.topic_name, post_count, fetch_time, pending, watermark)
+            
+            # 2. 按完成顺序在主进程写入分词结果、排名并保存
+            for future in as_completed(futures):
+                topic_id, topic_name, post_count, fetch_time, pending, watermark = futures[future]
+                try:
+                    segmented, segment_time = future.result()
+                    
+                    save_start = time.perf_counter()
+                    failed = self.segment_cache.failed_batches
+                    self.segment_cache.store(pending, segmented)
+                    if self.segment_cache.failed_batches > failed:
+                        # 不排名、不标记已处理，话题下次继续处理
+                        raise RuntimeError('分词结果保存失败，下次处理时重试')
+                    extract_start = time.perf_counter()
+                    keywords = rank_topic_keywords(topic_id, method, top_n)
+                    extract_time = time.perf_counter() - extract_start
+                    success = self.save_keywords(topic_id, keywords)
+                    save_time = time.perf_counter() - save_start - extract_time
+                    
+                    bucket_start = time.perf_counter()
+                    buckets = self.refresh_keyword_buckets(topic_id, method)
+                    bucket_time = time.perf_counter() - bucket_start
+                    if success:
+                        mark_processed(topic_id, 'keywords', watermark)
+                    
+                    total_time = fetch_time + segment_time + extract_time + save_time + bucket_time
+                    results[topic_id] = {
+                        'status': 'success' if success else 'error',
+                        'topic_id': topic_id,
+                        'topic_name': topic_name,
+                        'processed_posts': post_count,
+                        'segmented_posts': len(pending),
+                        'keywords_count': len(keywords),
+                        'top_10_keywords': keywords[:10],
+                        'keyword_buckets': buckets,
+                        'processing_time': f"{total_time:.2f}s",
+                        'timings': {
+                            'fetch': round(fetch_time, 3),
+                            'segment': round(segment_time, 3),
+                            'extract': round(extract_time, 3),
+                            'save': round(save_time, 3),
+                            'buckets': round(bucket_time, 3)
+                        }
+                    }
+                    print(f"[INFO] 话题 {topic_id} 完成: {post_count} 条微博 (新分词 {len(pending)} 条), "
+                          f"{len(keywords)} 个关键词, 分词耗时 {segment_time:.2f}s")
+                    
+                except Exception as e:
+                    print(f"[ERROR] 处理话题 {topic_id} 失败: {e}")
+                    results[topic_id] = {
+                        'status': 'error',
+                        'topic_id': topic_id,
+                        'message': str(e)
+                    }
+                
+                if progress_callback:
+                    progress_callback(len(results), len(topics))
+        
+        print(f"[INFO] 并行处理 {len(topics)} 个话题总耗时 {time.perf_counter() - start_time:.2f}s")
+        
+        # 保持与活跃话题列表相同的顺序
+        return [results[topic.id] for topic in topics]
+
+
+# ====== 进程池子进程函数 ======
+
+_worker_service: Optional[DataProcessingService] = None
+
+
+def _init_keyword_worker(stopwords: set):
+    """子进程初始化: 每个进程只构建一次服务实例"""
+    global _worker_service
+    import jieba
+    jieba.setLogLevel(logging.WARNING)
+    model_registry.jieba()
+    _worker_service = DataProcessingService(stopwords=stopwords)
+
+
+def _segment_texts_worker(texts: List[str]) -> Tuple[List[List[str]], float]:
+    """子进程中清洗并分词，返回(分词结果列表, 耗时秒数)"""
+    start = time.perf_counter()
+    segmented = _worker_service.tokenize_texts(texts)
+    return segmented, time.perf_counter() - start
 
 
 # 使用示例
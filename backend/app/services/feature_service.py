@@ -0,0 +1,276 @@
+"""
+文本特征提取服务 - 将清洗后的文本批量转换为情感模型所需的768维float32特征
+
+可选后端:
+    encoder: 本地CPU文本编码器（transformers预训练模型）。分类器的训练特征没有留档，
+             默认的 bert-base-chinese + [CLS] 池化只是推测，未经验证，可用 check_featurizer.py
+             在人工标注样本上核对
+    hashing: 确定性的字符n-gram哈希向量化（无额外依赖，用于测试）
+"""
+import os
+import re
+import threading
+import zlib
+from collections import OrderedDict
+from typing import List
+
+import numpy as np
+
+from app.utils.feature_cache import FeatureCache, MemoryFeatureCache, text_key
+
+
+FEATURE_DIM = 768
+
+
+class BaseFeaturizer:
+    """特征提取器基类"""
+
+    name = 'base'
+
+    def __init__(self, dim: int = FEATURE_DIM):
+        self.dim = dim
+
+    @property
+    def cache_namespace(self) -> str:
+        """缓存目录名，不同后端/模型的特征互不复用"""
+        return f"{self.name}-{self.dim}"
+
+    def transform(self, texts: List[str]) -> np.ndarray:
+        """
+        批量提取特征
+
+        Args:
+            texts: 清洗后的文本列表
+
+        Returns:
+            shape为(len(texts), dim)的float32矩阵
+        """
+        raise NotImplementedError
+
+    def flush(self):
+        """将缓存落盘，无缓存的后端为空操作"""
+        pass
+
+    def stats(self) -> dict:
+        return {'backend': self.name}
+
+    def _empty(self, rows: int = 0) -> np.ndarray:
+        return np.zeros((rows, self.dim), dtype=np.float32)
+
+
+class HashingFeaturizer(BaseFeaturizer):
+    """字符n-gram哈希向量化（带符号哈希 + L2归一化），结果完全确定"""
+
+    name = 'hashing'
+
+    def __init__(self, dim: int = FEATURE_DIM, ngram_range: tuple = (1, 2)):
+        super().__init__(dim)
+        self.ngram_range = ngram_range
+
+    def transform(self, texts: List[str]) -> np.ndarray:
+        features = self._empty(len(texts))
+        min_n, max_n = self.ngram_range
+
+        for row, text in enumerate(texts):
+            if not text:
+                continue
+            vector = features[row]
+            for n in range(min_n, max_n + 1):
+                for start in range(len(text) - n + 1):
+                    digest = zlib.crc32(text[start:start + n].encode('utf-8'))
+                    sign = 1.0 if digest & 0x80000000 else -1.0
+                    vector[digest % self.dim] += sign
+
+            norm = np.linalg.norm(vector)
+            if norm > 0:
+                vector /= norm
+
+        return features
+
+
+class LocalEncoderFeaturizer(BaseFeaturizer):
+    """本地预训练文本编码器（仅CPU），取[CLS]或平均池化向量作为特征"""
+
+    name = 'encoder'
+
+    def __init__(self, dim: int = FEATURE_DIM, model_name: str = 'bert-base-chinese',
+                 batch_size: int = 32, max_length: int = 128, pooling: str = 'cls'):
+        super().__init__(dim)
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.pooling = pooling
+        self.tokenizer = None
+        self.model = None
+        self._torch = None
+
+    @property
+    def cache_namespace(self) -> str:
+        model_id = re.sub(r'[^\w.-]+', '_', self.model_name)
+        return f"{self.name}-{model_id}-{self.pooling}-{self.dim}"
+
+    def _load(self):
+        """首次使用时才导入torch/transformers并加载编码器"""
+        if self.model is not None:
+            return
+
+        try:
+            import torch
+            from transformers import AutoModel, AutoTokenizer
+        except ImportError as e:
+            raise RuntimeError(
+                f"encoder特征后端需要安装torch和transformers: {e}"
+            ) from e
+
+        print(f"[FeatureService] Loading encoder: {self.model_name}")
+        tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+        model = AutoModel.from_pretrained(self.model_name)
+        model.to('cpu')
+        model.eval()
+
+        hidden_size = model.config.hidden_size
+        if hidden_size != self.dim:
+            raise ValueError(
+                f"编码器输出维度 {hidden_size} 与模型特征维度 {self.dim} 不一致"
+            )
+
+        self._torch = torch
+        self.tokenizer = tokenizer
+        self.model = model
+
+    def transform(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return self._empty()
+
+        self._load()
+        torch = self._torch
+        chunks = []
+
+        with torch.no_grad():
+            for start in range(0, len(texts), self.batch_size):
+                batch = [text or '' for text in texts[start:start + self.batch_size]]
+                encoded = self.tokenizer(
+                    batch,
+                    padding=True,
+                    truncation=True,
+                    max_length=self.max_length,
+                    return_tensors='pt'
+                )
+                hidden = self.model(**encoded).last_hidden_state
+
+                if self.pooling == 'mean':
+                    mask = encoded['attention_mask'].unsqueeze(-1).to(hidden.dtype)
+                    pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1)
+                else:
+                    pooled = hidden[:, 0]
+
+                chunks.append(pooled.numpy().astype(np.float32, copy=False))
+
+        return np.vstack(chunks)
+
+
+class CachedFeaturizer(BaseFeaturizer):
+    """按规范化文本哈希缓存特征的包装器，重复文本不再重新编码
+
+    cache可以是进程内的MemoryFeatureCache，也可以是磁盘持久化的FeatureCache。
+    命中计数在每次调用内累计，结束时在锁内汇总，多线程共用时不会丢失计数
+    """
+
+    def __init__(self, featurizer: BaseFeaturizer, cache):
+        super().__init__(featurizer.dim)
+        self.featurizer = featurizer
+        self.name = featurizer.name
+        self.cache = cache
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+    @property
+    def cache_namespace(self) -> str:
+        return self.featurizer.cache_namespace
+
+    def transform(self, texts: List[str]) -> np.ndarray:
+        features = self._empty(len(texts))
+        missing = OrderedDict()  # key -> (文本, 需要回填的行号列表)
+        hits = misses = 0
+
+        for row, text in enumerate(texts):
+            key = text_key(text)
+            if key in missing:
+                missing[key][1].append(row)
+                hits += 1
+                continue
+
+            cached = self.cache.get(key)
+            if cached is not None:
+                features[row] = cached
+                hits += 1
+            else:
+                missing[key] = (text, [row])
+                misses += 1
+
+        with self._stats_lock:
+            self.hits += hits
+            self.misses += misses
+
+        if missing:
+            computed = self.featurizer.transform([text for text, _ in missing.values()])
+            for (key, (_, rows)), vector in zip(missing.items(), computed):
+                features[rows] = vector
+                self.cache.put(key, vector)
+
+        return features
+
+    def flush(self):
+        """将缓存落盘（进程内缓存为空操作）"""
+        self.cache.flush()
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        stats = {
+            'backend': self.name,
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / total, 4) if total else 0.0
+        }
+        stats.update(self.cache.stats())
+        return stats
+
+
+FEATURIZERS = {
+    HashingFeaturizer.name: HashingFeaturizer,
+    LocalEncoderFeaturizer.name: LocalEncoderFeaturizer,
+}
+
+
+def create_featurizer(backend: str = 'encoder', dim: int = FEATURE_DIM,
+                      cache_size: int = 50000, cache_dir: str = None,
+                      cache_max_mb: int = 512, **options) -> BaseFeaturizer:
+    """
+    根据后端名称创建特征提取器
+
+    Args:
+        backend: 'encoder' 或 'hashing'
+        dim: 特征维度，需与情感模型一致
+        cache_size: 进程内特征缓存条数（未配置cache_dir时使用），0表示不缓存
+        cache_dir: 磁盘特征缓存根目录，按后端分子目录保存
+        cache_max_mb: 磁盘特征缓存的最大体积（MB）
+        **options: 传给后端构造函数的其他参数
+
+    Returns:
+        特征提取器实例
+    """
+    if backend not in FEATURIZERS:
+        raise ValueError(f"不支持的特征后端: {backend}，可选: {', '.join(FEATURIZERS)}")
+
+    featurizer = FEATURIZERS[backend](dim=dim, **options)
+    if cache_dir:
+        cache = FeatureCache(os.path.join(cache_dir, featurizer.cache_namespace),
+                             dim=dim, max_mb=cache_max_mb)
+    elif cache_size and cache_size > 0:
+        cache = MemoryFeatureCache(dim=dim, max_entries=cache_size)
+    else:
+        return featurizer
+    return CachedFeaturizer(featurizer, cache)
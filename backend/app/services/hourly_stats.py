@@ -0,0 +1,237 @@
+"""
+话题小时汇总 - 按 (话题, 发布时间所在小时) 累计微博数、点赞/转发/评论数和各情感标签条数
+
+通过ORM写入微博时（session.add，任何同步入口）由after_insert事件计入微博数和互动数，
+bulk_insert_mappings批量写入（不触发ORM事件）后调用record_posts；情感结果写入器flush时计入情感标签
+（覆盖旧结果时先扣除）。都与数据本身在同一事务中提交；通过ORM删除微博或情感结果时由事件扣除。
+趋势图按小时/天/周聚合这些小时行，不再扫描 weibo_posts。没有发布时间的微博不计入。
+升级时由迁移0007从已有数据重建一次。
+"""
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import bindparam, event, select
+
+from app import db
+from app.models import SentimentResult, TopicHourlyStat, WeiboPost
+from app.services.rollups import Rollup, RollupDelta
+from app.services.sentiment_stats import label_key
+from app.utils.time_buckets import GRANULARITIES, bucket_label, bucket_start
+
+
+POST_FIELDS = ('post_count', 'likes_sum', 'reposts_sum', 'comments_sum')
+SENTIMENT_FIELDS = ('positive_count', 'negative_count', 'neutral_count')
+FIELDS = POST_FIELDS + SENTIMENT_FIELDS
+
+_stats_table = TopicHourlyStat.__table__
+_posts_table = WeiboPost.__table__
+_results_table = SentimentResult.__table__
+
+
+class HourlyStatsDelta(RollupDelta):
+    """待写入的小时汇总增量 {(topic_id, hour_start): {字段: 增量}}"""
+
+    def __init__(self):
+        super().__init__(FIELDS)
+
+    def add_post(self, topic_id: int, publish_time: Optional[datetime], likes: int = 0,
+                 reposts: int = 0, comments: int = 0, sign: int = 1) -> None:
+        """计入（sign=-1时扣除）一条微博"""
+        if topic_id is None or publish_time is None:
+            return
+        row = self.rows[(topic_id, bucket_start(publish_time, 'hour'))]
+        row['post_count'] += sign
+        row['likes_sum'] += sign * (likes or 0)
+        row['reposts_sum'] += sign * (reposts or 0)
+        row['comments_sum'] += sign * (comments or 0)
+
+    def add_sentiment(self, topic_id: int, publish_time: Optional[datetime], label: str, sign: int = 1) -> None:
+        """计入（sign=-1时扣除）一条情感结果"""
+        key = label_key(label)
+        if key is None or topic_id is None or publish_time is None:
+            return
+        self.add((topic_id, bucket_start(publish_time, 'hour')), f'{key}_count', sign)
+
+
+ROLLUP = Rollup(_stats_table, ('topic_id', 'hour_start'), FIELDS)
+
+
+def record_posts(posts: Iterable[Dict]) -> HourlyStatsDelta:
+    """
+    用bulk_insert_mappings批量写入一批微博后调用，把它们计入小时汇总（不提交，与该批数据在同一事务中提交）
+
+    ORM逐条写入（session.add）的微博由after_insert事件计入，不要再调用本函数。
+
+    Args:
+        posts: WeiboPost字段字典或WeiboPost对象列表（需包含topic_id、publish_time和互动数）
+    """
+    delta = HourlyStatsDelta()
+    for post in posts:
+        field = post.get if isinstance(post, dict) else lambda name: getattr(post, name, None)
+        delta.add_post(field('topic_id'), field('publish_time'), field('likes_count'),
+                       field('reposts_count'), field('comments_count'))
+    apply_delta(delta)
+    return delta
+
+
+def apply_delta(delta: HourlyStatsDelta) -> None:
+    """在当前会话的事务中写入增量（不提交）"""
+    ROLLUP.apply(db.session.connection(), delta)
+
+
+def recount(connection, topic_id: Optional[int] = None) -> Dict:
+    """
+    在connection上根据weibo_posts和sentiment_results重建小时汇总（不提交）
+
+    Args:
+        connection: 数据库连接（迁移的连接或会话的连接）
+        topic_id: 只重建该话题，默认重建全部话题
+
+    Returns:
+        {'rows': 小时行数, 'posts': 计入的微博数}
+    """
+    query = select(
+        _posts_table.c.topic_id, _posts_table.c.publish_time, _posts_table.c.likes_count,
+        _posts_table.c.reposts_count, _posts_table.c.comments_count, _results_table.c.sentiment_label
+    ).select_from(
+        _posts_table.outerjoin(_results_table, _results_table.c.weibo_id == _posts_table.c.id)
+    ).where(_posts_table.c.publish_time.isnot(None))
+    if topic_id is not None:
+        query = query.where(_posts_table.c.topic_id == topic_id)
+
+    delta = HourlyStatsDelta()
+    posts = 0
+    for row_topic_id, publish_time, likes, reposts, comments, label in connection.execute(query):
+        delta.add_post(row_topic_id, publish_time, likes, reposts, comments)
+        delta.add_sentiment(row_topic_id, publish_time, label)
+        posts += 1
+
+    ROLLUP.rebuild(connection, delta, topic_id)
+    return {'rows': len(delta.rows), 'posts': posts}
+
+
+def rebuild_hourly_stats(topic_id: Optional[int] = None) -> Dict:
+    """
+    清空并根据weibo_posts和sentiment_results重建小时汇总并提交（见recount）
+
+    Args:
+        topic_id: 只重建该话题，默认重建全部话题
+    """
+    try:
+        result = recount(db.session.connection(), topic_id)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    print(f"[HourlyStats] 重建小时汇总: {result['rows']} 行, {result['posts']} 条微博")
+    return result
+
+
+def get_trend(topic_id: Optional[int] = None, period: str = 'day',
+              start: Optional[datetime] = None, end: Optional[datetime] = None) -> Dict:
+    """
+    按小时/天/周聚合小时汇总
+
+    Args:
+        topic_id: 话题ID，默认全部话题
+        period: 'hour' / 'day' / 'week'
+        start: 起始时间（含）
+        end: 结束时间（不含）
+
+    Returns:
+        {'timestamps': [...], 'post_counts': [...], 'like_counts': [...], ...}，按时间升序
+    """
+    if period not in GRANULARITIES:
+        raise ValueError(f"不支持的时间粒度: {period}，可选: {', '.join(GRANULARITIES)}")
+
+    columns = [db.func.sum(getattr(TopicHourlyStat, field)) for field in FIELDS]
+    query = db.session.query(TopicHourlyStat.hour_start, *columns)
+    if topic_id is not None:
+        query = query.filter(TopicHourlyStat.topic_id == topic_id)
+    if start is not None:
+        query = query.filter(TopicHourlyStat.hour_start >= start)
+    if end is not None:
+        query = query.filter(TopicHourlyStat.hour_start < end)
+    query = query.group_by(TopicHourlyStat.hour_start).order_by(TopicHourlyStat.hour_start)
+
+    buckets: Dict[datetime, List[int]] = {}
+    for hour_start, *values in query:
+        bucket = buckets.setdefault(bucket_start(hour_start, period), [0] * len(FIELDS))
+        for i, value in enumerate(values):
+            bucket[i] += value or 0
+
+    series = {field: [values[i] for values in buckets.values()] for i, field in enumerate(FIELDS)}
+    return {
+        'timestamps': [bucket_label(moment, period) for moment in buckets],
+        'post_counts': series['post_count'],
+        'comment_counts': series['comments_sum'],
+        'like_counts': series['likes_sum'],
+        'repost_counts': series['reposts_sum'],
+        'positive_counts': series['positive_count'],
+        'negative_counts': series['negative_count'],
+        'neutral_counts': series['neutral_count']
+    }
+
+
+# ====== ORM写入时计入，删除时扣除 ======
+
+_decrement_post = _stats_table.update().where(
+    _stats_table.c.topic_id == bindparam('scope'),
+    _stats_table.c.hour_start == bindparam('hour')
+).values(
+    post_count=_stats_table.c.post_count - 1,
+    likes_sum=_stats_table.c.likes_sum - bindparam('likes'),
+    reposts_sum=_stats_table.c.reposts_sum - bindparam('reposts'),
+    comments_sum=_stats_table.c.comments_sum - bindparam('comments')
+)
+
+_decrement_sentiment = {
+    key: _stats_table.update().where(
+        _stats_table.c.topic_id == bindparam('scope'),
+        _stats_table.c.hour_start == bindparam('hour')
+    ).values({f'{key}_count': _stats_table.c[f'{key}_count'] - 1})
+    for key in ('positive', 'negative', 'neutral')
+}
+
+
+def _on_post_inserted(mapper, connection, target):
+    """通过ORM写入微博时，在同一连接上计入其微博数和互动数"""
+    delta = HourlyStatsDelta()
+    delta.add_post(target.topic_id, target.publish_time, target.likes_count,
+                   target.reposts_count, target.comments_count)
+    ROLLUP.apply(connection, delta)
+
+
+def _on_post_deleted(mapper, connection, target):
+    """微博被删除时，在同一连接上扣除其微博数和互动数"""
+    if target.publish_time is None:
+        return
+    connection.execute(_decrement_post, {
+        'scope': target.topic_id,
+        'hour': bucket_start(target.publish_time, 'hour'),
+        'likes': target.likes_count or 0,
+        'reposts': target.reposts_count or 0,
+        'comments': target.comments_count or 0
+    })
+
+
+def _on_result_deleted(mapper, connection, target):
+    """情感结果被删除时，在同一连接上扣除其情感标签计数（微博行此时尚未删除）"""
+    key = label_key(target.sentiment_label)
+    if key is None:
+        return
+    post = connection.execute(
+        select(_posts_table.c.topic_id, _posts_table.c.publish_time).where(_posts_table.c.id == target.weibo_id)
+    ).first()
+    if post is None or post.publish_time is None:
+        return
+    connection.execute(_decrement_sentiment[key], {
+        'scope': post.topic_id,
+        'hour': bucket_start(post.publish_time, 'hour')
+    })
+
+
+event.listen(WeiboPost, 'after_insert', _on_post_inserted)
+event.listen(WeiboPost, 'after_delete', _on_post_deleted)
+event.listen(SentimentResult, 'after_delete', _on_result_deleted)
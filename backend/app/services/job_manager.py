@@ -0,0 +1,240 @@
+"""
+后台任务管理 - Pipeline在后台线程中异步执行，HTTP请求只负责提交和查询
+
+每个任务记录各阶段的状态、计数和耗时；取消是协作式的: 调用cancel()只设置标志，
+任务在阶段之间、每处理完一个话题时，以及同步/分词/情感分析每提交一批数据后
+调用check_cancelled()检查并退出（已提交的批次保留，下次运行从剩余数据继续）。
+同一时间只允许一个Pipeline任务排队或运行（各阶段读写同一批话题数据），重复提交返回已有任务，
+因此只使用一个后台线程。
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional
+
+
+
+ACTIVE_STATUSES = ('queued', 'running')
+
+
+class JobCancelled(Exception):
+    """任务被取消（由check_cancelled抛出，在任务线程中结束执行）"""
+
+
+class PipelineJob:
+    """一个后台任务及其分阶段进度"""
+
+    def __init__(self, kind: str, stages: Iterable[str], params: Optional[Dict] = None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params or {}
+        self.status = 'queued'
+        self.message = ''
+        self.results: Dict = {}
+        self.stages = OrderedDict(
+            (name, {'status': 'pending', 'done': 0, 'total': None, 'elapsed': None, 'message': ''})
+            for name in stages
+        )
+        self.created_at = datetime.utcnow()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self._cancel_event = threading.Event()
+        self._stage_started: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    # ====== 取消 ======
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def cancel(self) -> None:
+        self._cancel_event.set()
+
+    def check_cancelled(self) -> None:
+        """已请求取消时抛出JobCancelled"""
+        if self._cancel_event.is_set():
+            raise JobCancelled()
+
+    # ====== 阶段进度 ======
+
+    def start_stage(self, name: str, total: Optional[int] = None) -> None:
+        self.check_cancelled()
+        with self._lock:
+            stage = self.stages.setdefault(name, {'status': 'pending', 'done': 0, 'total': None,
+                                                  'elapsed': None, 'message': ''})
+            stage.update(status='running', done=0, total=total)
+            self._stage_started[name] = time.perf_counter()
+
+    def update_stage(self, name: str, done: int, total: Optional[int] = None) -> None:
+        """更新阶段进度，并检查是否已请求取消"""
+        with self._lock:
+            stage = self.stages[name]
+            stage['done'] = done
+            if total is not None:
+                stage['total'] = total
+        self.check_cancelled()
+
+    def finish_stage(self, name: str, status: str = 'success', message: str = '') -> None:
+        with self._lock:
+            stage = self.stages[name]
+            stage['status'] = status
+            stage['message'] = message
+            if name in self._stage_started:
+                stage['elapsed'] = round(time.perf_counter() - self._stage_started.pop(name), 3)
+
+    def skip_stage(self, name: str) -> None:
+        with self._lock:
+            self.stages[name]['status'] = 'skipped'
+
+    def _close_stages(self, status: str) -> None:
+        """任务结束时，把仍在运行的阶段标记为status，未开始的标记为skipped"""
+        for name, stage in self.stages.items():
+            if stage['status'] == 'running':
+                self.finish_stage(name, status)
+            elif stage['status'] == 'pending':
+                stage['status'] = 'skipped'
+
+    # ====== 序列化 ======
+
+    @property
+    def progress(self) -> float:
+        """已结束阶段占全部阶段的比例（运行中的阶段按done/total计入）"""
+        if not self.stages:
+            return 1.0 if self.status not in ACTIVE_STATUSES else 0.0
+        finished = 0.0
+        for stage in self.stages.values():
+            if stage['status'] in ('success', 'error', 'skipped', 'cancelled'):
+                finished += 1
+            elif stage['status'] == 'running' and stage['total']:
+                finished += min(1.0, stage['done'] / stage['total'])
+        return round(finished / len(self.stages), 4)
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            stages = [dict(stage, name=name) for name, stage in self.stages.items()]
+        return {
+            'job_id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'message': self.message,
+            'params': self.params,
+            'progress': self.progress,
+            'stages': stages,
+            'results': self.results,
+            'cancel_requested': self.cancel_requested,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+
+class JobManager:
+    """单线程执行器 + 任务表"""
+
+    def __init__(self, max_history: int = 50):
+        """
+        Args:
+            max_history: 保留的已结束任务数量，超出后丢弃最早的
+        """
+        self.max_history = max_history
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._jobs: 'OrderedDict[str, PipelineJob]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='pipeline-job')
+        return self._executor
+
+    def submit(self, app, kind: str, func: Callable[[PipelineJob], Dict],
+               stages: Iterable[str], params: Optional[Dict] = None):
+        """
+        提交任务
+
+        Args:
+            app: Flask应用（任务线程在其应用上下文中执行）
+            kind: 任务类型，如 'pipeline' / 'process_topic'
+            func: func(job) -> {'status', 'results', 'message'}，在后台线程中执行
+            stages: 阶段名列表（用于进度展示）
+            params: 提交参数（原样返回给查询方）
+
+        Returns:
+            (job, created): 已有Pipeline任务在排队或运行时返回该任务且created=False
+        """
+        with self._lock:
+            active = self.active_job()
+            if active is not None:
+                return active, False
+
+            job = PipelineJob(kind, stages, params)
+            self._jobs[job.id] = job
+            self._trim_history()
+            self._get_executor().submit(self._run, app, job, func)
+
+        print(f"[JobManager] 提交任务 {job.id} ({kind})")
+        return job, True
+
+    def _run(self, app, job: PipelineJob, func: Callable[[PipelineJob], Dict]) -> None:
+        from app import db
+
+        job.started_at = datetime.utcnow()
+        with app.app_context():
+            try:
+                job.check_cancelled()
+                job.status = 'running'
+                result = func(job) or {}
+                job.results = result.get('results', {})
+                job.message = result.get('message', '')
+                job.status = 'success' if result.get('status', 'success') == 'success' else 'error'
+                job._close_stages('error' if job.status == 'error' else 'success')
+            except JobCancelled:
+                db.session.rollback()
+                job.status = 'cancelled'
+                job.message = '任务已取消'
+                job._close_stages('cancelled')
+            except Exception as e:
+                db.session.rollback()
+                job.status = 'error'
+                job.message = f'任务执行失败: {str(e)}'
+                job._close_stages('error')
+                print(f"[JobManager] 任务 {job.id} 失败: {e}")
+            finally:
+                db.session.remove()
+                job.finished_at = datetime.utcnow()
+
+        elapsed = (job.finished_at - job.started_at).total_seconds()
+        print(f"[JobManager] 任务 {job.id} 结束: {job.status}, 耗时 {elapsed:.2f}s")
+
+    def _trim_history(self) -> None:
+        finished = [job_id for job_id, job in self._jobs.items() if job.status not in ACTIVE_STATUSES]
+        for job_id in finished[:max(0, len(self._jobs) - self.max_history)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id: str) -> Optional[PipelineJob]:
+        return self._jobs.get(job_id)
+
+    def list_jobs(self, limit: int = 20) -> List[PipelineJob]:
+        """最近提交的任务（新的在前）"""
+        return list(reversed(self._jobs.values()))[:limit]
+
+    def active_job(self) -> Optional[PipelineJob]:
+        """排队中或运行中的任务"""
+        for job in self._jobs.values():
+            if job.status in ACTIVE_STATUSES:
+                return job
+        return None
+
+    def cancel(self, job_id: str) -> Optional[PipelineJob]:
+        """请求取消任务；排队中的任务开始执行前即退出，运行中的任务在下一个检查点退出"""
+        job = self._jobs.get(job_id)
+        if job is not None and job.status in ACTIVE_STATUSES:
+            job.cancel()
+            print(f"[JobManager] 请求取消任务 {job_id}")
+        return job
+
+
+job_manager = JobManager()
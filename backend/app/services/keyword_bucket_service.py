@@ -0,0 +1,138 @@
+"""
+按时间桶提取关键词 - 每个话题按微博发布时间切分为小时/天/周，分别提取关键词
+
+每个时间桶只计算一次: 桶的结束时间已过则封存；之后只有新同步进来、发布时间落在
+该桶内的微博（id大于上次处理到的最大id）才会触发重算。分词结果直接取自分词缓存，
+不会重新分词历史数据。
+
+已检查到的最大微博id记录在话题状态（topic_processing_states.bucket_post_id）中，每次刷新后
+推进到本次检查到的最大id，与是否有时间桶被重算无关（新微博都没有发布时间时也推进）；
+新微博分词结果保存失败（时间桶只能基于已分词的微博计算）或时间桶保存失败时保留原水位线，下次重试。
+粒度变化后按该粒度已有时间桶的max_post_id继续。
+"""
+from datetime import datetime
+from typing import Dict, Optional
+
+from app import db
+from app.models import KeywordBucket, PostSegment, WeiboPost
+from app.services.topic_state import get_state
+from app.utils.time_buckets import GRANULARITIES, bucket_period
+
+
+class KeywordBucketService:
+    """时间桶关键词服务"""
+
+    def __init__(self, data_service=None):
+        """
+        Args:
+            data_service: DataProcessingService实例（复用其分词缓存、关键词打分和保存逻辑）
+        """
+        if data_service is None:
+            from app.services.data_processing_service import DataProcessingService
+            data_service = DataProcessingService()
+        self.data_service = data_service
+
+    def refresh_topic(self, topic_id: int, granularity: str = 'day', method: str = 'tf',
+                      top_n: int = 20, now: Optional[datetime] = None) -> Dict:
+        """
+        重算话题中有新微博的时间桶，并封存已结束的时间桶
+
+        Args:
+            topic_id: 话题ID
+            granularity: 'hour' / 'day' / 'week'
+            method: 关键词提取方法 'tf' 或 'tfidf'
+            top_n: 每个时间桶保存的关键词数量
+            now: 判断时间桶是否结束的当前时间（默认本地当前时间，与publish_time一致）
+
+        Returns:
+            {'granularity', 'buckets', 'recomputed', 'sealed'}
+        """
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"不支持的时间粒度: {granularity}，可选: {', '.join(GRANULARITIES)}")
+        now = now or datetime.now()
+
+        buckets = {
+            bucket.time_period: bucket
+            for bucket in KeywordBucket.query.filter_by(topic_id=topic_id, granularity=granularity)
+        }
+        state = get_state(topic_id)
+        if state.bucket_granularity == granularity:
+            watermark = state.bucket_post_id or 0
+        else:
+            watermark = max((bucket.max_post_id or 0 for bucket in buckets.values()), default=0)
+        new_watermark = db.session.query(db.func.max(WeiboPost.id)).filter(
+            WeiboPost.topic_id == topic_id
+        ).scalar() or 0
+
+        # 1. 新增微博落在哪些时间桶
+        touched = {}
+        segment_failed = 0
+        if new_watermark > watermark:
+            # 确保新增微博已分词（时间桶只统计有分词结果的微博）
+            segment_failed = self.data_service.refresh_topic_terms(topic_id)['failed']
+            for (publish_time,) in db.session.query(WeiboPost.publish_time).filter(
+                WeiboPost.topic_id == topic_id,
+                WeiboPost.id > watermark,
+                WeiboPost.id <= new_watermark,
+                WeiboPost.publish_time.isnot(None)
+            ):
+                time_period, start, end = bucket_period(publish_time, granularity)
+                touched[time_period] = (start, end)
+
+        # 2. 只重算这些时间桶
+        failed = 0
+        for time_period, (start, end) in sorted(touched.items(), key=lambda item: item[1][0]):
+            token_lists = [
+                self.data_service.segment_cache.decode(blob)
+                for (blob,) in db.session.query(PostSegment.token_ids).join(
+                    WeiboPost, WeiboPost.id == PostSegment.post_id
+                ).filter(
+                    WeiboPost.topic_id == topic_id,
+                    WeiboPost.publish_time >= start,
+                    WeiboPost.publish_time < end
+                )
+            ]
+            keywords = self.data_service.extract_keywords_from_tokens(token_lists, method, top_n)
+            if not self.data_service.save_keywords(topic_id, keywords, time_period=time_period):
+                failed += 1
+                continue
+
+            bucket = buckets.get(time_period)
+            if bucket is None:
+                bucket = KeywordBucket(topic_id=topic_id, granularity=granularity,
+                                       time_period=time_period, start_time=start, end_time=end)
+                db.session.add(bucket)
+                buckets[time_period] = bucket
+            bucket.post_count = len(token_lists)
+            if not segment_failed:
+                bucket.max_post_id = new_watermark
+            bucket.sealed = end <= now
+            bucket.computed_at = datetime.utcnow()
+
+        # 3. 已结束但尚未封存的时间桶直接封存（没有新微博，结果不会再变）
+        newly_sealed = 0
+        for time_period, bucket in buckets.items():
+            if time_period not in touched and not bucket.sealed and bucket.end_time <= now:
+                bucket.sealed = True
+                newly_sealed += 1
+
+        # 4. 推进水位线（分词或时间桶保存失败时保留原水位线，下次重试）
+        if segment_failed:
+            print(f"[KeywordBucket] 话题 {topic_id}: {segment_failed}批分词结果保存失败，保留水位线下次重试")
+        if not failed and not segment_failed:
+            # save_keywords会提交或回滚，重新取状态
+            state = get_state(topic_id)
+            state.bucket_granularity = granularity
+            state.bucket_post_id = max(watermark, new_watermark)
+
+        db.session.commit()
+
+        result = {
+            'granularity': granularity,
+            'buckets': len(buckets),
+            'recomputed': len(touched),
+            'sealed': sum(1 for bucket in buckets.values() if bucket.sealed)
+        }
+        print(f"[KeywordBucket] 话题 {topic_id} ({granularity}): 重算 {len(touched)} 个时间桶, "
+              f"新封存 {newly_sealed} 个, 共 {len(buckets)} 个")
+        return result
@@ -1,7 +1,7 @@
-import jieba
-import jieba.analyse
 from collections import Counter
 
+from app.services.model_registry import model_registry
+
 
 class KeywordAnalysisService:
     """关键词分析服务"""
@@ -11,11 +11,8 @@ class KeywordAnalysisService:
         self.stopwords = self.load_stopwords()
     
     def load_stopwords(self):
-        """加载停用词表"""
-        # TODO: 加载停用词文件
-        # 可以使用常用的中文停用词表
-        stopwords = set(['的', '了', '在', '是', '我', '有', '和', '就', '不', '人', '都', '一', '一个', '上', '也', '很', '到', '说', '要', '去', '你', '会', '着', '没有', '看', '好', '自己', '这'])
-        return stopwords
+        """加载停用词表（与数据处理服务共用注册表中的停用词）"""
+        return model_registry.stopwords()
     
     def extract(self, topic_id, top_n=50):
         """提取关键词
@@ -57,6 +54,8 @@ class KeywordAnalysisService:
         Returns:
             Counter: 词频统计结果
         """
+        jieba = model_registry.jieba()
+        
         words = []
         for text in texts:
             # 分词
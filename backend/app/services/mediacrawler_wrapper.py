@@ -195,6 +195,7 @@ class MediaCrawlerWrapper:
                 db.session.add(post)
                 synced_count += 1
             
+            # 小时汇总和地域汇总由WeiboPost的after_insert事件计入，与新微博一起提交
             db.session.commit()
             
             return {
@@ -0,0 +1,242 @@
+"""
+进程级模型与NLP资源注册表 - 情感模型、特征提取器、停用词、jieba词典只加载一次
+
+所有服务和蓝图共用同一份资源，请求内构造服务实例不再读取磁盘。
+每种资源由各自的锁保护: 多个请求（或启动时的预热线程）同时首次访问时只加载一次，
+其余调用方等待并复用结果。
+"""
+import os
+import threading
+import time
+import traceback
+from typing import Dict, FrozenSet, Optional, Tuple
+
+from app.config import get_setting
+
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+STOPWORDS_PATH = os.path.join(BACKEND_DIR, 'app', 'utils', 'stopwords.txt')
+DEFAULT_MODEL_PATH = os.path.join(os.path.dirname(BACKEND_DIR), 'deployed_ml_models',
+                                  'lightgbm_classifier.joblib')
+DEFAULT_STOPWORDS = frozenset({'的', '了', '是', '在', '我', '有', '和', '就', '不', '人', '都'})
+
+WARMUP_TEXTS = ['今天天气真不错，心情很好', '太糟糕了，气死我了', '一般般吧，没什么感觉']
+
+
+class ModelRegistry:
+    """进程内共享的模型与NLP资源"""
+
+    def __init__(self):
+        self._stopwords_lock = threading.Lock()
+        self._jieba_lock = threading.Lock()
+        self._sentiment_lock = threading.Lock()
+        self._stopwords: Optional[FrozenSet[str]] = None
+        self._jieba = None
+        # (模型路径, 特征后端配置) -> (model, featurizer)
+        self._sentiment_models: Dict[Tuple, Tuple] = {}
+        self.load_times: Dict[str, float] = {}
+        self.sentiment_model_error: Optional[str] = None
+
+    # ====== 停用词 ======
+
+    def stopwords(self) -> FrozenSet[str]:
+        """停用词表（只读取一次stopwords.txt）"""
+        if self._stopwords is None:
+            with self._stopwords_lock:
+                if self._stopwords is None:
+                    start = time.perf_counter()
+                    self._stopwords = self._read_stopwords()
+                    self.load_times['stopwords'] = time.perf_counter() - start
+        return self._stopwords
+
+    def _read_stopwords(self) -> FrozenSet[str]:
+        try:
+            if os.path.exists(STOPWORDS_PATH):
+                with open(STOPWORDS_PATH, 'r', encoding='utf-8') as f:
+                    stopwords = frozenset(line.strip() for line in f if line.strip())
+                print(f"[INFO] 成功加载 {len(stopwords)} 个停用词")
+                return stopwords
+            print(f"[WARNING] 停用词文件不存在: {STOPWORDS_PATH}，使用默认停用词")
+        except Exception as e:
+            print(f"[ERROR] 加载停用词失败: {e}，使用默认停用词")
+        return DEFAULT_STOPWORDS
+
+    # ====== jieba ======
+
+    def jieba(self):
+        """已加载词典的jieba模块（词典只构建一次）"""
+        if self._jieba is None:
+            with self._jieba_lock:
+                if self._jieba is None:
+                    start = time.perf_counter()
+                    import jieba
+                    jieba.initialize()
+                    self._jieba = jieba
+                    self.load_times['jieba'] = time.perf_counter() - start
+        return self._jieba
+
+    # ====== 情感模型 ======
+
+    def sentiment_model(self, model_path: Optional[str] = None) -> Optional[Tuple]:
+        """
+        获取情感模型及与之匹配的特征提取器，首次调用时加载
+
+        Args:
+            model_path: 模型文件路径，None时使用默认部署路径
+
+        Returns:
+            (model, featurizer)，加载失败返回None（下次调用会重试）
+        """
+        key = (
+            model_path or DEFAULT_MODEL_PATH,
+            get_setting('FEATURIZER_BACKEND', 'encoder'),
+            get_setting('FEATURIZER_MODEL', 'bert-base-chinese'),
+            get_setting('FEATURIZER_POOLING', 'cls'),
+            get_setting('FEATURE_CACHE_DIR')
+        )
+        loaded = self._sentiment_models.get(key)
+        if loaded is not None:
+            return loaded
+
+        with self._sentiment_lock:
+            loaded = self._sentiment_models.get(key)
+            if loaded is None:
+                start = time.perf_counter()
+                loaded = self._load_sentiment_model(key[0])
+                if loaded is not None:
+                    self._sentiment_models[key] = loaded
+                    self.load_times['sentiment_model'] = time.perf_counter() - start
+        return loaded
+
+    def _load_sentiment_model(self, model_path: str) -> Optional[Tuple]:
+        if not os.path.exists(model_path):
+            return self._load_failed(f"模型文件不存在: {model_path}")
+
+        try:
+            print(f"[SentimentService] Loading model from: {model_path}")
+            # joblib/numpy/lightgbm较重，只在真正加载模型时导入
+            import joblib
+            model = joblib.load(model_path)
+            featurizer = self._build_featurizer(getattr(model, 'n_features_in_', None))
+
+            # 预先跑一条文本，确保特征后端可用且维度与模型一致
+            probe = featurizer.transform(['预热'])
+            expected_dim = getattr(model, 'n_features_in_', probe.shape[1])
+            if probe.shape[1] != expected_dim:
+                return self._load_failed(f"特征维度 {probe.shape[1]} 与模型维度 {expected_dim} 不一致")
+
+            print(f"[SentimentService] Model loaded successfully (featurizer: {featurizer.name})")
+            self.sentiment_model_error = None
+            return model, featurizer
+
+        except Exception as e:
+            traceback.print_exc()
+            return self._load_failed(f"{type(e).__name__}: {e}")
+
+    def _load_failed(self, reason: str) -> None:
+        """记录并醒目输出情感模型加载失败的原因（情感分析接口和Pipeline状态中可见）"""
+        self.sentiment_model_error = reason
+        backend = get_setting('FEATURIZER_BACKEND', 'encoder')
+        print("[ERROR] " + "=" * 60)
+        print(f"[ERROR] 情感模型加载失败，情感分析不可用: {reason}")
+        if backend == 'encoder':
+            print("[ERROR] encoder特征后端需要 torch 和 transformers（pip install -r requirements-encoder.txt），"
+                  "首次使用需下载编码器权重，见 README「情感分析模型」")
+        print("[ERROR] " + "=" * 60)
+        return None
+
+    def _build_featurizer(self, dim=None):
+        """按配置创建文本特征提取器"""
+        from app.services.feature_service import create_featurizer
+
+        backend = get_setting('FEATURIZER_BACKEND', 'encoder')
+        options = {}
+        if backend == 'encoder':
+            options = {
+                'model_name': get_setting('FEATURIZER_MODEL', 'bert-base-chinese'),
+                'batch_size': get_setting('FEATURIZER_BATCH_SIZE', 32),
+                'pooling': get_setting('FEATURIZER_POOLING', 'cls')
+            }
+        return create_featurizer(
+            backend,
+            dim=dim or get_setting('FEATURE_DIM', 768),
+            cache_size=get_setting('FEATURE_CACHE_SIZE', 50000),
+            cache_dir=get_setting('FEATURE_CACHE_DIR'),
+            cache_max_mb=get_setting('FEATURE_CACHE_MAX_MB', 512),
+            **options
+        )
+
+    # ====== 预热与状态 ======
+
+    def warmup(self) -> Dict:
+        """
+        加载全部资源，并用一小批样例文本跑一遍分词和情感推理
+        （触发jieba词典构建、特征后端和模型的首次推理开销）
+
+        Returns:
+            {'success': bool, 'elapsed': float, 'load_times': {...}}
+        """
+        start = time.perf_counter()
+        print("[ModelRegistry] 开始预热模型和NLP资源")
+
+        self.stopwords()
+        jieba = self.jieba()
+        for text in WARMUP_TEXTS:
+            list(jieba.cut(text))
+
+        loaded = self.sentiment_model()
+        if loaded is not None:
+            model, featurizer = loaded
+            # 绕过特征缓存，避免预热文本写入缓存
+            features = getattr(featurizer, 'featurizer', featurizer).transform(WARMUP_TEXTS)
+            if hasattr(model, 'predict_proba'):
+                model.predict_proba(features)
+            else:
+                model.predict(features)
+
+        elapsed = time.perf_counter() - start
+        print(f"[ModelRegistry] 预热完成，耗时 {elapsed:.2f}s"
+              f"{'' if loaded is not None else '（情感模型加载失败）'}")
+        return {
+            'success': loaded is not None,
+            'elapsed': round(elapsed, 3),
+            'load_times': self.status()['load_times']
+        }
+
+    def status(self) -> Dict:
+        """已加载的资源及各自的加载耗时"""
+        return {
+            'stopwords_loaded': self._stopwords is not None,
+            'jieba_loaded': self._jieba is not None,
+            'sentiment_models_loaded': len(self._sentiment_models),
+            'sentiment_model_error': self.sentiment_model_error,
+            'load_times': {name: round(seconds, 3) for name, seconds in self.load_times.items()}
+        }
+
+    def clear(self) -> None:
+        """丢弃已加载的情感模型（替换模型文件后调用，下次使用时重新加载）"""
+        with self._sentiment_lock:
+            self._sentiment_models.clear()
+            self.load_times.pop('sentiment_model', None)
+
+
+model_registry = ModelRegistry()
+
+
+def start_warmup(app, background: bool = True) -> None:
+    """
+    在应用启动时预热资源
+
+    Args:
+        app: Flask应用（预热在其应用上下文中读取配置）
+        background: True时在守护线程中预热，不阻塞启动；预热期间到达的请求
+            会在注册表的锁上等待同一次加载，而不会重复加载
+    """
+    def run():
+        with app.app_context():
+            model_registry.warmup()
+
+    if background:
+        threading.Thread(target=run, name='model-warmup', daemon=True).start()
+    else:
+        run()
@@ -7,10 +7,18 @@ from app.services.crawler_service import CrawlerService
 from app.services.data_processing_service import DataProcessingService
 from app.services.sentiment_service import SentimentAnalysisService
 from app.services.mediacrawler_wrapper import MediaCrawlerWrapper
+from app.services.job_manager import JobCancelled, PipelineJob, job_manager
+from app.services.model_registry import model_registry
+from app.services.topic_state import split_changed_topics
+from app.utils.sqlite_profile import pragma_status
 from app.models import Topic
 from app import db
 
 
+PIPELINE_STAGES = ('crawl', 'sync', 'keywords', 'sentiment')
+TOPIC_STAGES = ('keywords', 'sentiment')
+
+
 class DataPipelineService:
     """数据Pipeline服务 - 端到端流程编排"""
     
@@ -19,13 +27,14 @@ class DataPipelineService:
         self.data_processing_service = DataProcessingService()
         self.sentiment_service = SentimentAnalysisService()
         self.mediacrawler = MediaCrawlerWrapper()
-        self.is_running = False
     
     def run_full_pipeline(self, 
                          mode: str = 'hot_topics',
                          keyword: Optional[str] = None,
                          limit: int = 10,
-                         steps: Optional[Dict] = None) -> Dict:
+                         steps: Optional[Dict] = None,
+                         job: Optional[PipelineJob] = None,
+                         force: bool = False) -> Dict:
         """
         运行完整pipeline
         
@@ -34,6 +43,8 @@ class DataPipelineService:
             keyword: mode='search'时的搜索关键词
             limit: mode='hot_topics'时爬取的话题数量
             steps: 要执行的步骤 {'crawl': True, 'sync': True, 'keywords': True, 'sentiment': True}
+            job: 后台任务（记录各阶段进度并响应取消），直接调用时为None
+            force: 是否重新处理所有活跃话题（默认只处理上次处理后同步了新微博的话题）
             
         Returns:
             {
@@ -42,13 +53,8 @@ class DataPipelineService:
                 'message': str
             }
         """
-        if self.is_running:
-            return {
-                'status': 'error',
-                'message': 'Pipeline已在运行中'
-            }
-        
-        self.is_running = True
+        # 直接调用（脚本）时使用独立的任务对象记录进度
+        job = job or PipelineJob('pipeline', PIPELINE_STAGES)
         
         # 默认步骤
         if steps is None:
@@ -64,12 +70,14 @@ class DataPipelineService:
             'posts_synced': 0,
             'keywords_extracted': 0,
             'sentiments_analyzed': 0,
+            'topics_skipped': {'keywords': 0, 'sentiment': 0},
             'errors': []
         }
         
         try:
             # Step 1: 爬取话题
             if steps.get('crawl', True):
+                job.start_stage('crawl')
                 if mode == 'hot_topics':
                     crawl_result = self.crawler_service.crawl_hot_topics(
                         limit=limit,
@@ -79,7 +87,7 @@ class DataPipelineService:
                         results['topics_added'] = crawl_result['topics_added']
                     else:
                         results['errors'].append(f"爬取失败: {crawl_result['message']}")
-                        self.is_running = False
+                        job.finish_stage('crawl', 'error', crawl_result['message'])
                         return {
                             'status': 'error',
                             'results': results,
@@ -87,7 +95,7 @@ class DataPipelineService:
                         }
                 elif mode == 'search':
                     if not keyword:
-                        self.is_running = False
+                        job.finish_stage('crawl', 'error', 'search模式需要提供keyword参数')
                         return {
                             'status': 'error',
                             'message': 'search模式需要提供keyword参数'
@@ -98,61 +106,88 @@ class DataPipelineService:
                         results['topics_added'] = 1 if search_result['is_new'] else 0
                     else:
                         results['errors'].append(f"搜索失败: {search_result['message']}")
-            
-            # 提示: MediaCrawler需要单独运行
-            # 自动运行会导致超时,所以这里只配置,不运行
-            print("[Pipeline] ⚠️ 提示: 话题已创建并配置到MediaCrawler")
-            print("[Pipeline] 💡 要获取微博数据,请:")
-            print("[Pipeline]    1. 手动运行 MediaCrawler: cd MediaCrawler && python main.py --platform wb --lt qrcode --type search")
-            print("[Pipeline]    2. 或使用后台运行的 run_full_crawler.py")
-            print("[Pipeline]    3. 完成后再次运行 Pipeline 同步数据")
+                job.update_stage('crawl', results['topics_added'])
+                job.finish_stage('crawl')
+                
+                # 提示: MediaCrawler需要单独运行
+                # 自动运行会导致超时,所以这里只配置,不运行
+                print("[Pipeline] ⚠️ 提示: 话题已创建并配置到MediaCrawler")
+                print("[Pipeline] 💡 要获取微博数据,请:")
+                print("[Pipeline]    1. 手动运行 MediaCrawler: cd MediaCrawler && python main.py --platform wb --lt qrcode --type search")
+                print("[Pipeline]    2. 或使用后台运行的 run_full_crawler.py")
+                print("[Pipeline]    3. 完成后再次运行 Pipeline 同步数据")
+            else:
+                job.skip_stage('crawl')
             
             # Step 2: 同步MediaCrawler数据
             if steps.get('sync', True):
-                sync_result = self.crawler_service.sync_mediacrawler_data()
+                job.start_stage('sync')
+                sync_result = self.crawler_service.sync_mediacrawler_data(checkpoint=job.check_cancelled)
                 if sync_result['status'] == 'success':
                     results['posts_synced'] = sync_result['posts_added']
+                    job.update_stage('sync', results['posts_synced'])
+                    job.finish_stage('sync')
                 else:
                     results['errors'].append(f"同步失败: {sync_result['message']}")
+                    job.finish_stage('sync', 'error', sync_result['message'])
+            else:
+                job.skip_stage('sync')
             
             # Step 3: 提取关键词
             if steps.get('keywords', True):
-                # 处理所有活跃话题
+                job.start_stage('keywords')
+                # 处理所有活跃话题，每完成一个话题更新进度，分词每提交一批检查取消
                 keywords_results = self.data_processing_service.process_all_topics(
                     method='tfidf',
-                    top_n=50
+                    top_n=50,
+                    progress_callback=lambda done, total: job.update_stage('keywords', done, total),
+                    only_changed=not force,
+                    checkpoint=job.check_cancelled
                 )
                 
                 for result in keywords_results:
                     if result.get('status') == 'success':
                         results['keywords_extracted'] += result.get('keywords_count', 0)
+                    elif result.get('status') == 'skipped':
+                        results['topics_skipped']['keywords'] += 1
                     else:
                         results['errors'].append(f"关键词提取失败: {result.get('message', '')}")
+                job.finish_stage('keywords')
+            else:
+                job.skip_stage('keywords')
             
             # Step 4: 情感分析
             if steps.get('sentiment', True):
-                # 分析所有活跃话题
+                # 分析有新微博的活跃话题
                 topics = Topic.query.filter_by(is_active=True).all()
+                if not force:
+                    topics, unchanged = split_changed_topics(topics, 'sentiment')
+                    results['topics_skipped']['sentiment'] = len(unchanged)
+                job.start_stage('sentiment', total=len(topics))
                 
-                for topic in topics:
-                    sentiment_result = self.sentiment_service.analyze(topic.id)
+                for i, topic in enumerate(topics, 1):
+                    sentiment_result = self.sentiment_service.analyze(topic.id, checkpoint=job.check_cancelled)
                     if sentiment_result.get('success'):
                         results['sentiments_analyzed'] += sentiment_result.get('analyzed_count', 0)
                     else:
                         results['errors'].append(
                             f"话题{topic.id}情感分析失败: {sentiment_result.get('error', '')}"
                         )
-            
-            self.is_running = False
+                    job.update_stage('sentiment', i)
+                job.finish_stage('sentiment')
+            else:
+                job.skip_stage('sentiment')
             
             return {
                 'status': 'success',
                 'results': results,
-                'message': f'Pipeline完成: 新增{results["topics_added"]}话题, 同步{results["posts_synced"]}微博, 提取{results["keywords_extracted"]}关键词, 分析{results["sentiments_analyzed"]}情感'
+                'message': f'Pipeline完成: 新增{results["topics_added"]}话题, 同步{results["posts_synced"]}微博, 提取{results["keywords_extracted"]}关键词, 分析{results["sentiments_analyzed"]}情感, '
+                           f'跳过未变化话题(关键词{results["topics_skipped"]["keywords"]}个, 情感{results["topics_skipped"]["sentiment"]}个)'
             }
         
+        except JobCancelled:
+            raise
         except Exception as e:
-            self.is_running = False
             results['errors'].append(str(e))
             return {
                 'status': 'error',
@@ -160,17 +195,20 @@ class DataPipelineService:
                 'message': f'Pipeline执行失败: {str(e)}'
             }
     
-    def process_topic(self, topic_id: int, skip_crawl: bool = True) -> Dict:
+    def process_topic(self, topic_id: int, skip_crawl: bool = True,
+                      job: Optional[PipelineJob] = None) -> Dict:
         """
         处理单个话题（不包括爬取）
         
         Args:
             topic_id: 话题ID
             skip_crawl: 是否跳过爬取（默认跳过，仅处理现有数据）
+            job: 后台任务（记录各阶段进度并响应取消），直接调用时为None
             
         Returns:
             处理结果
         """
+        job = job or PipelineJob('process_topic', TOPIC_STAGES)
         results = {
             'keywords_count': 0,
             'sentiments_count': 0,
@@ -179,24 +217,33 @@ class DataPipelineService:
         
         try:
             # 提取关键词
+            job.start_stage('keywords', total=1)
             keyword_result = self.data_processing_service.process_topic(
                 topic_id=topic_id,
                 method='tfidf',
-                top_n=50
+                top_n=50,
+                checkpoint=job.check_cancelled
             )
             
             if keyword_result.get('status') == 'success':
                 results['keywords_count'] = keyword_result.get('keywords_count', 0)
+                job.update_stage('keywords', 1)
+                job.finish_stage('keywords')
             else:
                 results['errors'].append(f"关键词提取失败: {keyword_result.get('message', '')}")
+                job.finish_stage('keywords', 'error', keyword_result.get('message', ''))
             
             # 情感分析
-            sentiment_result = self.sentiment_service.analyze(topic_id)
+            job.start_stage('sentiment', total=1)
+            sentiment_result = self.sentiment_service.analyze(topic_id, checkpoint=job.check_cancelled)
             
             if sentiment_result.get('success'):
                 results['sentiments_count'] = sentiment_result.get('analyzed_count', 0)
+                job.update_stage('sentiment', 1)
+                job.finish_stage('sentiment')
             else:
                 results['errors'].append(f"情感分析失败: {sentiment_result.get('error', '')}")
+                job.finish_stage('sentiment', 'error', sentiment_result.get('error', ''))
             
             return {
                 'status': 'success',
@@ -204,6 +251,8 @@ class DataPipelineService:
                 'message': f'处理完成: 提取{results["keywords_count"]}关键词, 分析{results["sentiments_count"]}情感'
             }
         
+        except JobCancelled:
+            raise
         except Exception as e:
             results['errors'].append(str(e))
             return {
@@ -214,7 +263,11 @@ class DataPipelineService:
     
     def get_status(self) -> Dict:
         """获取Pipeline状态"""
+        active = job_manager.active_job()
         return {
-            'is_running': self.is_running,
-            'crawler_status': self.crawler_service.get_status()
+            'is_running': active is not None,
+            'active_job': active.to_dict() if active else None,
+            'crawler_status': self.crawler_service.get_status(),
+            'models': model_registry.status(),
+            'database': pragma_status(db.engine)
         }
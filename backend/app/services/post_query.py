@@ -0,0 +1,289 @@
+"""
+微博数据查询 - 数据管理页的历史数据检索
+
+列表和检索返回同一种分页结构 {'items', 'next_cursor', 'has_more'}，游标对调用方不透明:
+列表按 (publish_time, id) 倒序做游标翻页，游标记录上一页最后一条的位置，下一页沿索引继续读取
+（WHERE (publish_time, id) < (?, ?)），任意深度的翻页代价都与第一页相同，不使用OFFSET；
+检索同样是keyset游标，记录上一页最后一条的 (rank, id)（LIKE退化时为 (publish_time, id)），不使用OFFSET。
+bm25依赖全文索引的整体统计，翻页期间有微博写入时后续页按新的统计计算相关度，可能个别重复或遗漏；
+按发布时间排序的LIKE检索不受写入影响。
+只查询列表需要的列，raw_data、comment_text等大字段仅在include中指定时才读取。
+
+关键词检索走 weibo_posts_fts 全文索引（FTS5，分词见 app/utils/text_search.py），按bm25相关度排序，
+先由全文索引取出匹配的rowid，再按主键回表过滤话题和时间，不对content做LIKE全表扫描。
+非SQLite数据库（或全文索引表不存在）时退化为对content的LIKE子串匹配，按发布时间倒序，rank为None。
+"""
+import base64
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import and_, column, func, inspect, literal, literal_column, or_, table, tuple_
+
+from app import db
+from app.models import SentimentResult, WeiboPost
+from app.utils.text_search import FTS_TABLE, match_expression
+
+
+# 列表返回的列（不含raw_data等大字段）
+POST_COLUMNS = (
+    WeiboPost.id, WeiboPost.topic_id, WeiboPost.weibo_id, WeiboPost.content, WeiboPost.user_nickname,
+    WeiboPost.publish_time, WeiboPost.likes_count, WeiboPost.reposts_count, WeiboPost.comments_count,
+    WeiboPost.location, WeiboPost.region_code,
+)
+RESULT_COLUMNS = (
+    SentimentResult.sentiment_label, SentimentResult.sentiment_score, SentimentResult.sentiment_intensity,
+)
+# 按需读取的大字段
+OPTIONAL_COLUMNS = {
+    'topic_text': WeiboPost.topic_text,
+    'comment_text': WeiboPost.comment_text,
+    'raw_data': WeiboPost.raw_data,
+}
+
+_fts = table(FTS_TABLE, column('rowid'))
+_fts_ref = literal_column(FTS_TABLE)
+
+
+def _row_dict(row) -> Dict:
+    data = dict(row._mapping)
+    if data.get('publish_time') is not None:
+        data['publish_time'] = data['publish_time'].isoformat()
+    return data
+
+
+def _columns(include: Iterable[str] = ()) -> List:
+    """列表列 + 指定的大字段（未知字段名抛出ValueError）"""
+    include = list(include or ())
+    unknown = [name for name in include if name not in OPTIONAL_COLUMNS]
+    if unknown:
+        raise ValueError(f"include只能是{'/'.join(OPTIONAL_COLUMNS)}: {', '.join(unknown)}")
+    return [*POST_COLUMNS, *(OPTIONAL_COLUMNS[name] for name in dict.fromkeys(include)), *RESULT_COLUMNS]
+
+
+# 游标类型: 列表按 (publish_time, id)，检索按 (rank 或 publish_time, id)
+KEYSET, SEARCH = 'k', 's'
+
+
+def _encode(*parts) -> str:
+    return base64.urlsafe_b64encode('|'.join(map(str, parts)).encode()).decode().rstrip('=')
+
+
+def _decode(cursor: str, kind: str, count: int) -> List[str]:
+    """解码游标为count个字段，格式错误或类型不符抛出ValueError"""
+    try:
+        parts = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode().split('|')
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError('cursor无效') from e
+    if parts[0] != kind or len(parts) != count + 1:
+        raise ValueError('cursor无效（列表和检索的cursor不能混用）' if parts[0] in (KEYSET, SEARCH) else 'cursor无效')
+    return parts[1:]
+
+
+def encode_cursor(publish_time: Optional[datetime], post_id: int) -> str:
+    """把一页最后一条的 (publish_time, id) 编码为列表游标"""
+    return _encode(KEYSET, publish_time.isoformat() if publish_time else '', post_id)
+
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], int]:
+    """列表游标解码为 (publish_time, id)，格式错误抛出ValueError"""
+    time_part, id_part = _decode(cursor, KEYSET, 2)
+    try:
+        return (datetime.fromisoformat(time_part) if time_part else None), int(id_part)
+    except ValueError as e:
+        raise ValueError('cursor无效') from e
+
+
+def encode_search_cursor(sort_value: str, post_id: int) -> str:
+    """把检索一页最后一条的排序值（rank或发布时间的字符串形式）和id编码为检索游标"""
+    return _encode(SEARCH, sort_value, post_id)
+
+
+def decode_search_cursor(cursor: str) -> Tuple[str, int]:
+    """检索游标解码为 (排序值字符串, id)，格式错误抛出ValueError"""
+    sort_part, id_part = _decode(cursor, SEARCH, 2)
+    try:
+        return sort_part, int(id_part)
+    except ValueError as e:
+        raise ValueError('cursor无效') from e
+
+
+def list_posts(topic_id: Optional[int] = None, start: Optional[datetime] = None, end: Optional[datetime] = None,
+               cursor: Optional[str] = None, limit: int = 50, include: Iterable[str] = ()) -> Dict:
+    """
+    按发布时间倒序列出微博（附情感结果），游标翻页
+
+    Args:
+        topic_id: 话题ID，可选
+        start: 发布时间下限（含），可选
+        end: 发布时间上限（不含），可选
+        cursor: 上一页返回的next_cursor，第一页不传
+        limit: 每页条数
+        include: 额外读取的大字段（topic_text / comment_text / raw_data）
+
+    Returns:
+        {'items': [...], 'next_cursor': 下一页游标（没有下一页时为None）, 'has_more': bool}
+    """
+    after_time, after_id = decode_cursor(cursor) if cursor else (None, None)
+    query = db.session.query(*_columns(include)).outerjoin(
+        SentimentResult, SentimentResult.weibo_id == WeiboPost.id
+    )
+    if topic_id is not None:
+        query = query.filter(WeiboPost.topic_id == topic_id)
+    if start is not None:
+        query = query.filter(WeiboPost.publish_time >= start)
+    if end is not None:
+        query = query.filter(WeiboPost.publish_time < end)
+
+    rows = []
+    # 1. 有发布时间的微博: (publish_time, id) 倒序，从游标位置继续
+    if after_id is None or after_time is not None:
+        timed = query.filter(WeiboPost.publish_time.isnot(None))
+        if after_id is not None:
+            timed = timed.filter(tuple_(WeiboPost.publish_time, WeiboPost.id) < tuple_(after_time, after_id))
+        rows = timed.order_by(WeiboPost.publish_time.desc(), WeiboPost.id.desc()).limit(limit + 1).all()
+
+    # 2. 没有发布时间的微博排在最后（按时间过滤时不包含），按id倒序
+    if len(rows) <= limit and start is None and end is None:
+        untimed = query.filter(WeiboPost.publish_time.is_(None))
+        if after_id is not None and after_time is None:
+            untimed = untimed.filter(WeiboPost.id < after_id)
+        rows += untimed.order_by(WeiboPost.id.desc()).limit(limit + 1 - len(rows)).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].publish_time, rows[-1].id)
+    return {
+        'items': [_row_dict(row) for row in rows],
+        'next_cursor': next_cursor,
+        'has_more': next_cursor is not None
+    }
+
+
+def iter_posts(topic_id: Optional[int] = None, start: Optional[datetime] = None, end: Optional[datetime] = None,
+               include: Iterable[str] = (), batch_size: int = 1000) -> Iterator[Dict]:
+    """
+    按 (publish_time, id) 顺序逐行读取微博（附情感结果），用于导出
+
+    游标分批取行（yield_per），不会一次把结果集读入内存；排序与索引一致，不需要先排序全部结果。
+
+    Args:
+        topic_id: 话题ID，可选
+        start: 发布时间下限（含），可选
+        end: 发布时间上限（不含），可选
+        include: 额外读取的大字段（topic_text / comment_text / raw_data）
+        batch_size: 每批从游标取出的行数
+    """
+    query = db.session.query(*_columns(include)).outerjoin(
+        SentimentResult, SentimentResult.weibo_id == WeiboPost.id
+    )
+    if topic_id is not None:
+        query = query.filter(WeiboPost.topic_id == topic_id)
+    if start is not None:
+        query = query.filter(WeiboPost.publish_time >= start)
+    if end is not None:
+        query = query.filter(WeiboPost.publish_time < end)
+
+    query = query.order_by(WeiboPost.publish_time, WeiboPost.id).yield_per(batch_size)
+    for row in query:
+        yield dict(row._mapping)
+
+
+def fts_available() -> bool:
+    """当前数据库是否有全文索引表（SQLite且已执行迁移0005）"""
+    return db.engine.dialect.name == 'sqlite' and inspect(db.engine).has_table(FTS_TABLE)
+
+
+def _escape_like(term: str) -> str:
+    return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _parse_rank(value: str) -> float:
+    try:
+        return float(value)
+    except ValueError as e:
+        raise ValueError('cursor无效') from e
+
+
+def _before_time_position(time_value: str, post_id: int):
+    """(publish_time, id) 倒序中排在游标位置之后的条件，没有发布时间的微博排在最后"""
+    if not time_value:
+        return and_(WeiboPost.publish_time.is_(None), WeiboPost.id < post_id)
+    try:
+        after_time = datetime.fromisoformat(time_value)
+    except ValueError as e:
+        raise ValueError('cursor无效') from e
+    return or_(
+        WeiboPost.publish_time.is_(None),
+        tuple_(WeiboPost.publish_time, WeiboPost.id) < tuple_(after_time, post_id)
+    )
+
+
+def search_posts(keyword: str, topic_id: Optional[int] = None, start: Optional[datetime] = None,
+                 end: Optional[datetime] = None, cursor: Optional[str] = None, limit: int = 50,
+                 include: Iterable[str] = ()) -> Dict:
+    """
+    全文检索微博正文（没有全文索引时退化为LIKE子串匹配，见模块说明）
+
+    Args:
+        keyword: 检索词，空格分隔的多个词为AND关系
+        topic_id: 话题ID，可选
+        start: 发布时间下限（含），可选
+        end: 发布时间上限（不含），可选
+        cursor: 上一页返回的next_cursor，第一页不传
+        limit: 每页条数
+        include: 额外读取的大字段（topic_text / comment_text / raw_data）
+
+    Returns:
+        {'items': [微博字段 + 情感结果 + rank], 'next_cursor': 下一页游标（没有下一页时为None）, 'has_more': bool}
+    """
+    columns = _columns(include)
+    after_value, after_id = decode_search_cursor(cursor) if cursor else (None, None)
+    ranked = fts_available()
+    if ranked:
+        expression = match_expression(keyword)
+        if expression is None:
+            return {'items': [], 'next_cursor': None, 'has_more': False}
+        rank = func.bm25(_fts_ref)
+        query = db.session.query(*columns, rank.label('rank')).select_from(_fts).join(
+            WeiboPost, WeiboPost.id == _fts.c.rowid
+        ).filter(_fts_ref.op('MATCH')(expression))
+        # bm25越小越相关: 从 (rank, id) 之后继续
+        if after_id is not None:
+            query = query.filter(tuple_(rank, WeiboPost.id) > tuple_(_parse_rank(after_value), after_id))
+        order = (rank, WeiboPost.id)
+    else:
+        terms = (keyword or '').split()
+        if not terms:
+            return {'items': [], 'next_cursor': None, 'has_more': False}
+        query = db.session.query(*columns, literal(None).label('rank')).filter(and_(*(
+            WeiboPost.content.like(f'%{_escape_like(term)}%', escape='\\') for term in terms
+        )))
+        # 与列表相同: (publish_time, id) 倒序，没有发布时间的排在最后
+        if after_id is not None:
+            query = query.filter(_before_time_position(after_value, after_id))
+        order = (WeiboPost.publish_time.desc().nulls_last(), WeiboPost.id.desc())
+
+    query = query.outerjoin(SentimentResult, SentimentResult.weibo_id == WeiboPost.id)
+    if topic_id is not None:
+        query = query.filter(WeiboPost.topic_id == topic_id)
+    if start is not None:
+        query = query.filter(WeiboPost.publish_time >= start)
+    if end is not None:
+        query = query.filter(WeiboPost.publish_time < end)
+
+    rows = query.order_by(*order).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        if ranked:
+            sort_value = repr(last.rank)
+        else:
+            sort_value = last.publish_time.isoformat() if last.publish_time else ''
+        next_cursor = encode_search_cursor(sort_value, last.id)
+    return {
+        'items': [_row_dict(row) for row in rows],
+        'next_cursor': next_cursor,
+        'has_more': next_cursor is not None
+    }
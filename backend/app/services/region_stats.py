@@ -0,0 +1,219 @@
+"""
+话题地域汇总 - 按 (话题, 地域代码) 累计微博数和各情感标签条数
+
+微博写入时由 location 归一化出 region_code（见 app/utils/region.py）。通过ORM写入微博时
+（session.add，任何同步入口）由after_insert事件计入微博数，bulk_insert_mappings批量写入（不触发ORM事件）
+后调用record_posts；情感结果写入器flush时计入情感标签（覆盖旧结果时先扣除）。都与数据本身在同一事务中提交，
+通过ORM删除微博或情感结果时由事件扣除。地域图只读取这张小表，不再对location原文分组。
+升级时由迁移0007回填region_code并从已有数据重建一次。
+"""
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import bindparam, event, func, select
+
+from app import db
+from app.models import SentimentResult, TopicRegionStat, WeiboPost
+from app.services.rollups import Rollup, RollupDelta
+from app.services.sentiment_stats import label_key
+from app.utils.region import region_code, region_name
+
+
+FIELDS = ('post_count', 'positive_count', 'negative_count', 'neutral_count')
+
+_stats_table = TopicRegionStat.__table__
+_posts_table = WeiboPost.__table__
+_results_table = SentimentResult.__table__
+
+
+def post_region(code: Optional[str], location: Optional[str]) -> str:
+    """微博的地域代码（早期写入、尚未回填region_code的微博按location现算）"""
+    return code or region_code(location)
+
+
+class RegionStatsDelta(RollupDelta):
+    """待写入的地域汇总增量 {(topic_id, region_code): {字段: 增量}}"""
+
+    def __init__(self):
+        super().__init__(FIELDS)
+
+    def add_post(self, topic_id: int, code: str, sign: int = 1) -> None:
+        """计入（sign=-1时扣除）一条微博"""
+        if topic_id is None:
+            return
+        self.add((topic_id, code), 'post_count', sign)
+
+    def add_sentiment(self, topic_id: int, code: str, label: str, sign: int = 1) -> None:
+        """计入（sign=-1时扣除）一条情感结果"""
+        key = label_key(label)
+        if key is None or topic_id is None:
+            return
+        self.add((topic_id, code), f'{key}_count', sign)
+
+
+ROLLUP = Rollup(_stats_table, ('topic_id', 'region_code'), FIELDS)
+
+
+def record_posts(posts: Iterable) -> RegionStatsDelta:
+    """
+    用bulk_insert_mappings批量写入一批微博后调用，把它们计入地域汇总（不提交，与该批数据在同一事务中提交）
+
+    ORM逐条写入（session.add）的微博由after_insert事件计入，不要再调用本函数。
+
+    Args:
+        posts: WeiboPost字段字典或WeiboPost对象列表（需包含topic_id和location）
+    """
+    delta = RegionStatsDelta()
+    for post in posts:
+        field = post.get if isinstance(post, dict) else lambda name: getattr(post, name, None)
+        delta.add_post(field('topic_id'), post_region(field('region_code'), field('location')))
+    apply_delta(delta)
+    return delta
+
+
+def apply_delta(delta: RegionStatsDelta) -> None:
+    """在当前会话的事务中写入增量（不提交）"""
+    ROLLUP.apply(db.session.connection(), delta)
+
+
+def recount(connection, topic_id: Optional[int] = None) -> Dict:
+    """
+    在connection上回填缺失的weibo_posts.region_code，清空并重建地域汇总（不提交）
+
+    Args:
+        connection: 数据库连接（迁移的连接或会话的连接）
+        topic_id: 只重建该话题，默认重建全部话题
+
+    Returns:
+        {'rows': 汇总行数, 'posts': 计入的微博数, 'backfilled': 回填region_code的微博数}
+    """
+    scope = [] if topic_id is None else [_posts_table.c.topic_id == topic_id]
+
+    # 1. 回填早期写入的微博的region_code（按不同location分组，每种原文只归一化一次）
+    backfilled = 0
+    missing = select(_posts_table.c.location, func.count(_posts_table.c.id)).where(
+        _posts_table.c.region_code.is_(None), *scope
+    ).group_by(_posts_table.c.location)
+    for location, count in connection.execute(missing).all():
+        same_location = (_posts_table.c.location.is_(None) if location is None
+                         else _posts_table.c.location == location)
+        connection.execute(_posts_table.update().where(
+            _posts_table.c.region_code.is_(None), same_location, *scope
+        ).values(region_code=region_code(location)))
+        backfilled += count
+
+    # 2. 重建汇总
+    query = select(
+        _posts_table.c.topic_id, _posts_table.c.region_code, _results_table.c.sentiment_label,
+        func.count(_posts_table.c.id)
+    ).select_from(
+        _posts_table.outerjoin(_results_table, _results_table.c.weibo_id == _posts_table.c.id)
+    ).where(*scope).group_by(
+        _posts_table.c.topic_id, _posts_table.c.region_code, _results_table.c.sentiment_label
+    )
+
+    delta = RegionStatsDelta()
+    posts = 0
+    for row_topic_id, code, label, count in connection.execute(query):
+        delta.add_post(row_topic_id, code, sign=count)
+        delta.add_sentiment(row_topic_id, code, label, sign=count)
+        posts += count
+
+    ROLLUP.rebuild(connection, delta, topic_id)
+    return {'rows': len(delta.rows), 'posts': posts, 'backfilled': backfilled}
+
+
+def rebuild_region_stats(topic_id: Optional[int] = None) -> Dict:
+    """
+    回填region_code并重建地域汇总，提交（见recount）
+
+    Args:
+        topic_id: 只重建该话题，默认重建全部话题
+    """
+    try:
+        result = recount(db.session.connection(), topic_id)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    print(f"[RegionStats] 重建地域汇总: {result['rows']} 行, {result['posts']} 条微博, "
+          f"回填地域 {result['backfilled']} 条")
+    return result
+
+
+def get_regions(topic_id: Optional[int] = None) -> List[Dict]:
+    """
+    读取地域分布
+
+    Args:
+        topic_id: 话题ID，默认全部话题
+
+    Returns:
+        [{'code', 'name', 'post_count', 'positive', 'negative', 'neutral'}]，按微博数降序
+    """
+
+    columns = [db.func.sum(getattr(TopicRegionStat, field)) for field in FIELDS]
+    query = db.session.query(TopicRegionStat.region_code, *columns)
+    if topic_id is not None:
+        query = query.filter(TopicRegionStat.topic_id == topic_id)
+    query = query.group_by(TopicRegionStat.region_code)
+
+    regions = [{
+        'code': code,
+        'name': region_name(code),
+        'post_count': post_count or 0,
+        'positive': positive or 0,
+        'negative': negative or 0,
+        'neutral': neutral or 0
+    } for code, post_count, positive, negative, neutral in query if post_count]
+    regions.sort(key=lambda region: (-region['post_count'], region['code']))
+    return regions
+
+
+# ====== ORM写入时计入，删除时扣除 ======
+
+_decrement = {
+    field: _stats_table.update().where(
+        _stats_table.c.topic_id == bindparam('scope'),
+        _stats_table.c.region_code == bindparam('code')
+    ).values({field: _stats_table.c[field] - 1})
+    for field in FIELDS
+}
+
+
+def _on_post_inserted(mapper, connection, target):
+    """通过ORM写入微博时，在同一连接上计入其微博数"""
+    delta = RegionStatsDelta()
+    delta.add_post(target.topic_id, post_region(target.region_code, target.location))
+    ROLLUP.apply(connection, delta)
+
+
+def _on_post_deleted(mapper, connection, target):
+    """微博被删除时，在同一连接上扣除其微博数"""
+    connection.execute(_decrement['post_count'], {
+        'scope': target.topic_id,
+        'code': post_region(target.region_code, target.location)
+    })
+
+
+def _on_result_deleted(mapper, connection, target):
+    """情感结果被删除时，在同一连接上扣除其情感标签计数（微博行此时尚未删除）"""
+    key = label_key(target.sentiment_label)
+    if key is None:
+        return
+    post = connection.execute(
+        select(_posts_table.c.topic_id, _posts_table.c.region_code, _posts_table.c.location).where(
+            _posts_table.c.id == target.weibo_id
+        )
+    ).first()
+    if post is None:
+        return
+    connection.execute(_decrement[f'{key}_count'], {
+        'scope': post.topic_id,
+        'code': post_region(post.region_code, post.location)
+    })
+
+
+event.listen(WeiboPost, 'after_insert', _on_post_inserted)
+event.listen(WeiboPost, 'after_delete', _on_post_deleted)
+event.listen(SentimentResult, 'after_delete', _on_result_deleted)
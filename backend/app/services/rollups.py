@@ -0,0 +1,101 @@
+"""
+汇总表公共逻辑 - 话题情感汇总、小时汇总、地域汇总共用的增量写入和重建
+
+每张汇总表的行由键列（topic_id, ...）确定，其余列为累加字段。各服务把写入/删除的数据换算成
+按键合并的增量（RollupDelta），在当前事务的连接上一次写入，与数据本身一起提交:
+SQLite用 INSERT ... ON CONFLICT DO UPDATE 累加（不需要先查询已有行），其他数据库先UPDATE再
+INSERT缺失的键。重建时删除（某个话题的）汇总行，再写入从明细重新统计的增量。
+
+汇总表由迁移0007从明细一次性重建（见 app/migrations.py），之后只做增量维护，读取时不再检查。
+"""
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Optional, Sequence, Tuple
+
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+
+class RollupDelta:
+    """待写入的汇总增量 {键: {字段: 增量}}"""
+
+    def __init__(self, fields: Sequence[str]):
+        self.fields = tuple(fields)
+        self.rows: Dict[Tuple, Dict[str, float]] = defaultdict(lambda: dict.fromkeys(self.fields, 0))
+
+    def add(self, key: Tuple, field: str, amount) -> None:
+        self.rows[key][field] += amount
+
+    def __bool__(self):
+        return bool(self.rows)
+
+
+class Rollup:
+    """一张汇总表: 表、键列、累加字段，以及写入时更新为当前时间的列（可选）"""
+
+    def __init__(self, table, key_columns: Sequence[str], fields: Sequence[str],
+                 touch_column: Optional[str] = None):
+        self.table = table
+        self.key_columns = tuple(key_columns)
+        self.fields = tuple(fields)
+        self.touch_column = touch_column
+
+    def delta(self) -> RollupDelta:
+        return RollupDelta(self.fields)
+
+    def apply(self, connection, delta: RollupDelta) -> int:
+        """
+        在connection上写入增量（不提交）
+
+        Returns:
+            写入的汇总行数（增量全为0的键跳过）
+        """
+        rows = []
+        for key, changes in delta.rows.items():
+            if not any(changes.values()):
+                continue
+            row = dict(zip(self.key_columns, key))
+            row.update(changes)
+            if self.touch_column:
+                row[self.touch_column] = datetime.utcnow()
+            rows.append(row)
+        if not rows:
+            return 0
+
+        if connection.dialect.name == 'sqlite':
+            statement = sqlite_insert(self.table)
+            values = {field: self.table.c[field] + statement.excluded[field] for field in self.fields}
+            if self.touch_column:
+                values[self.touch_column] = statement.excluded[self.touch_column]
+            connection.execute(statement.on_conflict_do_update(index_elements=self.key_columns, set_=values), rows)
+            return len(rows)
+
+        for row in rows:
+            values = {field: self.table.c[field] + row[field] for field in self.fields}
+            if self.touch_column:
+                values[self.touch_column] = row[self.touch_column]
+            result = connection.execute(
+                self.table.update().where(
+                    *(self.table.c[column] == row[column] for column in self.key_columns)
+                ).values(values)
+            )
+            if result.rowcount == 0:
+                connection.execute(self.table.insert().values(row))
+        return len(rows)
+
+    def rebuild(self, connection, delta: RollupDelta, topic_id: Optional[int] = None) -> int:
+        """删除（topic_id指定时只删除该话题的）汇总行后写入重新统计的增量（不提交）"""
+        statement = self.table.delete()
+        if topic_id is not None:
+            statement = statement.where(self.table.c.topic_id == topic_id)
+        connection.execute(statement)
+        return self.apply(connection, delta)
+
+    def current(self, connection, topic_id: Optional[int] = None) -> Dict[Tuple, Dict[str, float]]:
+        """读取当前汇总 {键: {字段: 值}}（用于重建前比较偏差）"""
+        statement = self.table.select()
+        if topic_id is not None:
+            statement = statement.where(self.table.c.topic_id == topic_id)
+        return {
+            tuple(row[column] for column in self.key_columns): {field: row[field] for field in self.fields}
+            for row in connection.execute(statement).mappings()
+        }
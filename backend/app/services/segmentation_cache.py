@@ -0,0 +1,234 @@
+"""
+分词结果缓存 - 按微博id持久化清洗+分词结果，只有新增或内容变化的微博才重新分词
+
+存储方式:
+    vocabulary      词 <-> 整数id
+    post_segments   post_id -> (话题, 规则指纹, content_hash, int32小端token id数组)
+
+content_hash = sha1(分词规则指纹 + 原文)，停用词表或清洗/分词规则变化（SEGMENTER_VERSION）
+后所有旧缓存自动失效。写入分词结果时在同一事务中增量更新词频统计（term_stats）。
+"""
+import hashlib
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from app import db
+from app.models import PostSegment, Vocabulary, WeiboPost
+from app.services.term_stats import TermStatsDelta, apply_delta
+from app.utils.batching import chunked
+from app.utils.token_ids import decode_token_ids, encode_token_ids
+
+
+# 清洗或分词逻辑变化时递增，使已缓存的分词结果失效
+SEGMENTER_VERSION = 3
+
+# (post_id, 原文, topic_id)
+PostText = Tuple[int, str, int]
+# (结果中的位置, post_id, content_hash, 原文, topic_id)
+PendingSegment = Tuple[int, int, str, str, int]
+
+
+class SegmentationCache:
+    """分词结果缓存"""
+
+    def __init__(self, segmenter):
+        """
+        Args:
+            segmenter: 提供 stopwords 和 tokenize_texts(texts) 的对象（DataProcessingService）
+        """
+        self.segmenter = segmenter
+        stopwords = '\n'.join(sorted(segmenter.stopwords))
+        self.fingerprint = hashlib.sha1(
+            f"v{SEGMENTER_VERSION}\n{stopwords}".encode('utf-8')
+        ).hexdigest()
+        self._words: Dict[int, str] = {}
+        self._ids: Dict[str, int] = {}
+        self._vocab_loaded = False
+        self.hits = 0
+        self.misses = 0
+        # store()回滚的批次数，调用方据此判断本次处理是否完整
+        self.failed_batches = 0
+
+    def content_hash(self, content: str) -> str:
+        return hashlib.sha1(f"{self.fingerprint}\n{content or ''}".encode('utf-8')).hexdigest()
+
+    # ====== 读取 ======
+
+    def get_tokens(self, posts: Iterable[PostText],
+                   segment_fn: Optional[Callable[[List[str]], List[List[str]]]] = None) -> List[List[str]]:
+        """
+        获取每条微博的分词结果，未命中的微博分词后写回缓存
+
+        Args:
+            posts: (post_id, 原文, topic_id) 列表
+            segment_fn: 批量分词函数，默认使用 segmenter.tokenize_texts
+
+        Returns:
+            与posts顺序一致的分词列表
+        """
+        tokens, pending = self.lookup(posts)
+        if pending:
+            segment_fn = segment_fn or self.segmenter.tokenize_texts
+            segmented = segment_fn([pending_item[3] for pending_item in pending])
+            for (position, *_), words in zip(pending, segmented):
+                tokens[position] = words
+            self.store(pending, segmented)
+        return tokens
+
+    def lookup(self, posts: Iterable[PostText]) -> Tuple[List[Optional[List[str]]], List[PendingSegment]]:
+        """
+        查询缓存，不做分词（话题变化的微博也视为未命中，以便把词频统计移到新话题）
+
+        Returns:
+            (分词列表（未命中的位置为None）, 需要分词的 (位置, post_id, content_hash, 原文, topic_id) 列表)
+        """
+        posts = list(posts)
+        cached = self._load_segments([post[0] for post in posts])
+
+        tokens: List[Optional[List[str]]] = [None] * len(posts)
+        pending: List[PendingSegment] = []
+        for position, (post_id, content, topic_id) in enumerate(posts):
+            digest = self.content_hash(content)
+            entry = cached.get(post_id)
+            if entry is not None and entry[0] == digest and entry[2] == topic_id:
+                tokens[position] = self.decode(entry[1])
+                self.hits += 1
+            else:
+                pending.append((position, post_id, digest, content, topic_id))
+                self.misses += 1
+
+        return tokens, pending
+
+    def topic_posts(self, topic_id: int, stale_only: bool = True) -> List[PostText]:
+        """
+        查询话题下的 (post_id, 原文, topic_id)
+
+        Args:
+            stale_only: 只返回没有分词缓存、缓存属于其他话题或分词规则已变化的微博
+                （不比较内容哈希，内容被修改过时需传False做全量校验）
+        """
+        query = db.session.query(WeiboPost.id, WeiboPost.content, WeiboPost.topic_id)
+        if stale_only:
+            query = query.outerjoin(PostSegment, PostSegment.post_id == WeiboPost.id).filter(
+                db.or_(
+                    PostSegment.post_id.is_(None),
+                    PostSegment.topic_id != WeiboPost.topic_id,
+                    PostSegment.fingerprint != self.fingerprint
+                )
+            )
+        return [tuple(row) for row in query.filter(WeiboPost.topic_id == topic_id).order_by(WeiboPost.id)]
+
+    def _load_segments(self, post_ids: Sequence[int]) -> Dict[int, Tuple[str, bytes, int]]:
+        """查询已缓存的 {post_id: (content_hash, token_ids, topic_id)}"""
+        segments = {}
+        for chunk in chunked(post_ids):
+            for post_id, digest, blob, topic_id in db.session.query(
+                PostSegment.post_id, PostSegment.content_hash, PostSegment.token_ids, PostSegment.topic_id
+            ).filter(PostSegment.post_id.in_(chunk)):
+                segments[post_id] = (digest, blob, topic_id)
+        return segments
+
+    def decode(self, blob: bytes) -> List[str]:
+        """把token_ids还原为词列表"""
+        ids = decode_token_ids(blob)
+        words = self._vocabulary()
+        if any(token_id not in words for token_id in ids):
+            # 其他进程新增的词，重新载入词表
+            self._vocab_loaded = False
+            words = self._vocabulary()
+        return [words[token_id] for token_id in ids if token_id in words]
+
+    # ====== 写入 ======
+
+    def store(self, pending: Sequence[PendingSegment], segmented: Sequence[List[str]]) -> int:
+        """
+        保存新的分词结果（已有缓存的微博覆盖），并在同一个事务中更新词频统计
+
+        数据库锁超时/并发写入冲突（OperationalError/IntegrityError）时回滚本批、记录日志、
+        failed_batches加1并返回0，调用方不应把话题标记为已处理；其他异常回滚后抛出。
+
+        Returns:
+            写入的条数
+        """
+        if not pending:
+            return 0
+
+        try:
+            word_ids = self._ensure_words({word for words in segmented for word in words})
+            existing = self._load_segments([pending_item[1] for pending_item in pending])
+
+            delta = TermStatsDelta()
+            inserts, updates = [], []
+            for (_, post_id, digest, _, topic_id), words in zip(pending, segmented):
+                token_ids = [word_ids[word] for word in words]
+                row = {
+                    'post_id': post_id,
+                    'topic_id': topic_id,
+                    'fingerprint': self.fingerprint,
+                    'content_hash': digest,
+                    'token_ids': encode_token_ids(token_ids),
+                    'token_count': len(token_ids)
+                }
+                old = existing.get(post_id)
+                if old is not None:
+                    # 先扣除旧分词结果在旧话题下的计数
+                    delta.add(old[2], decode_token_ids(old[1]), sign=-1)
+                    updates.append(row)
+                else:
+                    inserts.append(row)
+                delta.add(topic_id, token_ids)
+
+            if inserts:
+                db.session.bulk_insert_mappings(PostSegment, inserts)
+            if updates:
+                db.session.bulk_update_mappings(PostSegment, updates)
+            apply_delta(delta)
+            db.session.commit()
+            return len(inserts) + len(updates)
+
+        except (OperationalError, IntegrityError) as e:
+            db.session.rollback()
+            # 回滚后本次插入的词不再有效
+            self._vocab_loaded = False
+            self.failed_batches += 1
+            print(f"[SegmentationCache] ⚠️ 保存 {len(pending)} 条分词缓存失败，本批词频统计未更新: "
+                  f"{type(e).__name__}: {str(e).splitlines()[0]}")
+            return 0
+        except Exception:
+            db.session.rollback()
+            self._vocab_loaded = False
+            raise
+
+    def _ensure_words(self, words) -> Dict[str, int]:
+        """返回 {词: id}，词表中没有的词先插入"""
+        self._vocabulary()
+        new_words = [word for word in words if word not in self._ids]
+        if new_words:
+            statement = db.insert(Vocabulary).prefix_with('OR IGNORE', dialect='sqlite')
+            for chunk in chunked(new_words):
+                db.session.execute(statement, [{'word': word} for word in chunk])
+                for word_id, word in db.session.query(
+                    Vocabulary.id, Vocabulary.word
+                ).filter(Vocabulary.word.in_(chunk)):
+                    self._ids[word] = word_id
+                    self._words[word_id] = word
+        return self._ids
+
+    def _vocabulary(self) -> Dict[int, str]:
+        if not self._vocab_loaded:
+            self._words = dict(db.session.query(Vocabulary.id, Vocabulary.word))
+            self._ids = {word: word_id for word_id, word in self._words.items()}
+            self._vocab_loaded = True
+        return self._words
+
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 4) if total else 0.0,
+            'failed_batches': self.failed_batches,
+            'vocabulary_size': len(self._words)
+        }
+
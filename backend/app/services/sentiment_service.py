@@ -1,16 +1,23 @@
-import os
-import joblib
-import numpy as np
-from app.models import SentimentResult, WeiboPost
+from app.models import SentimentResult, TopicSentimentStat, WeiboPost
 from app import db
+from app.config import get_setting
+from app.services.job_manager import JobCancelled
+from app.services.model_registry import model_registry
+from app.services.sentiment_stats import get_topic_sentiment_stat
+from app.services.sentiment_writer import SentimentResultWriter, DEFAULT_FLUSH_SIZE
+from app.services.topic_state import begin_processing, mark_processed
 from datetime import datetime
 
 
+DEFAULT_BATCH_SIZE = 512
+
+
 class SentimentAnalysisService:
     """情感分析服务"""
     
     def __init__(self):
         self.model = None
+        self.featurizer = None
         self.label_map = {
             0: '中性',
             1: '正面',
@@ -24,40 +31,20 @@ class SentimentAnalysisService:
         """加载情感分析模型
         
         Args:
-            model_path: 模型文件路径，如果为None则使用配置文件中的路径
+            model_path: 模型文件路径，如果为None则使用默认部署路径
         """
         if self.model_loaded:
             print("[SentimentService] Model already loaded")
             return True
             
-        try:
-            if model_path is None:
-                # 从backend/app目录向上到项目根目录
-                # __file__ -> app/services/sentiment_service.py
-                # dirname(__file__) -> app/services
-                # dirname(dirname(__file__)) -> app
-                # dirname(dirname(dirname(__file__))) -> backend
-                # dirname(dirname(dirname(dirname(__file__)))) -> project root
-                current_file = os.path.abspath(__file__)
-                app_services_dir = os.path.dirname(current_file)  # app/services
-                app_dir = os.path.dirname(app_services_dir)  # app
-                backend_dir = os.path.dirname(app_dir)  # backend
-                project_root = os.path.dirname(backend_dir)  # project root
-                model_path = os.path.join(project_root, 'deployed_ml_models', 'lightgbm_classifier.joblib')
-            
-            if not os.path.exists(model_path):
-                print(f"[SentimentService] Model file not found: {model_path}")
-                return False
-                
-            print(f"[SentimentService] Loading model from: {model_path}")
-            self.model = joblib.load(model_path)
-            self.model_loaded = True
-            print(f"[SentimentService] Model loaded successfully")
-            return True
-            
-        except Exception as e:
-            print(f"[SentimentService] Error loading model: {e}")
+        # 模型和特征提取器由进程级注册表加载并在所有服务实例间共享
+        loaded = model_registry.sentiment_model(model_path)
+        if loaded is None:
             return False
+        
+        self.model, self.featurizer = loaded
+        self.model_loaded = True
+        return True
     
     def predict(self, text):
         """预测单条文本的情感
@@ -77,26 +64,7 @@ class SentimentAnalysisService:
                 }
         
         try:
-            # 使用模型进行预测
-            # 注意：这里假设模型接受文本输入，如果需要特征提取请相应修改
-            prediction = self.model.predict([text])[0]
-            
-            # 获取概率分数（如果模型支持）
-            if hasattr(self.model, 'predict_proba'):
-                probabilities = self.model.predict_proba([text])[0]
-                score = float(probabilities[prediction])
-                intensity = float(np.max(probabilities))
-            else:
-                score = 1.0
-                intensity = 1.0
-            
-            label = self.label_map.get(prediction, '中性')
-            
-            return {
-                'label': label,
-                'score': score,
-                'intensity': intensity
-            }
+            return self._predict_chunk([text])[0]
             
         except Exception as e:
             print(f"[SentimentService] Error predicting: {e}")
@@ -106,56 +74,59 @@ class SentimentAnalysisService:
                 'intensity': 0.5
             }
     
-    def analyze(self, topic_id):
+    def analyze(self, topic_id, batch_size=None, checkpoint=None):
         """对指定话题的评论进行情感分析
         
+        待分析文本按batch_size分块，每块只调用一次predict_proba
+        
         Args:
             topic_id: 话题ID
+            batch_size: 每批推理的文本数量，默认读取配置SENTIMENT_BATCH_SIZE
+            checkpoint: 每批推理后调用，抛出JobCancelled（任务取消）时写入已推理的结果后停止，
+                下次只分析剩余的微博
         
         Returns:
             dict: {'analyzed_count': int, 'success': bool}
         """
         if not self.model_loaded:
             if not self.load_model():
-                return {'analyzed_count': 0, 'success': False, 'error': 'Model not loaded'}
+                return {'analyzed_count': 0, 'success': False,
+                        'error': f"Model not loaded: {model_registry.sentiment_model_error}"}
+        
+        if batch_size is None:
+            batch_size = get_setting('SENTIMENT_BATCH_SIZE', DEFAULT_BATCH_SIZE)
+        batch_size = max(1, int(batch_size))
+        
+        writer = SentimentResultWriter(
+            flush_size=get_setting('SENTIMENT_FLUSH_SIZE', DEFAULT_FLUSH_SIZE)
+        )
         
         try:
-            # 获取该话题下所有未分析的微博评论
-            posts = WeiboPost.query.filter_by(topic_id=topic_id).all()
-            
             analyzed_count = 0
+            watermark = begin_processing(topic_id)
             
-            for post in posts:
-                # 检查是否已经分析过
-                existing_result = SentimentResult.query.filter_by(weibo_id=post.id).first()
-                if existing_result:
-                    continue
-                
-                # 如果没有评论文本，跳过
-                if not post.comment_text or len(post.comment_text.strip()) < 3:
-                    continue
-                
-                # 预测情感
-                result = self.predict(post.comment_text)
-                
-                # 保存结果
-                sentiment_result = SentimentResult(
-                    weibo_id=post.id,
-                    sentiment_label=result['label'],
-                    sentiment_score=result['score'],
-                    sentiment_intensity=result['intensity'],
-                    analyzed_at=datetime.utcnow()
-                )
-                db.session.add(sentiment_result)
-                analyzed_count += 1
+            # 只流式读取尚未分析的评论，每页即为一个推理批次
+            for rows in self.iter_pending_posts(topic_id, batch_size):
+                # 整块预测情感，结果交给批量写入器，满flush_size提交一次
+                results = self._predict_chunk([row.text for row in rows])
+                analyzed_count += writer.add_results([row.id for row in rows], results)
+                if checkpoint:
+                    checkpoint()
             
-            db.session.commit()
+            writer.flush()
+            self.featurizer.flush()
+            mark_processed(topic_id, 'sentiment', watermark)
             
             return {
                 'analyzed_count': analyzed_count,
-                'success': True
+                'success': True,
+                'feature_cache': self.featurizer.stats()
             }
             
+        except JobCancelled:
+            writer.flush()
+            self.featurizer.flush()
+            raise
         except Exception as e:
             db.session.rollback()
             print(f"[SentimentService] Error analyzing topic {topic_id}: {e}")
@@ -165,6 +136,112 @@ class SentimentAnalysisService:
                 'error': str(e)
             }
     
+    def iter_pending_posts(self, topic_id, page_size=DEFAULT_BATCH_SIZE,
+                           fallback_to_content=False, min_length=3):
+        """按主键顺序分页流式读取话题下尚未分析的微博
+        
+        使用 weibo_posts LEFT JOIN sentiment_results WHERE result IS NULL 一次性
+        过滤已分析的行，并以 id > 上一页最大id 做键集分页，只把待分析的行读入内存
+        
+        Args:
+            topic_id: 话题ID
+            page_size: 每页行数
+            fallback_to_content: 评论文本为空时是否使用微博正文
+            min_length: 文本最短长度，更短的行在SQL中直接过滤
+        
+        Yields:
+            list: 每页的行，包含 id 和 text 两列
+        """
+        text_column = WeiboPost.comment_text
+        if fallback_to_content:
+            text_column = db.func.coalesce(db.func.nullif(WeiboPost.comment_text, ''), WeiboPost.content)
+        
+        last_id = 0
+        while True:
+            rows = db.session.query(
+                WeiboPost.id,
+                text_column.label('text')
+            ).outerjoin(
+                SentimentResult, SentimentResult.weibo_id == WeiboPost.id
+            ).filter(
+                WeiboPost.topic_id == topic_id,
+                WeiboPost.id > last_id,
+                SentimentResult.id.is_(None),
+                db.func.length(db.func.trim(text_column)) >= min_length
+            ).order_by(
+                WeiboPost.id
+            ).limit(page_size).all()
+            
+            if not rows:
+                return
+            
+            yield rows
+            last_id = rows[-1].id
+    
+    def _predict_chunk(self, texts):
+        """对一块文本提取特征并做一次向量化推理
+        
+        Args:
+            texts: 文本列表
+        
+        Returns:
+            list: 与texts等长的预测结果列表
+        """
+        return self._predict_features(self.featurizer.transform(texts))
+    
+    def _predict_features(self, features):
+        """对特征矩阵做一次推理，每块只调用一次predict_proba
+        
+        Args:
+            features: shape为(n_samples, n_features)的float32矩阵
+        
+        Returns:
+            list: 预测结果列表
+        """
+        if hasattr(self.model, 'predict_proba'):
+            return self._results_from_proba(self.model.predict_proba(features))
+        
+        return [
+            {
+                'label': self.label_map.get(int(prediction), '中性'),
+                'score': 1.0,
+                'intensity': 1.0
+            }
+            for prediction in self.model.predict(features)
+        ]
+    
+    def _results_from_proba(self, probabilities):
+        """将predict_proba输出的概率矩阵转换为结果列表（argmax作为标签）
+        
+        Args:
+            probabilities: shape为(n_samples, n_classes)的概率矩阵
+        
+        Returns:
+            list: [{'label': str, 'score': float, 'intensity': float}, ...]
+        """
+        import numpy as np
+        
+        probabilities = np.asarray(probabilities)
+        indices = probabilities.argmax(axis=1)
+        classes = getattr(self.model, 'classes_', None)
+        predictions = classes[indices] if classes is not None else indices
+        scores = probabilities[np.arange(len(indices)), indices]
+        
+        return [
+            {
+                'label': self.label_map.get(int(prediction), '中性'),
+                'score': float(score),
+                'intensity': float(score)
+            }
+            for prediction, score in zip(predictions, scores)
+        ]
+    
+    def get_feature_cache_stats(self):
+        """获取特征缓存的命中统计"""
+        if self.featurizer is None:
+            return {}
+        return self.featurizer.stats()
+    
     def batch_predict(self, texts):
         """批量预测文本情感
         
@@ -179,34 +256,8 @@ class SentimentAnalysisService:
                 return []
         
         try:
-            results = []
-            
             # 批量预测
-            predictions = self.model.predict(texts)
-            
-            # 获取概率（如果支持）
-            if hasattr(self.model, 'predict_proba'):
-                probabilities = self.model.predict_proba(texts)
-            else:
-                probabilities = None
-            
-            for i, prediction in enumerate(predictions):
-                label = self.label_map.get(prediction, '中性')
-                
-                if probabilities is not None:
-                    score = float(probabilities[i][prediction])
-                    intensity = float(np.max(probabilities[i]))
-                else:
-                    score = 1.0
-                    intensity = 1.0
-                
-                results.append({
-                    'label': label,
-                    'score': score,
-                    'intensity': intensity
-                })
-            
-            return results
+            return self._predict_chunk(texts)
             
         except Exception as e:
             print(f"[SentimentService] Error in batch prediction: {e}")
@@ -222,28 +273,16 @@ class SentimentAnalysisService:
             dict: 情感分布统计
         """
         try:
-            # 获取该话题下所有情感分析结果
-            results = db.session.query(
-                SentimentResult.sentiment_label,
-                db.func.count(SentimentResult.id).label('count')
-            ).join(
-                WeiboPost, SentimentResult.weibo_id == WeiboPost.id
-            ).filter(
-                WeiboPost.topic_id == topic_id
-            ).group_by(
-                SentimentResult.sentiment_label
-            ).all()
+            # 读取话题情感汇总（按主键取一行）
+            stat = get_topic_sentiment_stat(topic_id)
             
             distribution = {
-                '正面': 0,
-                '负面': 0,
-                '中性': 0
+                '正面': stat.positive_count if stat else 0,
+                '负面': stat.negative_count if stat else 0,
+                '中性': stat.neutral_count if stat else 0
             }
             
-            total = 0
-            for label, count in results:
-                distribution[label] = count
-                total += count
+            total = sum(distribution.values())
             
             # 计算百分比
             percentages = {}
@@ -253,10 +292,19 @@ class SentimentAnalysisService:
             else:
                 percentages = {'正面': 0, '负面': 0, '中性': 0}
             
+            # 各标签的平均情感强度
+            avg_intensity = {}
+            for label, key in TopicSentimentStat.LABEL_KEYS.items():
+                count = distribution[label]
+                intensity_sum = getattr(stat, f'{key}_intensity_sum') if stat else 0
+                avg_intensity[label] = round(intensity_sum / count, 4) if count else 0
+            
             return {
                 'distribution': distribution,
                 'percentages': percentages,
-                'total': total
+                'avg_intensity': avg_intensity,
+                'total': total,
+                'updated_at': stat.updated_at.isoformat() if stat and stat.updated_at else None
             }
             
         except Exception as e:
@@ -264,5 +312,7 @@ class SentimentAnalysisService:
             return {
                 'distribution': {'正面': 0, '负面': 0, '中性': 0},
                 'percentages': {'正面': 0, '负面': 0, '中性': 0},
-                'total': 0
+                'avg_intensity': {'正面': 0, '负面': 0, '中性': 0},
+                'total': 0,
+                'updated_at': None
             }
@@ -0,0 +1,167 @@
+"""
+话题情感汇总 - 每个话题一行，记录各情感标签的条数和强度之和
+
+情感结果写入器每次flush时，在同一个事务里把新增结果计入、把被覆盖结果的
+旧标签/强度扣除；删除结果（微博或话题被删除）时由ORM事件扣除。
+看板读取情感分布只需按主键取一行，不再对 sentiment_results JOIN weibo_posts 做GROUP BY。
+升级时由迁移0007从已有结果重建一次；批量删除等绕过ORM的操作可能造成偏差，用 rebuild_sentiment_stats.py 重建。
+"""
+from datetime import datetime
+from typing import Dict, Optional
+
+from sqlalchemy import bindparam, event, func, select
+
+from app import db
+from app.models import SentimentResult, TopicSentimentStat, WeiboPost
+from app.services.rollups import Rollup, RollupDelta
+
+
+LABEL_KEYS = ('positive', 'negative', 'neutral')
+FIELDS = tuple(f'{key}_count' for key in LABEL_KEYS) + tuple(f'{key}_intensity_sum' for key in LABEL_KEYS)
+
+_stats_table = TopicSentimentStat.__table__
+_posts_table = WeiboPost.__table__
+_results_table = SentimentResult.__table__
+
+
+def label_key(label: Optional[str]) -> Optional[str]:
+    """把情感标签（正面/负面/中性 或英文标签）映射为汇总表的列前缀，无法识别时返回None"""
+    if not label:
+        return None
+    if label in TopicSentimentStat.LABEL_KEYS:
+        return TopicSentimentStat.LABEL_KEYS[label]
+    label_lower = label.lower()
+    if '正' in label or 'positive' in label_lower:
+        return 'positive'
+    if '负' in label or 'negative' in label_lower:
+        return 'negative'
+    if '中' in label or 'neutral' in label_lower:
+        return 'neutral'
+    return None
+
+
+class SentimentStatsDelta(RollupDelta):
+    """待写入的汇总增量 {(topic_id,): {'positive_count': 条数, 'positive_intensity_sum': 强度和, ...}}"""
+
+    def __init__(self):
+        super().__init__(FIELDS)
+
+    def add(self, topic_id: int, label: str, intensity: Optional[float], sign: int = 1) -> None:
+        """计入（sign=-1时扣除）一条情感结果；微博不存在（topic_id为None）或标签无法识别时忽略"""
+        key = label_key(label)
+        if key is None or topic_id is None:
+            return
+        super().add((topic_id,), f'{key}_count', sign)
+        super().add((topic_id,), f'{key}_intensity_sum', sign * float(intensity or 0.0))
+
+
+ROLLUP = Rollup(_stats_table, ('topic_id',), FIELDS, touch_column='updated_at')
+
+
+def apply_delta(delta: SentimentStatsDelta) -> None:
+    """在当前会话的事务中写入增量（不提交，由调用方与情感结果一起提交）"""
+    ROLLUP.apply(db.session.connection(), delta)
+
+
+def get_topic_sentiment_stat(topic_id: int) -> Optional[TopicSentimentStat]:
+    """按主键读取话题的情感汇总"""
+    return db.session.get(TopicSentimentStat, topic_id)
+
+
+def recount(connection, topic_id: Optional[int] = None) -> Dict:
+    """
+    在connection上根据sentiment_results重建汇总（一次GROUP BY，不提交）
+
+    Args:
+        connection: 数据库连接（迁移的连接或会话的连接）
+        topic_id: 只重建该话题，默认重建全部话题
+
+    Returns:
+        {'topics': 重建的话题数, 'results': 计入的结果数, 'drifted': 重建前计数不一致的话题ID列表}
+    """
+    query = select(
+        _posts_table.c.topic_id,
+        _results_table.c.sentiment_label,
+        func.count(_results_table.c.id),
+        func.sum(_results_table.c.sentiment_intensity)
+    ).select_from(
+        _results_table.join(_posts_table, _results_table.c.weibo_id == _posts_table.c.id)
+    ).group_by(_posts_table.c.topic_id, _results_table.c.sentiment_label)
+    if topic_id is not None:
+        query = query.where(_posts_table.c.topic_id == topic_id)
+
+    delta = SentimentStatsDelta()
+    results = 0
+    for row_topic_id, label, count, intensity_sum in connection.execute(query):
+        key = label_key(label)
+        if key is None:
+            continue
+        delta.add(row_topic_id, label, 0.0, sign=count)
+        delta.rows[(row_topic_id,)][f'{key}_intensity_sum'] += float(intensity_sum or 0.0)
+        results += count
+
+    counts = tuple(f'{key}_count' for key in LABEL_KEYS)
+    before = {
+        key: tuple(int(values[name] or 0) for name in counts)
+        for key, values in ROLLUP.current(connection, topic_id).items()
+    }
+    expected = {key: tuple(int(values[name]) for name in counts) for key, values in delta.rows.items()}
+    drifted = sorted(
+        key[0] for key in set(before) | set(expected)
+        if before.get(key, (0, 0, 0)) != expected.get(key, (0, 0, 0))
+    )
+
+    ROLLUP.rebuild(connection, delta, topic_id)
+    return {'topics': len(delta.rows), 'results': results, 'drifted': drifted}
+
+
+def rebuild_sentiment_stats(topic_id: Optional[int] = None) -> Dict:
+    """
+    根据sentiment_results重建汇总并提交（见recount）
+
+    Args:
+        topic_id: 只重建该话题，默认重建全部话题
+    """
+    try:
+        result = recount(db.session.connection(), topic_id)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    print(f"[SentimentStats] 重建情感汇总: {result['topics']} 个话题, {result['results']} 条结果, "
+          f"{len(result['drifted'])} 个话题计数有偏差")
+    return result
+
+
+# ====== 删除结果时扣除 ======
+
+
+def _decrement_statement(key: str):
+    return _stats_table.update().where(
+        _stats_table.c.topic_id == select(_posts_table.c.topic_id).where(
+            _posts_table.c.id == bindparam('post_id')
+        ).scalar_subquery()
+    ).values({
+        f'{key}_count': _stats_table.c[f'{key}_count'] - 1,
+        f'{key}_intensity_sum': _stats_table.c[f'{key}_intensity_sum'] - bindparam('intensity'),
+        'updated_at': bindparam('now')
+    })
+
+
+_decrement = {key: _decrement_statement(key) for key in LABEL_KEYS}
+
+
+def _on_result_deleted(mapper, connection, target):
+    """情感结果被删除（微博或话题被删除）时，在同一连接上扣除其计数（微博行此时尚未删除）"""
+    key = label_key(target.sentiment_label)
+    if key is None:
+        return
+    connection.execute(_decrement[key], {
+        'post_id': target.weibo_id,
+        'intensity': float(target.sentiment_intensity or 0.0),
+        'now': datetime.utcnow()
+    })
+
+
+event.listen(SentimentResult, 'after_delete', _on_result_deleted)
@@ -0,0 +1,176 @@
+"""
+情感分析结果批量写入器
+按批缓冲 (weibo_id, label, score, intensity)，每次flush在一个事务中用
+bulk_insert_mappings / bulk_update_mappings 写入，已存在的结果按weibo_id覆盖（幂等upsert），
+中断后重跑不会产生重复行。话题情感汇总（topic_sentiment_stats）、小时汇总（topic_hourly_stats）
+和地域汇总（topic_region_stats）的增量在同一事务中写入
+"""
+from datetime import datetime
+from typing import Dict, Iterable, Tuple
+
+from app import db
+from app.models import SentimentResult, WeiboPost
+from app.services import hourly_stats, region_stats
+from app.services.sentiment_stats import SentimentStatsDelta, apply_delta
+from app.utils.batching import chunked
+
+
+DEFAULT_FLUSH_SIZE = 5000
+
+
+class SentimentResultWriter:
+    """情感分析结果批量写入器"""
+
+    def __init__(self, flush_size: int = DEFAULT_FLUSH_SIZE, upsert: bool = True):
+        """
+        Args:
+            flush_size: 缓冲多少条后自动写入并提交
+            upsert: True时覆盖已存在的结果，False时跳过已存在的结果
+        """
+        self.flush_size = max(1, int(flush_size))
+        self.upsert = upsert
+        self._buffer: Dict[int, Dict] = {}
+        self.inserted = 0
+        self.updated = 0
+        self.skipped = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.flush()
+        else:
+            self._buffer.clear()
+
+    def add(self, weibo_ids: Iterable[int], labels: Iterable[str],
+            scores: Iterable[float], intensities: Iterable[float]) -> int:
+        """
+        追加一批结果，缓冲满flush_size时自动写入
+
+        Args:
+            weibo_ids: weibo_posts.id 列表
+            labels: 情感标签列表
+            scores: 情感分数列表
+            intensities: 情感强度列表
+
+        Returns:
+            本次追加的条数
+        """
+        analyzed_at = datetime.utcnow()
+        count = 0
+        for weibo_id, label, score, intensity in zip(weibo_ids, labels, scores, intensities):
+            # 同一批内重复的weibo_id以最后一次为准
+            self._buffer[int(weibo_id)] = {
+                'weibo_id': int(weibo_id),
+                'sentiment_label': label,
+                'sentiment_score': float(score),
+                'sentiment_intensity': float(intensity),
+                'analyzed_at': analyzed_at
+            }
+            count += 1
+
+        if len(self._buffer) >= self.flush_size:
+            self.flush()
+        return count
+
+    def add_results(self, weibo_ids: Iterable[int], results: Iterable[Dict]) -> int:
+        """追加SentimentAnalysisService返回的结果字典列表"""
+        results = list(results)
+        return self.add(
+            weibo_ids,
+            [r['label'] for r in results],
+            [r['score'] for r in results],
+            [r['intensity'] for r in results]
+        )
+
+    def flush(self) -> int:
+        """
+        在一个事务中写入缓冲区并提交
+
+        Returns:
+            写入（新增+更新）的条数
+        """
+        if not self._buffer:
+            return 0
+
+        rows = self._buffer
+        self._buffer = {}
+
+        try:
+            existing = self._existing_results(list(rows.keys()))
+            posts = self._post_info(list(rows.keys()))
+            delta = SentimentStatsDelta()
+            hourly = hourly_stats.HourlyStatsDelta()
+            regions = region_stats.RegionStatsDelta()
+
+            inserts = []
+            for weibo_id, row in rows.items():
+                if weibo_id not in existing:
+                    inserts.append(row)
+                    topic_id, publish_time, region = posts.get(weibo_id, (None, None, None))
+                    delta.add(topic_id, row['sentiment_label'], row['sentiment_intensity'])
+                    hourly.add_sentiment(topic_id, publish_time, row['sentiment_label'])
+                    regions.add_sentiment(topic_id, region, row['sentiment_label'])
+            updates = []
+            if self.upsert:
+                for weibo_id, (result_id, old_label, old_intensity) in existing.items():
+                    update = dict(rows[weibo_id])
+                    update['id'] = result_id
+                    updates.append(update)
+                    topic_id, publish_time, region = posts.get(weibo_id, (None, None, None))
+                    delta.add(topic_id, old_label, old_intensity, sign=-1)
+                    delta.add(topic_id, update['sentiment_label'], update['sentiment_intensity'])
+                    hourly.add_sentiment(topic_id, publish_time, old_label, sign=-1)
+                    hourly.add_sentiment(topic_id, publish_time, update['sentiment_label'])
+                    regions.add_sentiment(topic_id, region, old_label, sign=-1)
+                    regions.add_sentiment(topic_id, region, update['sentiment_label'])
+            else:
+                self.skipped += len(existing)
+
+            if inserts:
+                db.session.bulk_insert_mappings(SentimentResult, inserts)
+            if updates:
+                db.session.bulk_update_mappings(SentimentResult, updates)
+            apply_delta(delta)
+            hourly_stats.apply_delta(hourly)
+            region_stats.apply_delta(regions)
+            db.session.commit()
+
+        except Exception:
+            db.session.rollback()
+            raise
+
+        self.inserted += len(inserts)
+        self.updated += len(updates)
+        return len(inserts) + len(updates)
+
+    def _existing_results(self, weibo_ids) -> Dict[int, Tuple[int, str, float]]:
+        """查询已有结果 {weibo_id: (sentiment_results.id, 旧标签, 旧强度)}"""
+        existing = {}
+        for chunk in chunked(weibo_ids):
+            for result_id, weibo_id, label, intensity in db.session.query(
+                SentimentResult.id, SentimentResult.weibo_id,
+                SentimentResult.sentiment_label, SentimentResult.sentiment_intensity
+            ).filter(SentimentResult.weibo_id.in_(chunk)):
+                existing[weibo_id] = (result_id, label, intensity)
+        return existing
+
+    def _post_info(self, weibo_ids) -> Dict[int, Tuple[int, datetime, str]]:
+        """查询微博所属话题、发布时间和地域 {weibo_posts.id: (topic_id, publish_time, region_code)}"""
+        posts = {}
+        for chunk in chunked(weibo_ids):
+            for post_id, topic_id, publish_time, code, location in db.session.query(
+                WeiboPost.id, WeiboPost.topic_id, WeiboPost.publish_time,
+                WeiboPost.region_code, WeiboPost.location
+            ).filter(WeiboPost.id.in_(chunk)):
+                posts[post_id] = (topic_id, publish_time, region_stats.post_region(code, location))
+        return posts
+
+    def stats(self) -> Dict:
+        return {
+            'inserted': self.inserted,
+            'updated': self.updated,
+            'skipped': self.skipped,
+            'pending': len(self._buffer)
+        }
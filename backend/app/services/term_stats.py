@@ -0,0 +1,235 @@
+"""
+增量词频统计 - 按话题（以及全部话题，topic_id=0）持久化文档频率和词频
+
+分词缓存每写入/覆盖一条微博的分词结果，就在同一个事务里把该微博的贡献
+从旧话题减去、加到新话题；删除微博时由ORM事件扣除。关键词排名直接读取
+这些计数器计算，不再每次对整个话题语料重新拟合TF-IDF。
+
+TF-IDF打分: weight = (tf / 话题分词总数) * idf
+            idf = ln((1 + N) / (1 + df)) + 1   （平滑IDF，与sklearn默认公式一致）
+"""
+import heapq
+import math
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Mapping, Tuple
+
+from sqlalchemy import and_, bindparam, event
+
+from app import db
+from app.config import get_setting
+from app.models import CorpusStat, PostSegment, TermStat, Vocabulary
+from app.utils.batching import chunked
+from app.utils.token_ids import decode_token_ids
+
+
+GLOBAL_TOPIC_ID = 0
+
+
+class TermStatsDelta:
+    """待写入的计数器增量"""
+
+    def __init__(self):
+        self.terms: Dict[int, Dict[int, List[int]]] = defaultdict(lambda: defaultdict(lambda: [0, 0]))
+        self.corpus: Dict[int, List[int]] = defaultdict(lambda: [0, 0])
+
+    def add(self, topic_id: int, token_ids: Iterable[int], sign: int = 1) -> None:
+        """把一条微博的分词结果计入（sign=-1时扣除）话题和全局统计"""
+        counts = Counter(token_ids)
+        for scope in (topic_id, GLOBAL_TOPIC_ID):
+            terms = self.terms[scope]
+            for word_id, count in counts.items():
+                entry = terms[word_id]
+                entry[0] += sign
+                entry[1] += sign * count
+            corpus = self.corpus[scope]
+            corpus[0] += sign
+            corpus[1] += sign * sum(counts.values())
+
+    def __bool__(self):
+        return bool(self.corpus)
+
+
+def apply_delta(delta: TermStatsDelta) -> None:
+    """在当前会话中写入增量（不提交，由调用方与分词缓存一起提交）"""
+    for topic_id, terms in delta.terms.items():
+        terms = {word_id: entry for word_id, entry in terms.items() if entry != [0, 0]}
+        existing = {}
+        for chunk in chunked(list(terms)):
+            for word_id, doc_freq, term_freq in db.session.query(
+                TermStat.word_id, TermStat.doc_freq, TermStat.term_freq
+            ).filter(TermStat.topic_id == topic_id, TermStat.word_id.in_(chunk)):
+                existing[word_id] = (doc_freq, term_freq)
+
+        inserts, updates = [], []
+        for word_id, (doc_delta, term_delta) in terms.items():
+            if word_id in existing:
+                doc_freq, term_freq = existing[word_id]
+                updates.append({
+                    'topic_id': topic_id,
+                    'word_id': word_id,
+                    'doc_freq': doc_freq + doc_delta,
+                    'term_freq': term_freq + term_delta
+                })
+            else:
+                inserts.append({
+                    'topic_id': topic_id,
+                    'word_id': word_id,
+                    'doc_freq': doc_delta,
+                    'term_freq': term_delta
+                })
+        if inserts:
+            db.session.bulk_insert_mappings(TermStat, inserts)
+        if updates:
+            db.session.bulk_update_mappings(TermStat, updates)
+
+    for topic_id, (doc_delta, token_delta) in delta.corpus.items():
+        corpus = db.session.get(CorpusStat, topic_id)
+        if corpus is None:
+            corpus = CorpusStat(topic_id=topic_id, doc_count=0, token_count=0)
+            db.session.add(corpus)
+        corpus.doc_count = (corpus.doc_count or 0) + doc_delta
+        corpus.token_count = (corpus.token_count or 0) + token_delta
+
+
+def ensure_term_stats() -> bool:
+    """统计表为空而分词缓存已有数据时（首次升级），从分词缓存重建一次"""
+    if db.session.get(CorpusStat, GLOBAL_TOPIC_ID) is not None:
+        return False
+    if db.session.query(PostSegment.post_id).first() is None:
+        return False
+    rebuild_term_stats()
+    return True
+
+
+def rebuild_term_stats() -> Dict:
+    """清空并根据post_segments重建全部计数器"""
+    try:
+        db.session.query(TermStat).delete()
+        db.session.query(CorpusStat).delete()
+
+        delta = TermStatsDelta()
+        for topic_id, blob in db.session.query(
+            PostSegment.topic_id, PostSegment.token_ids
+        ).yield_per(1000):
+            delta.add(topic_id, decode_token_ids(blob))
+
+        apply_delta(delta)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    global_stat = delta.corpus.get(GLOBAL_TOPIC_ID, [0, 0])
+    print(f"[TermStats] 重建词频统计: {global_stat[0]} 条微博, {len(delta.terms) - 1} 个话题")
+    return {'documents': global_stat[0], 'topics': max(0, len(delta.corpus) - 1)}
+
+
+def get_corpus_stat(topic_id: int) -> Tuple[int, int]:
+    """返回话题的 (微博数, 分词总数)"""
+    corpus = db.session.get(CorpusStat, topic_id)
+    if corpus is None:
+        return 0, 0
+    return corpus.doc_count or 0, corpus.token_count or 0
+
+
+def score_keywords(term_freq: Mapping[str, int], doc_freq: Mapping[str, int],
+                   doc_count: int, token_count: int, method: str = 'tf',
+                   top_n: int = 50) -> List[Dict]:
+    """
+    根据计数器为词打分并取Top N
+
+    Args:
+        term_freq: {词: 出现次数}
+        doc_freq: {词: 包含该词的文档数}，method='tf'时不使用
+        doc_count: IDF使用的文档总数
+        token_count: 分词总数（权重归一化）
+        method: 'tf' 或 'tfidf'
+
+    Returns:
+        [{'keyword': str, 'frequency': int, 'weight': float}, ...]
+    """
+    if method not in ('tf', 'tfidf'):
+        raise ValueError(f'不支持的提取方法: {method}')
+    if not term_freq or token_count <= 0:
+        return []
+
+    if method == 'tf':
+        scored = ((freq / token_count, word, freq) for word, freq in term_freq.items() if freq > 0)
+    else:
+        scored = (
+            (freq / token_count * (math.log((1 + doc_count) / (1 + doc_freq.get(word, 0))) + 1), word, freq)
+            for word, freq in term_freq.items() if freq > 0
+        )
+
+    # 同分时按词排序，保证结果稳定
+    top = heapq.nsmallest(top_n, scored, key=lambda item: (-item[0], item[1]))
+    return [{'keyword': word, 'frequency': freq, 'weight': weight} for weight, word, freq in top]
+
+
+def rank_topic_keywords(topic_id: int, method: str = 'tf', top_n: int = 50) -> List[Dict]:
+    """
+    从持久化计数器计算话题关键词，耗时只与话题的词表大小有关
+
+    IDF的文档频率默认取话题内统计（与原先对单个话题拟合TF-IDF一致），
+    配置KEYWORD_IDF_SCOPE='global'时取全部话题的统计，突出话题特有的词
+    """
+    doc_count, token_count = get_corpus_stat(topic_id)
+    if doc_count <= 0:
+        return []
+
+    term_freq, doc_freq = {}, {}
+    for word, df, tf in db.session.query(
+        Vocabulary.word, TermStat.doc_freq, TermStat.term_freq
+    ).join(Vocabulary, Vocabulary.id == TermStat.word_id).filter(
+        TermStat.topic_id == topic_id, TermStat.term_freq > 0
+    ):
+        term_freq[word] = tf
+        doc_freq[word] = df
+
+    if method == 'tfidf' and get_setting('KEYWORD_IDF_SCOPE', 'topic') == 'global':
+        doc_count, _ = get_corpus_stat(GLOBAL_TOPIC_ID)
+        doc_freq = {}
+        words = list(term_freq)
+        for chunk in chunked(words):
+            for word, df in db.session.query(Vocabulary.word, TermStat.doc_freq).join(
+                Vocabulary, Vocabulary.id == TermStat.word_id
+            ).filter(TermStat.topic_id == GLOBAL_TOPIC_ID, Vocabulary.word.in_(chunk)):
+                doc_freq[word] = df
+
+    return score_keywords(term_freq, doc_freq, doc_count, token_count, method, top_n)
+
+
+# ====== 删除微博时扣除计数 ======
+
+_term_table = TermStat.__table__
+_corpus_table = CorpusStat.__table__
+
+_decrement_terms = _term_table.update().where(and_(
+    _term_table.c.topic_id == bindparam('scope'),
+    _term_table.c.word_id == bindparam('word')
+)).values(
+    doc_freq=_term_table.c.doc_freq - bindparam('doc_delta'),
+    term_freq=_term_table.c.term_freq - bindparam('term_delta')
+)
+
+_decrement_corpus = _corpus_table.update().where(
+    _corpus_table.c.topic_id == bindparam('scope')
+).values(
+    doc_count=_corpus_table.c.doc_count - 1,
+    token_count=_corpus_table.c.token_count - bindparam('token_delta')
+)
+
+
+def _on_segment_deleted(mapper, connection, target):
+    """分词缓存行被删除（微博或话题被删除）时，在同一连接上扣除其计数"""
+    counts = Counter(decode_token_ids(target.token_ids))
+    for scope in (target.topic_id, GLOBAL_TOPIC_ID):
+        if counts:
+            connection.execute(_decrement_terms, [
+                {'scope': scope, 'word': word_id, 'doc_delta': 1, 'term_delta': count}
+                for word_id, count in counts.items()
+            ])
+        connection.execute(_decrement_corpus, {'scope': scope, 'token_delta': sum(counts.values())})
+
+
+event.listen(PostSegment, 'after_delete', _on_segment_deleted)
@@ -0,0 +1,132 @@
+"""
+话题变更跟踪 - 写入微博时记录每个话题的最大微博id，关键词/情感分析阶段记录已处理到的微博id
+
+Pipeline据此只处理上次处理之后有新微博的话题（"脏"话题），其余话题整体跳过。
+通过ORM写入的微博（session.add，任何同步入口）由after_insert事件推进last_post_id，
+bulk_insert_mappings批量写入（不触发ORM事件）后调用record_synced_posts。
+没有状态记录的话题（首次运行）按脏话题处理，处理时以该话题当前的最大微博id初始化状态。
+"""
+from datetime import datetime
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy import bindparam, event, or_
+
+from app import db
+from app.models import Topic, TopicProcessingState, WeiboPost
+from app.utils.batching import chunked
+
+
+def record_synced_posts(weibo_ids: Iterable[str]) -> Dict[int, int]:
+    """
+    用bulk_insert_mappings批量写入一批微博后调用，推进相关话题的 last_post_id（不提交，与该批数据在同一事务中提交）
+
+    ORM逐条写入（session.add）的微博由after_insert事件推进，不需要再调用本函数。
+
+    Args:
+        weibo_ids: 本批新写入的weibo_id
+
+    Returns:
+        {话题ID: 本批写入的最大微博id}
+    """
+    latest: Dict[int, int] = {}
+    for chunk in chunked(list(weibo_ids)):
+        for topic_id, max_id in db.session.query(
+            WeiboPost.topic_id, db.func.max(WeiboPost.id)
+        ).filter(WeiboPost.weibo_id.in_(chunk)).group_by(WeiboPost.topic_id):
+            latest[topic_id] = max(latest.get(topic_id, 0), max_id)
+
+    if not latest:
+        return latest
+
+    states = {
+        state.topic_id: state
+        for state in TopicProcessingState.query.filter(TopicProcessingState.topic_id.in_(list(latest)))
+    }
+    now = datetime.utcnow()
+    for topic_id, max_id in latest.items():
+        state = states.get(topic_id)
+        if state is None:
+            state = TopicProcessingState(topic_id=topic_id, last_post_id=0,
+                                         keywords_post_id=0, sentiment_post_id=0)
+            db.session.add(state)
+        state.last_post_id = max(state.last_post_id or 0, max_id)
+        state.last_synced_at = now
+    return latest
+
+
+def get_state(topic_id: int) -> TopicProcessingState:
+    """获取话题状态；没有记录时以话题当前的最大微博id创建（不提交，话题不存在时不写入）"""
+    state = db.session.get(TopicProcessingState, topic_id)
+    if state is None:
+        if db.session.get(Topic, topic_id) is None:
+            return TopicProcessingState(topic_id=topic_id, last_post_id=0,
+                                        keywords_post_id=0, sentiment_post_id=0)
+        max_id = db.session.query(db.func.max(WeiboPost.id)).filter(
+            WeiboPost.topic_id == topic_id
+        ).scalar() or 0
+        state = TopicProcessingState(topic_id=topic_id, last_post_id=max_id,
+                                     keywords_post_id=0, sentiment_post_id=0)
+        db.session.add(state)
+        db.session.flush()
+    return state
+
+
+def begin_processing(topic_id: int) -> int:
+    """开始处理话题时调用，返回本次处理覆盖到的微博id（处理期间新同步的微博留给下次）"""
+    return get_state(topic_id).last_post_id or 0
+
+
+def mark_processed(topic_id: int, stage: str, watermark: int) -> None:
+    """记录话题的某个阶段已处理到watermark并提交"""
+    if stage not in TopicProcessingState.STAGES:
+        raise ValueError(f"未知的处理阶段: {stage}")
+    state = get_state(topic_id)
+    setattr(state, f'{stage}_post_id', max(getattr(state, f'{stage}_post_id') or 0, watermark))
+    setattr(state, f'{stage}_processed_at', datetime.utcnow())
+    db.session.commit()
+
+
+def split_changed_topics(topics: List, stage: str) -> Tuple[List, List]:
+    """
+    按阶段把话题分为有新微博的和未变化的
+
+    Args:
+        topics: Topic列表
+        stage: 'keywords' 或 'sentiment'
+
+    Returns:
+        (需要处理的话题, 跳过的话题)，保持输入顺序
+    """
+    states = {}
+    for chunk in chunked([topic.id for topic in topics]):
+        states.update(
+            (state.topic_id, state)
+            for state in TopicProcessingState.query.filter(TopicProcessingState.topic_id.in_(chunk))
+        )
+
+    changed, unchanged = [], []
+    for topic in topics:
+        state = states.get(topic.id)
+        if state is None or state.is_dirty(stage):
+            changed.append(topic)
+        else:
+            unchanged.append(topic)
+    return changed, unchanged
+
+
+# ====== ORM写入微博时推进 ======
+
+_states_table = TopicProcessingState.__table__
+
+_advance = _states_table.update().where(
+    _states_table.c.topic_id == bindparam('scope'),
+    or_(_states_table.c.last_post_id.is_(None), _states_table.c.last_post_id < bindparam('post_id'))
+).values(last_post_id=bindparam('post_id'), last_synced_at=bindparam('now'))
+
+
+def _on_post_inserted(mapper, connection, target):
+    """通过ORM写入微博时，在同一连接上推进话题的last_post_id（没有状态记录的话题本来就按脏话题处理）"""
+    connection.execute(_advance, {'scope': target.topic_id, 'post_id': target.id, 'now': datetime.utcnow()})
+
+
+event.listen(WeiboPost, 'after_insert', _on_post_inserted)
@@ -0,0 +1,12 @@
+"""批处理辅助函数"""
+from typing import Iterator, Sequence
+
+
+# SQLite单条语句的绑定参数上限较低，IN (...) 查询按此大小分段
+IN_CLAUSE_CHUNK = 500
+
+
+def chunked(items: Sequence, size: int = IN_CLAUSE_CHUNK) -> Iterator[Sequence]:
+    """将序列按固定大小切片"""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
@@ -0,0 +1,247 @@
+"""
+持久化特征缓存 - 以规范化文本的哈希为键，将特征向量保存在内存映射的float32矩阵中
+
+磁盘布局（每个特征后端一个目录）:
+    features.f32  shape为(capacity, dim)的float32内存映射矩阵
+    keys.bin      shape为(capacity, 20)的uint8内存映射矩阵，每行特征对应键的SHA-1摘要，全0为空行
+    meta.json     {'dim': 维度, 'capacity': 行数}，只在创建缓存时写入
+    .lock         跨进程锁文件
+
+键到行号的映射不单独落盘，打开缓存时扫描keys.bin重建，写入新特征只改动所在行，
+落盘代价与缓存容量无关。容量由max_mb决定，写满后淘汰本进程最久未使用的条目并复用其所在行
+（重新打开后的使用顺序按行号近似）。
+同一目录可由多个进程（服务、Pipeline任务、命令行脚本）同时读写: 分配行时持有目录锁，
+行的所有权以keys.bin为准，读取时校验摘要，被其他进程复用的行按未命中处理，不会返回别的文本的特征。
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def normalize_text(text: str) -> str:
+    """规范化文本：全角转半角、去首尾空白、合并空白、英文小写"""
+    if not text:
+        return ''
+    text = unicodedata.normalize('NFKC', text)
+    return _WHITESPACE_RE.sub(' ', text).strip().lower()
+
+
+def text_key(text: str) -> str:
+    """规范化文本的SHA-1哈希，作为缓存键"""
+    return hashlib.sha1(normalize_text(text).encode('utf-8')).hexdigest()
+
+
+class MemoryFeatureCache:
+    """进程内LRU特征缓存"""
+
+    def __init__(self, dim: int, max_entries: int = 50000):
+        self.dim = dim
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self.evictions = 0
+
+    def get(self, key: str):
+        vector = self._entries.get(key)
+        if vector is not None:
+            self._entries.move_to_end(key)
+        return vector
+
+    def put(self, key: str, vector: np.ndarray):
+        self._entries[key] = np.asarray(vector, dtype=np.float32)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def flush(self):
+        pass
+
+    def stats(self) -> dict:
+        return {
+            'storage': 'memory',
+            'entries': len(self._entries),
+            'capacity': self.max_entries,
+            'evictions': self.evictions
+        }
+
+
+@contextmanager
+def _locked(lock_file):
+    """对缓存目录加跨进程排他锁（POSIX用fcntl.flock，Windows用msvcrt.locking）"""
+    if fcntl is not None:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+    else:
+        lock_file.seek(0)
+        msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _digest(key: str) -> bytes:
+    return hashlib.sha1(key.encode('utf-8')).digest()
+
+
+class FeatureCache:
+    """磁盘持久化的LRU特征缓存（numpy.memmap），可由多个进程共用同一目录"""
+
+    MATRIX_FILE = 'features.f32'
+    KEYS_FILE = 'keys.bin'
+    META_FILE = 'meta.json'
+    LEGACY_INDEX_FILE = 'index.json'  # 旧版本的JSON索引（同样记录了dim和capacity），升级后删除
+    LOCK_FILE = '.lock'
+    DIGEST_SIZE = 20
+
+    def __init__(self, directory: str, dim: int, max_mb: int = 512):
+        self.directory = directory
+        self.dim = dim
+        self.capacity = max(1, int(max_mb * 1024 * 1024 // (dim * 4)))
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._dirty = False
+
+        os.makedirs(directory, exist_ok=True)
+        self._matrix_path = os.path.join(directory, self.MATRIX_FILE)
+        self._keys_path = os.path.join(directory, self.KEYS_FILE)
+        self._meta_path = os.path.join(directory, self.META_FILE)
+        self._legacy_index_path = os.path.join(directory, self.LEGACY_INDEX_FILE)
+        self._lock_file = open(os.path.join(directory, self.LOCK_FILE), 'a+b')
+        self._slots = OrderedDict()  # 键的摘要 -> 行号，末尾为最近使用
+        self._free = []
+        self._victim = 0  # 本进程没有可淘汰的条目时轮转复用的行号
+        with _locked(self._lock_file):
+            self._open()
+
+    def _read_meta(self):
+        meta_path = self._meta_path if os.path.exists(self._meta_path) else self._legacy_index_path
+        if not (os.path.exists(meta_path) and os.path.exists(self._matrix_path)
+                and os.path.exists(self._keys_path)):
+            return None
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[FeatureCache] 元数据损坏，重建缓存: {e}")
+            return None
+
+    def _open(self):
+        """打开已有缓存并从keys.bin重建键到行号的映射；维度或容量不一致时重建（调用方持有目录锁）"""
+        meta = self._read_meta()
+        reusable = (
+            meta is not None
+            and meta.get('dim') == self.dim
+            and meta.get('capacity') == self.capacity
+        )
+
+        mode = 'r+' if reusable else 'w+'
+        self._matrix = np.memmap(self._matrix_path, dtype=np.float32, mode=mode,
+                                 shape=(self.capacity, self.dim))
+        self._keys = np.memmap(self._keys_path, dtype=np.uint8, mode=mode,
+                               shape=(self.capacity, self.DIGEST_SIZE))
+
+        if reusable:
+            used = np.flatnonzero(self._keys.any(axis=1)).tolist()
+            for slot in used:
+                self._slots[self._keys[slot].tobytes()] = slot
+            self._free = sorted(set(range(self.capacity)) - set(used), reverse=True)
+            print(f"[FeatureCache] 载入 {len(self._slots)} 条缓存特征: {self.directory}")
+        else:
+            self._free = list(range(self.capacity - 1, -1, -1))
+            self._keys.flush()
+
+        if not reusable or not os.path.exists(self._meta_path):
+            tmp_path = f'{self._meta_path}.{os.getpid()}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'dim': self.dim, 'capacity': self.capacity}, f)
+            os.replace(tmp_path, self._meta_path)
+        if os.path.exists(self._legacy_index_path):
+            os.remove(self._legacy_index_path)
+
+    def _owns(self, slot: int, digest: bytes) -> bool:
+        """该行当前保存的是否是摘要为digest的键的特征（其他进程可能已复用这一行）"""
+        return 0 <= slot < self.capacity and self._keys[slot].tobytes() == digest
+
+    def get(self, key: str):
+        digest = _digest(key)
+        with self._lock:
+            slot = self._slots.get(digest)
+            if slot is None:
+                return None
+            # 读取前后都校验行的键，读取期间被其他进程改写时按未命中处理
+            if not self._owns(slot, digest):
+                del self._slots[digest]
+                return None
+            vector = np.array(self._matrix[slot])
+            if not self._owns(slot, digest):
+                del self._slots[digest]
+                return None
+            self._slots.move_to_end(digest)
+            return vector
+
+    def put(self, key: str, vector: np.ndarray):
+        digest = _digest(key)
+        with self._lock, _locked(self._lock_file):
+            slot = self._slots.get(digest)
+            if slot is None or not self._owns(slot, digest):
+                slot = self._allocate()
+            # 先清除行的键再写向量，其他进程不会读到写了一半的行
+            self._keys[slot] = 0
+            self._matrix[slot] = vector
+            self._keys[slot] = np.frombuffer(digest, dtype=np.uint8)
+            self._slots[digest] = slot
+            self._slots.move_to_end(digest)
+            self._dirty = True
+
+    def _allocate(self) -> int:
+        """分配一行（调用方持有目录锁）: 优先空行，其次淘汰本进程最久未使用的条目"""
+        while self._free:
+            slot = self._free.pop()
+            if not self._keys[slot].any():  # 其他进程可能已占用
+                return slot
+        self.evictions += 1
+        if self._slots:
+            return self._slots.popitem(last=False)[1]
+        slot = self._victim
+        self._victim = (self._victim + 1) % self.capacity
+        return slot
+
+    def flush(self):
+        """将矩阵和键落盘（只写回被修改过的页，代价与缓存容量无关）"""
+        with self._lock:
+            if not self._dirty:
+                return
+            with _locked(self._lock_file):
+                self._matrix.flush()
+                self._keys.flush()
+            self._dirty = False
+
+    def stats(self) -> dict:
+        return {
+            'storage': 'disk',
+            'directory': self.directory,
+            'entries': len(self._slots),
+            'capacity': self.capacity,
+            'evictions': self.evictions
+        }
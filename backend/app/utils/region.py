@@ -0,0 +1,123 @@
+"""
+地域归一化 - 把微博的 ip_location 原文（"发布于 北京"、"来自广东"、"IP属地：新疆" 等）
+映射为省级行政区代码（GB/T 2260 六位代码），海外和无法识别的分别归入 overseas / unknown
+
+查找表在模块加载时预先构建（全称、简称 -> 代码），原文去掉前缀（以及"中国"）后先整串查表，
+再按简称前缀匹配（"广东深圳"、"北京 朝阳区"）；不同原文数量很少，结果按原文缓存。
+"""
+import re
+from collections import namedtuple
+from functools import lru_cache
+from typing import Dict, Optional
+
+
+Region = namedtuple('Region', ['code', 'name'])
+
+REGION_OVERSEAS = 'overseas'
+REGION_UNKNOWN = 'unknown'
+
+# (代码, 简称, 全称)
+PROVINCES = (
+    ('110000', '北京', '北京市'),
+    ('120000', '天津', '天津市'),
+    ('130000', '河北', '河北省'),
+    ('140000', '山西', '山西省'),
+    ('150000', '内蒙古', '内蒙古自治区'),
+    ('210000', '辽宁', '辽宁省'),
+    ('220000', '吉林', '吉林省'),
+    ('230000', '黑龙江', '黑龙江省'),
+    ('310000', '上海', '上海市'),
+    ('320000', '江苏', '江苏省'),
+    ('330000', '浙江', '浙江省'),
+    ('340000', '安徽', '安徽省'),
+    ('350000', '福建', '福建省'),
+    ('360000', '江西', '江西省'),
+    ('370000', '山东', '山东省'),
+    ('410000', '河南', '河南省'),
+    ('420000', '湖北', '湖北省'),
+    ('430000', '湖南', '湖南省'),
+    ('440000', '广东', '广东省'),
+    ('450000', '广西', '广西壮族自治区'),
+    ('460000', '海南', '海南省'),
+    ('500000', '重庆', '重庆市'),
+    ('510000', '四川', '四川省'),
+    ('520000', '贵州', '贵州省'),
+    ('530000', '云南', '云南省'),
+    ('540000', '西藏', '西藏自治区'),
+    ('610000', '陕西', '陕西省'),
+    ('620000', '甘肃', '甘肃省'),
+    ('630000', '青海', '青海省'),
+    ('640000', '宁夏', '宁夏回族自治区'),
+    ('650000', '新疆', '新疆维吾尔自治区'),
+    ('710000', '台湾', '台湾省'),
+    ('810000', '香港', '香港特别行政区'),
+    ('820000', '澳门', '澳门特别行政区'),
+)
+
+# 常见的海外IP属地（不在表中的其他外国地名归入unknown）
+OVERSEAS_NAMES = (
+    '海外', '美国', '日本', '韩国', '英国', '法国', '德国', '意大利', '西班牙', '俄罗斯',
+    '加拿大', '澳大利亚', '新西兰', '新加坡', '马来西亚', '泰国', '越南', '菲律宾', '印度尼西亚',
+    '印度', '荷兰', '瑞士', '瑞典', '爱尔兰', '阿联酋', '巴西', '墨西哥', '阿根廷', '南非', '埃及',
+)
+
+UNKNOWN_NAMES = ('其他', '未知', '中国')
+
+_PREFIX_RE = re.compile(r'^(?:IP属地|IP|ip属地|发布于|来自)[\s:：]*')
+
+REGION_NAMES: Dict[str, str] = {code: short for code, short, _ in PROVINCES}
+REGION_NAMES[REGION_OVERSEAS] = '海外'
+REGION_NAMES[REGION_UNKNOWN] = '未知'
+
+_LOOKUP: Dict[str, str] = {}
+for _code, _short, _full in PROVINCES:
+    _LOOKUP[_short] = _code
+    _LOOKUP[_full] = _code
+for _name in OVERSEAS_NAMES:
+    _LOOKUP[_name] = REGION_OVERSEAS
+for _name in UNKNOWN_NAMES:
+    _LOOKUP[_name] = REGION_UNKNOWN
+
+# 前缀匹配按长度降序，保证"内蒙古"先于其他两字简称
+_PREFIXES = sorted(
+    [(short, code) for code, short, _ in PROVINCES] + [(name, REGION_OVERSEAS) for name in OVERSEAS_NAMES],
+    key=lambda item: -len(item[0])
+)
+
+
+@lru_cache(maxsize=4096)
+def normalize_region(location: Optional[str]) -> Region:
+    """
+    把ip_location原文归一化为地域
+
+    Args:
+        location: WeiboPost.location 原文
+
+    Returns:
+        Region(code, name)，code为六位省级代码、'overseas' 或 'unknown'
+    """
+    text = _PREFIX_RE.sub('', (location or '').strip()).strip()
+    if text.startswith('中国') and len(text) > 2:
+        text = text[2:].strip()
+    if not text:
+        return Region(REGION_UNKNOWN, REGION_NAMES[REGION_UNKNOWN])
+
+    code = _LOOKUP.get(text)
+    if code is None:
+        for prefix, prefix_code in _PREFIXES:
+            if text.startswith(prefix):
+                code = prefix_code
+                break
+    if code is None:
+        code = REGION_UNKNOWN
+    return Region(code, REGION_NAMES[code])
+
+
+def region_code(location: Optional[str]) -> str:
+    """ip_location原文对应的地域代码"""
+    return normalize_region(location).code
+
+
+def region_name(code: Optional[str]) -> str:
+    """地域代码对应的显示名称"""
+    return REGION_NAMES.get(code or REGION_UNKNOWN, REGION_NAMES[REGION_UNKNOWN])
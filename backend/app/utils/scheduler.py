@@ -1,4 +1,3 @@
-from apscheduler.schedulers.background import BackgroundScheduler
 from datetime import datetime
 
 
@@ -6,6 +5,7 @@ class CrawlerScheduler:
     """爬虫定时调度器"""
     
     def __init__(self):
+        from apscheduler.schedulers.background import BackgroundScheduler
         self.scheduler = BackgroundScheduler()
         self.is_running = False
     
@@ -0,0 +1,70 @@
+"""
+SQLite连接配置 - 连接池大小和每个新连接的PRAGMA
+
+默认的回滚日志模式下，写事务提交时会独占整个数据库文件，同步或情感分析批量写入期间
+看板读请求要么等待、要么报 "database is locked"。WAL模式下读写互不阻塞（同一时间仍只有
+一个写事务），配合:
+    synchronous=NORMAL   WAL下只在检查点时fsync，断电最多丢失最后几个已提交事务，不会损坏数据库
+    busy_timeout         写事务之间排队等待，而不是立即报错
+    cache_size/mmap_size 更大的页缓存和内存映射读
+只对文件型SQLite生效；内存数据库和其他数据库不做任何修改。
+"""
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+
+def _is_file_sqlite(uri) -> bool:
+    url = make_url(uri)
+    return url.get_backend_name() == 'sqlite' and bool(url.database) and ':memory:' not in url.database
+
+
+def apply_engine_options(config) -> None:
+    """在db.init_app之前调用: 为文件型SQLite设置连接池和驱动参数（不覆盖已显式配置的选项）"""
+    if not _is_file_sqlite(config.get('SQLALCHEMY_DATABASE_URI') or 'sqlite://'):
+        return
+    options = dict(config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    options.setdefault('pool_size', config.get('SQLITE_POOL_SIZE', 8))
+    options.setdefault('max_overflow', config.get('SQLITE_MAX_OVERFLOW', 8))
+    options.setdefault('pool_timeout', config.get('SQLITE_POOL_TIMEOUT', 30))
+    connect_args = dict(options.get('connect_args') or {})
+    connect_args.setdefault('timeout', config.get('SQLITE_BUSY_TIMEOUT_MS', 10000) / 1000)
+    options['connect_args'] = connect_args
+    config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+
+def install_pragmas(engine, config) -> None:
+    """为engine的每个新连接设置PRAGMA（在创建第一个连接之前调用）"""
+    if not _is_file_sqlite(engine.url):
+        return
+
+    pragmas = [
+        f"busy_timeout={int(config.get('SQLITE_BUSY_TIMEOUT_MS', 10000))}",
+        f"synchronous={config.get('SQLITE_SYNCHRONOUS', 'NORMAL')}",
+        f"cache_size=-{int(config.get('SQLITE_CACHE_SIZE_KB', 65536))}",
+        f"mmap_size={int(config.get('SQLITE_MMAP_SIZE_MB', 256)) * 1024 * 1024}",
+        'temp_store=MEMORY',
+    ]
+    journal_mode = 'WAL' if config.get('SQLITE_WAL', True) else 'DELETE'
+
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            # journal_mode写入数据库文件，对所有连接生效；切换需要没有其他连接在读写
+            cursor.execute(f'PRAGMA journal_mode={journal_mode}')
+            for pragma in pragmas:
+                cursor.execute(f'PRAGMA {pragma}')
+        finally:
+            cursor.close()
+
+    event.listen(engine, 'connect', set_pragmas)
+
+
+def pragma_status(engine) -> dict:
+    """当前连接的PRAGMA取值（用于状态接口和压测脚本输出）"""
+    if engine.dialect.name != 'sqlite':
+        return {}
+    status = {}
+    with engine.connect() as connection:
+        for name in ('journal_mode', 'synchronous', 'busy_timeout', 'cache_size', 'mmap_size'):
+            status[name] = connection.exec_driver_sql(f'PRAGMA {name}').scalar()
+    return status
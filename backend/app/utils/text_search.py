@@ -0,0 +1,84 @@
+"""
+全文检索分词 - 为SQLite FTS5预先切分中文文本
+
+FTS5内置的unicode61分词器把连续的汉字当作一个词，无法检索句中的词语。这里在写入索引前
+把文本切成: 连续汉字按相邻两字切成二元组（末尾再补一个单字），字母串（小写）和数字串各为一词；
+检索时用同样的规则把关键词切成二元组短语，"天气真好" -> "天气 气真 真好"，等价于子串匹配。
+单个汉字的关键词用前缀查询匹配以该字开头的二元组或末尾单字。
+
+cjk_tokens 注册为每个SQLite连接上的SQL函数，weibo_posts上的触发器用它维护 weibo_posts_fts
+（见迁移0005）；因此写入weibo_posts必须通过应用的engine，外部sqlite3连接写入会报 no such function。
+全文索引只在SQLite上建立，其他数据库上检索退化为LIKE子串匹配（见 post_query.search_posts）。
+"""
+import re
+from typing import List, Optional, Tuple
+
+from sqlalchemy import event
+
+
+FTS_TABLE = 'weibo_posts_fts'
+
+_CJK = '㐀-䶿一-鿿豈-﫿'
+_TOKEN_RE = re.compile(f'[{_CJK}]+|[a-zA-Z]+|[0-9]+')
+_CJK_RE = re.compile(f'[{_CJK}]')
+
+
+def _split(text: str) -> List[Tuple[str, bool]]:
+    """切出 (片段, 是否汉字) 列表"""
+    return [(match.group(), bool(_CJK_RE.match(match.group()))) for match in _TOKEN_RE.finditer(text or '')]
+
+
+def cjk_tokens(text: Optional[str]) -> str:
+    """
+    索引用分词结果（空格分隔）
+
+    "今天天气真好abc" -> "今天 天天 天气 气真 真好 好 abc"
+    """
+    tokens = []
+    for piece, is_cjk in _split(text):
+        if not is_cjk:
+            tokens.append(piece.lower())
+            continue
+        tokens.extend(piece[i:i + 2] for i in range(len(piece) - 1))
+        tokens.append(piece[-1])
+    return ' '.join(tokens)
+
+
+def match_expression(keyword: Optional[str]) -> Optional[str]:
+    """
+    把检索关键词转换为FTS5 MATCH表达式，空格分隔的多个关键词为AND关系
+
+    Returns:
+        MATCH表达式，关键词中没有可检索的字符时返回None
+    """
+    phrases = []
+    for term in (keyword or '').split():
+        tokens = []
+        pieces = _split(term)
+        for index, (piece, is_cjk) in enumerate(pieces):
+            if not is_cjk:
+                tokens.append(piece.lower())
+            elif len(piece) == 1:
+                # 单字只能前缀匹配，且只能位于短语末尾
+                tokens.append(piece)
+                phrases.append('"' + ' '.join(tokens) + '"*')
+                tokens = []
+            else:
+                tokens.extend(piece[i:i + 2] for i in range(len(piece) - 1))
+                # 索引中每段汉字后都有末尾单字，后面还有字母数字时短语里也要带上
+                if index < len(pieces) - 1:
+                    tokens.append(piece[-1])
+        if tokens:
+            phrases.append('"' + ' '.join(tokens) + '"')
+    return ' AND '.join(phrases) or None
+
+
+def install_functions(engine) -> None:
+    """为engine的每个新SQLite连接注册cjk_tokens函数（在创建第一个连接之前调用）"""
+    if engine.dialect.name != 'sqlite':
+        return
+
+    def register(dbapi_connection, connection_record):
+        dbapi_connection.create_function('cjk_tokens', 1, cjk_tokens, deterministic=True)
+
+    event.listen(engine, 'connect', register)
@@ -0,0 +1,57 @@
+"""
+关键词时间桶 - 按微博发布时间(publish_time)把话题切分为小时/天/周的时间段
+
+时间段标识写入 keywords.time_period，格式为 "粒度:标签":
+    hour:2024-12-16 08:00
+    day:2024-12-16
+    week:2024-W51   (ISO周)
+不带粒度前缀的time_period是整个话题的关键词快照（保存日期）。
+"""
+from datetime import datetime, timedelta
+from typing import Tuple
+
+
+GRANULARITIES = ('hour', 'day', 'week')
+
+
+def bucket_start(moment: datetime, granularity: str) -> datetime:
+    """moment所在时间桶的起始时间"""
+    if granularity == 'hour':
+        return moment.replace(minute=0, second=0, microsecond=0)
+    day = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    if granularity == 'day':
+        return day
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    raise ValueError(f"不支持的时间粒度: {granularity}，可选: {', '.join(GRANULARITIES)}")
+
+
+def bucket_end(start: datetime, granularity: str) -> datetime:
+    """时间桶的结束时间（不含）"""
+    if granularity == 'hour':
+        return start + timedelta(hours=1)
+    if granularity == 'day':
+        return start + timedelta(days=1)
+    if granularity == 'week':
+        return start + timedelta(weeks=1)
+    raise ValueError(f"不支持的时间粒度: {granularity}，可选: {', '.join(GRANULARITIES)}")
+
+
+def bucket_label(start: datetime, granularity: str) -> str:
+    if granularity == 'hour':
+        return start.strftime('%Y-%m-%d %H:00')
+    if granularity == 'day':
+        return start.strftime('%Y-%m-%d')
+    iso_year, iso_week, _ = start.isocalendar()
+    return f"{iso_year}-W{iso_week:02d}"
+
+
+def bucket_period(moment: datetime, granularity: str) -> Tuple[str, datetime, datetime]:
+    """返回 (time_period, 起始时间, 结束时间)"""
+    start = bucket_start(moment, granularity)
+    return f"{granularity}:{bucket_label(start, granularity)}", start, bucket_end(start, granularity)
+
+
+def is_bucket_period(time_period: str) -> bool:
+    """time_period是否为时间桶（而不是整体快照）"""
+    return bool(time_period) and ':' in time_period and time_period.split(':', 1)[0] in GRANULARITIES
@@ -0,0 +1,25 @@
+"""
+分词结果的紧凑存储格式: vocabulary.id 组成的小端int32数组
+"""
+import sys
+from array import array
+from typing import Iterable
+
+
+_LITTLE_ENDIAN = sys.byteorder == 'little'
+
+
+def encode_token_ids(token_ids: Iterable[int]) -> bytes:
+    ids = array('i', token_ids)
+    if not _LITTLE_ENDIAN:
+        ids.byteswap()
+    return ids.tobytes()
+
+
+def decode_token_ids(blob: bytes) -> array:
+    ids = array('i')
+    if blob:
+        ids.frombytes(blob)
+        if not _LITTLE_ENDIAN:
+            ids.byteswap()
+    return ids
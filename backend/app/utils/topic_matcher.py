@@ -0,0 +1,220 @@
+"""
+话题匹配索引 - 同步时为每条内容查找所属话题，匹配过程不访问数据库
+
+索引在每次同步开始时按需构建，话题发生变化（本进程的ORM事件，或其他进程修改导致的
+话题数量/最大id/最大更新时间变化）后自动失效重建。
+
+匹配策略与原先逐条查询数据库的顺序一致:
+    1. 内容中的第一个 #话题# 标签: 话题名相等或话题标签包含该文本
+    2. source_keyword 精确匹配: 规则同上
+    3. source_keyword 模糊匹配: 活跃话题名与关键词互相包含
+    4. 内容包含活跃话题名/标签文本（Aho-Corasick自动机，耗时与内容长度成线性）
+    5. 默认使用第一个活跃话题
+"""
+import re
+import threading
+from collections import Counter, deque, namedtuple
+from typing import Dict, Iterator, List, Optional
+
+from sqlalchemy import event
+
+from app import db
+from app.models import Topic
+
+
+TopicRef = namedtuple('TopicRef', ['id', 'topic_name', 'topic_tag', 'is_active'])
+
+_HASHTAG_RE = re.compile(r'#([^#]+)#')
+
+
+class AhoCorasick:
+    """多模式串匹配自动机"""
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List] = [[]]
+        self._built = False
+
+    def add(self, pattern: str, value) -> None:
+        if not pattern:
+            return
+        node = 0
+        for char in pattern:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            node = next_node
+        self._output[node].append(value)
+        self._built = False
+
+    def build(self) -> None:
+        """按BFS计算失败指针，并把后缀节点的输出合并到当前节点"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+        self._built = True
+
+    def iter_matches(self, text: str) -> Iterator:
+        """返回text中出现的所有模式串对应的value（可能重复）"""
+        if not self._built:
+            self.build()
+        goto, fail, output = self._goto, self._fail, self._output
+        node = 0
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if output[node]:
+                yield from output[node]
+
+
+class TopicMatcher:
+    """基于内存索引的话题匹配器"""
+
+    def __init__(self, topics: List[TopicRef]):
+        # 与数据库中 .first() 的默认顺序保持一致（按id）
+        self.topics = sorted(topics, key=lambda t: t.id)
+        self.active_topics = [t for t in self.topics if t.is_active]
+        self.default_topic = self.active_topics[0] if self.active_topics else None
+
+        # 精确查找: 话题名 -> 最小id话题
+        self._by_name: Dict[str, TopicRef] = {}
+        for topic in self.topics:
+            self._by_name.setdefault(topic.topic_name, topic)
+
+        # 活跃话题名/标签文本 -> 话题在活跃列表中的位置
+        self._automaton = AhoCorasick()
+        for order, topic in enumerate(self.active_topics):
+            self._automaton.add(topic.topic_name, order)
+            tag_text = topic.topic_tag.strip('#').strip() if topic.topic_tag else ''
+            if tag_text and tag_text != topic.topic_name:
+                self._automaton.add(tag_text, order)
+        self._automaton.build()
+
+        # 同步数据中标签和关键词大量重复，查找结果按文本缓存
+        self._exact_cache: Dict[str, Optional[TopicRef]] = {}
+        self._fuzzy_cache: Dict[str, Optional[TopicRef]] = {}
+        self.stats = Counter()
+
+    def _lookup_exact(self, text: str) -> Optional[TopicRef]:
+        """话题名等于text，或话题标签包含text的第一个话题"""
+        if text in self._exact_cache:
+            return self._exact_cache[text]
+
+        candidates = [self._by_name[text]] if text in self._by_name else []
+        for topic in self.topics:
+            if topic.topic_tag and text in topic.topic_tag:
+                candidates.append(topic)
+                break
+        found = min(candidates, key=lambda t: t.id) if candidates else None
+
+        self._exact_cache[text] = found
+        return found
+
+    def _lookup_keyword_fuzzy(self, keyword: str) -> Optional[TopicRef]:
+        """活跃话题名与关键词互相包含"""
+        if keyword in self._fuzzy_cache:
+            return self._fuzzy_cache[keyword]
+
+        found = None
+        for topic in self.active_topics:
+            if topic.topic_name in keyword or keyword in topic.topic_name:
+                found = topic
+                break
+
+        self._fuzzy_cache[keyword] = found
+        return found
+
+    def match(self, content: str, source_keyword: Optional[str] = None) -> Optional[TopicRef]:
+        """为内容查找话题，没有可用话题时返回None"""
+        # 策略1: 从内容提取话题标签 (#话题名#)
+        if content:
+            hashtag = _HASHTAG_RE.search(content)
+            if hashtag:
+                topic = self._lookup_exact(hashtag.group(1).strip())
+                if topic:
+                    self.stats['hashtag'] += 1
+                    return topic
+
+        if source_keyword:
+            # 策略2: 使用source_keyword精确匹配
+            topic = self._lookup_exact(source_keyword)
+            if topic:
+                self.stats['source_keyword'] += 1
+                return topic
+
+            # 策略3: source_keyword模糊匹配
+            topic = self._lookup_keyword_fuzzy(source_keyword)
+            if topic:
+                self.stats['source_keyword_fuzzy'] += 1
+                return topic
+
+        # 策略4: 内容包含话题名，取最靠前的活跃话题
+        if content:
+            orders = self._automaton.iter_matches(content)
+            first = min(orders, default=None)
+            if first is not None:
+                self.stats['content'] += 1
+                return self.active_topics[first]
+
+        # 策略5: 使用默认话题(第一个活跃话题)
+        if self.default_topic:
+            self.stats['default'] += 1
+        else:
+            self.stats['unmatched'] += 1
+        return self.default_topic
+
+
+_lock = threading.Lock()
+_matcher: Optional[TopicMatcher] = None
+_matcher_key = None
+_local_version = 0
+
+
+def _topics_fingerprint():
+    """话题表的廉价指纹，用于发现其他进程对话题的修改"""
+    return tuple(db.session.query(
+        db.func.count(Topic.id),
+        db.func.max(Topic.id),
+        db.func.max(Topic.updated_at)
+    ).one())
+
+
+def get_topic_matcher() -> TopicMatcher:
+    """获取当前话题集合对应的匹配器，话题变化后重建"""
+    global _matcher, _matcher_key
+    key = (_local_version, _topics_fingerprint())
+    with _lock:
+        if _matcher is None or _matcher_key != key:
+            topics = [
+                TopicRef(t.id, t.topic_name, t.topic_tag, bool(t.is_active))
+                for t in db.session.query(
+                    Topic.id, Topic.topic_name, Topic.topic_tag, Topic.is_active
+                )
+            ]
+            _matcher = TopicMatcher(topics)
+            _matcher_key = key
+            print(f"[TopicMatcher] 构建话题索引: {len(topics)} 个话题")
+        return _matcher
+
+
+def invalidate_topic_matcher(*args) -> None:
+    """使话题索引失效（话题增删改时由ORM事件触发）"""
+    global _local_version
+    _local_version += 1
+
+
+for _event_name in ('after_insert', 'after_update', 'after_delete'):
+    event.listen(Topic, _event_name, invalidate_topic_matcher)
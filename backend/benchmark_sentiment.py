@@ -0,0 +1,76 @@
+"""
+情感分析推理性能基准
+对比逐条推理(predict + predict_proba)与分块向量化推理(每块一次predict_proba)的吞吐量
+
+用法:
+    python benchmark_sentiment.py --rows 20000 --batch-sizes 128 512 2048
+"""
+import sys
+sys.path.insert(0, '.')
+
+import argparse
+import time
+import numpy as np
+
+from app.services.sentiment_service import SentimentAnalysisService
+
+
+def make_inputs(rows, n_features, seed=42):
+    """生成与模型输入维度一致的随机特征矩阵"""
+    rng = np.random.default_rng(seed)
+    return rng.standard_normal((rows, n_features)).astype(np.float32)
+
+
+def bench_per_row(model, inputs):
+    """旧路径: 每条样本分别调用predict和predict_proba"""
+    start = time.perf_counter()
+    for row in inputs:
+        model.predict(row[None, :])
+        model.predict_proba(row[None, :])
+    return time.perf_counter() - start
+
+
+def bench_batched(service, inputs, batch_size):
+    """新路径: 每块调用一次predict_proba并取argmax"""
+    start = time.perf_counter()
+    for offset in range(0, len(inputs), batch_size):
+        service._predict_features(inputs[offset:offset + batch_size])
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='情感分析推理性能基准')
+    parser.add_argument('--rows', type=int, default=20000, help='批量路径的样本数')
+    parser.add_argument('--per-row-rows', type=int, default=500,
+                        help='逐条路径的样本数（逐条路径很慢，按比例外推）')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[128, 512, 2048])
+    args = parser.parse_args()
+    
+    service = SentimentAnalysisService()
+    if not service.load_model():
+        print("❌ 情感分析模型加载失败")
+        return
+    
+    n_features = getattr(service.model, 'n_features_in_', 768)
+    inputs = make_inputs(args.rows, n_features)
+    
+    print("="*70)
+    print(f"情感分析推理基准 - {args.rows} 条样本, {n_features} 维特征")
+    print("="*70)
+    
+    per_row_rows = min(args.per_row_rows, args.rows)
+    elapsed = bench_per_row(service.model, inputs[:per_row_rows])
+    per_row_rate = per_row_rows / elapsed
+    print(f"逐条推理:        {per_row_rate:10.1f} 条/秒 ({per_row_rows} 条, {elapsed:.2f}s)")
+    
+    for batch_size in args.batch_sizes:
+        elapsed = bench_batched(service, inputs, batch_size)
+        rate = args.rows / elapsed
+        print(f"分块推理 (batch={batch_size:5d}): {rate:10.1f} 条/秒 "
+              f"({elapsed:.2f}s, 加速 {rate / per_row_rate:.1f}x)")
+    
+    print("="*70)
+
+
+if __name__ == "__main__":
+    main()
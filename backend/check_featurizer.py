@@ -0,0 +1,103 @@
+"""
+核对情感分类器与编码器特征是否匹配
+
+lightgbm_classifier.joblib 的训练特征没有留档，后端默认按 bert-base-chinese + [CLS] 池化
+生成768维输入只是推测。本脚本用一小批人工标注的微博文本分别以 cls / mean 池化跑一遍分类器，
+输出各自的准确率；特征取法不对时准确率接近随机（约33%），这时需要重新训练或换用训练时的编码器。
+
+用法:
+    python check_featurizer.py
+    python check_featurizer.py --model /path/to/bert-base-chinese --pooling cls mean
+"""
+import sys
+sys.path.insert(0, '.')
+
+import argparse
+from collections import Counter
+
+from app import create_app
+from app.services.model_registry import model_registry
+from app.services.sentiment_service import SentimentAnalysisService
+
+
+# (文本, 人工标注)，标签与 deployed_ml_models/label_map.txt 一致: 0 中性 / 1 正面 / 2 负面
+LABELLED_SAMPLES = [
+    ('今天天气真好，和朋友出去玩得特别开心！', '正面'),
+    ('这部电影太精彩了，强烈推荐大家去看', '正面'),
+    ('终于拿到offer了，感谢一路帮助我的人', '正面'),
+    ('国足赢了！太激动了，今晚睡不着', '正面'),
+    ('新买的手机很好用，拍照效果一流', '正面'),
+    ('这家店服务态度太差了，再也不会来了', '负面'),
+    ('排了三个小时的队，结果告诉我卖完了，气死了', '负面'),
+    ('又加班到凌晨，身体快撑不住了，好累', '负面'),
+    ('快递丢了客服还推卸责任，太让人失望了', '负面'),
+    ('看到这种新闻真的很难过，希望不要再发生', '负面'),
+    ('明天上午十点召开发布会', '中性'),
+    ('本市今日最高气温25度，多云转晴', '中性'),
+    ('地铁二号线将于下周一起调整运营时间', '中性'),
+    ('会议纪要已发到群里，请查收', '中性'),
+    ('这款手机搭载6.7英寸屏幕，售价3999元', '中性'),
+]
+
+# 三分类随机猜测的准确率约为33%，低于该阈值视为特征与训练时不一致
+MIN_ACCURACY = 0.6
+
+
+def evaluate(app, pooling):
+    """按指定池化方式重新加载模型并返回 (准确率, 混淆计数)"""
+    app.config['FEATURIZER_POOLING'] = pooling
+    model_registry.clear()
+
+    service = SentimentAnalysisService()
+    results = service.batch_predict([text for text, _ in LABELLED_SAMPLES])
+    if not results:
+        return None, None
+
+    confusion = Counter(
+        (expected, result['label'])
+        for (_, expected), result in zip(LABELLED_SAMPLES, results)
+    )
+    correct = sum(count for (expected, predicted), count in confusion.items() if expected == predicted)
+    return correct / len(LABELLED_SAMPLES), confusion
+
+
+def main():
+    parser = argparse.ArgumentParser(description='核对情感分类器与编码器特征是否匹配')
+    parser.add_argument('--model', help='编码器名称或本地路径（默认使用 FEATURIZER_MODEL）')
+    parser.add_argument('--pooling', nargs='+', default=['cls', 'mean'], choices=['cls', 'mean'])
+    args = parser.parse_args()
+
+    # 只用到模型和编码器，不读写业务数据库
+    overrides = {'FEATURIZER_BACKEND': 'encoder', 'FEATURE_CACHE_DIR': None,
+                 'SQLALCHEMY_DATABASE_URI': 'sqlite://'}
+    if args.model:
+        overrides['FEATURIZER_MODEL'] = args.model
+    app = create_app(test_config=overrides)
+
+    best = None
+    with app.app_context():
+        print(f"编码器: {app.config['FEATURIZER_MODEL']}, 标注样本: {len(LABELLED_SAMPLES)}条\n")
+        for pooling in args.pooling:
+            accuracy, confusion = evaluate(app, pooling)
+            if accuracy is None:
+                print(f"{pooling:>5}: 模型加载失败 - {model_registry.sentiment_model_error}")
+                continue
+            best = max(best or 0.0, accuracy)
+            print(f"{pooling:>5}: 准确率 {accuracy:.1%}")
+            for (expected, predicted), count in sorted(confusion.items()):
+                if expected != predicted:
+                    print(f"       {expected} -> {predicted}: {count}条")
+
+    print()
+    if best is None:
+        print("⚠️ 情感模型未能加载，无法核对（encoder后端需要 pip install -r requirements-encoder.txt）")
+        return 2
+    if best < MIN_ACCURACY:
+        print(f"⚠️ 最高准确率 {best:.1%} 低于 {MIN_ACCURACY:.0%}，编码器特征很可能与分类器训练时不一致")
+        return 1
+    print("✅ 分类器在标注样本上表现正常，当前编码器设置可用")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,230 @@
+"""
+索引检查 - 对看板接口和分析流程实际执行的查询做 EXPLAIN QUERY PLAN，确认都走索引
+
+做法: 通过测试客户端请求各接口（以及直接调用几个分析流程中的查询），记录执行的每条SELECT，
+用相同参数执行 EXPLAIN QUERY PLAN。计划中出现对明细表的全表扫描（SCAN 表名且未使用索引，
+或遍历整个索引后还要 USE TEMP B-TREE FOR ORDER BY）即判定失败，以非0状态码退出。
+少量按设计需要遍历的小表（如话题列表）在检查项中单独放行。
+每项先预热执行一次（词频统计表等首次使用时可能从明细一次性重建），只检查第二次执行的查询。
+
+同样的检查在 tests/test_query_plans.py 中作为测试运行（python -m pytest tests/test_query_plans.py）。
+
+用法:
+    python check_indexes.py                   # 在临时数据库中建表、执行迁移、写入少量样例数据后检查
+    python check_indexes.py --database-uri sqlite:///instance/weibo_sentiment.db   # 检查已有数据库（会先执行未执行的迁移）
+"""
+import argparse
+import os
+import re
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+# (名称, 调用方式, 允许全表扫描的表)
+CHECKS = [
+    ('GET /api/visualization/topics', 'get:/api/visualization/topics', {'topics'}),
+    ('GET /api/visualization/topics/<id>/keywords', 'get:/api/visualization/topics/{topic_id}/keywords', set()),
+    ('GET /api/visualization/topics/<id>/keywords/evolution',
+     'get:/api/visualization/topics/{topic_id}/keywords/evolution', set()),
+    ('GET /api/visualization/topics/<id>/sentiments', 'get:/api/visualization/topics/{topic_id}/sentiments', set()),
+    ('GET /api/visualization/trend', 'get:/api/visualization/trend?topic_id={topic_id}&period=day', set()),
+    ('GET /api/visualization/geographic', 'get:/api/visualization/geographic?topic_id={topic_id}', set()),
+    ('GET /api/sentiment/results', 'get:/api/sentiment/results?topic_id={topic_id}', set()),
+    ('GET /api/manage/data/query（全文检索）',
+     'get:/api/manage/data/query?keyword=样例&topic_id={topic_id}&start_date=2024-12-01', set()),
+    ('历史数据列表: 按话题游标翻页', 'call:list_topic_posts', set()),
+    ('历史数据列表: 全部话题游标翻页', 'call:list_all_posts', set()),
+    ('数据导出: 按话题顺序读取', 'call:export_topic_posts', set()),
+    ('情感分析: 未分析微博（反连接分页）', 'call:pending_posts', set()),
+    ('情感分析: 写入前查询已有结果', 'call:existing_results', set()),
+    ('关键词时间桶: 按发布时间范围取微博', 'call:bucket_posts', set()),
+]
+
+_SCAN_RE = re.compile(r'^SCAN (?:TABLE )?(\w+)(.*)$')
+
+
+def seed_sample_data(db):
+    """空库中写入一个话题和少量微博/结果/关键词，使各接口走到完整的查询路径"""
+    from app.models import Keyword, Topic, WeiboPost
+    from app.services.sentiment_writer import SentimentResultWriter
+
+    topic = Topic(topic_name='索引检查', topic_tag='#索引检查#')
+    db.session.add(topic)
+    db.session.flush()
+    start = datetime(2024, 12, 1)
+    posts = [WeiboPost(topic_id=topic.id, weibo_id=f'index-check-{i}', content=f'样例微博{i}',
+                       comment_text=f'样例微博{i}', publish_time=start + timedelta(hours=i),
+                       location='发布于 北京') for i in range(20)]
+    db.session.add_all(posts)
+    db.session.add_all([Keyword(topic_id=topic.id, keyword='样例', frequency=3, time_period='2024-12-01'),
+                        Keyword(topic_id=topic.id, keyword='样例', frequency=3, time_period='day:2024-12-01')])
+    db.session.commit()
+    with SentimentResultWriter() as writer:
+        writer.add([post.id for post in posts[:10]], ['正面'] * 10, [0.9] * 10, [0.8] * 10)
+    return topic.id
+
+
+def run_call(name, topic_id):
+    from app import db
+    from app.models import WeiboPost
+    from app.services.post_query import iter_posts, list_posts
+    from app.services.sentiment_service import SentimentAnalysisService
+    from app.services.sentiment_writer import SentimentResultWriter
+
+    if name == 'pending_posts':
+        next(iter(SentimentAnalysisService().iter_pending_posts(topic_id, page_size=10)), None)
+    elif name == 'existing_results':
+        SentimentResultWriter()._existing_results([1, 2, 3])
+    elif name in ('list_topic_posts', 'list_all_posts'):
+        # 第一页和按游标取的第二页
+        scope = topic_id if name == 'list_topic_posts' else None
+        first = list_posts(topic_id=scope, limit=5)
+        list_posts(topic_id=scope, cursor=first['next_cursor'], limit=5)
+    elif name == 'export_topic_posts':
+        next(iter_posts(topic_id=topic_id), None)
+    elif name == 'bucket_posts':
+        start = datetime(2024, 12, 1)
+        db.session.query(WeiboPost.id).filter(
+            WeiboPost.topic_id == topic_id,
+            WeiboPost.publish_time >= start,
+            WeiboPost.publish_time < start + timedelta(days=1)
+        ).all()
+
+
+def explain(connection, statement, parameters):
+    cursor = connection.connection.cursor()
+    try:
+        cursor.execute('EXPLAIN QUERY PLAN ' + statement, parameters)
+        return [row[-1] for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+
+def full_scans(plan, allowed):
+    """
+    计划中的全表扫描: 未使用索引的SCAN，以及遍历整个索引后还要临时排序的SCAN
+    （索引只被当作覆盖扫描用，没有按索引顺序读取，等同全表扫描）
+    """
+    sorts = any(detail.startswith('USE TEMP B-TREE FOR ORDER BY') for detail in plan)
+    scans = []
+    for detail in plan:
+        match = _SCAN_RE.match(detail)
+        if not match:
+            continue
+        table, rest = match.groups()
+        # 全文索引（VIRTUAL TABLE INDEX n:M...）按MATCH取出匹配行，按相关度排序是预期的
+        if table in allowed or 'VIRTUAL TABLE INDEX' in rest or ('INDEX' in rest and not sorts):
+            continue
+        scans.append(detail + ('（临时排序）' if 'INDEX' in rest else ''))
+    return scans
+
+
+def check_query(client, target, allowed, topic_id, verbose=False):
+    """
+    执行一项检查（先预热执行一次），对第二次执行的每条SELECT做EXPLAIN QUERY PLAN
+
+    Returns:
+        (HTTP状态码, 未使用索引的全表扫描列表)
+    """
+    from sqlalchemy import event
+    from app import db
+
+    kind, value = target.split(':', 1)
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT') and not executemany:
+            captured.append((statement, parameters))
+
+    def execute():
+        if kind == 'get':
+            return client.get(value.format(topic_id=topic_id)).status_code
+        run_call(value, topic_id)
+        return 200
+
+    execute()
+    event.listen(db.engine, 'before_cursor_execute', capture)
+    try:
+        status_code = execute()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', capture)
+    if status_code != 200:
+        return status_code, []
+
+    problems = []
+    with db.engine.connect() as connection:
+        for statement, parameters in captured:
+            plan = explain(connection, statement, parameters)
+            if verbose:
+                print(f"    {' '.join(statement.split())[:120]}")
+                for detail in plan:
+                    print(f"        {detail}")
+            problems.extend(full_scans(plan, allowed))
+    return status_code, sorted(set(problems))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='检查接口查询是否使用索引')
+    parser.add_argument('--database-uri', help='要检查的数据库，默认使用临时数据库并写入样例数据')
+    parser.add_argument('--verbose', action='store_true', help='打印每条查询的执行计划')
+    args = parser.parse_args()
+
+    tmp_dir = None
+    if args.database_uri:
+        os.environ['DATABASE_URI'] = args.database_uri
+    else:
+        tmp_dir = tempfile.TemporaryDirectory()
+        os.environ['DATABASE_URI'] = f"sqlite:///{os.path.join(tmp_dir.name, 'index_check.db')}"
+
+    from app import create_app, db
+    from app.migrations import migration_status, verify_indexes
+    from app.models import Topic
+
+    app = create_app()
+    failures = 0
+
+    with app.app_context():
+        print("=" * 70)
+        print("迁移状态")
+        print("=" * 70)
+        for migration in migration_status(db):
+            mark = '✓' if migration['applied_at'] else '✗'
+            print(f"{mark} {migration['version']}  {migration['description']}")
+        missing = verify_indexes(db)
+        if missing:
+            failures += 1
+            print(f"❌ 缺少索引: {', '.join(missing)}")
+
+        topic = Topic.query.order_by(Topic.id).first()
+        topic_id = topic.id if topic else seed_sample_data(db)
+
+        client = app.test_client()
+        print("\n" + "=" * 70)
+        print("查询计划检查")
+        print("=" * 70)
+        for name, target, allowed in CHECKS:
+            status_code, problems = check_query(client, target, allowed, topic_id, verbose=args.verbose)
+            if status_code != 200:
+                failures += 1
+                print(f"❌ {name}: HTTP {status_code}")
+            elif problems:
+                failures += 1
+                print(f"❌ {name}: {'; '.join(problems)}")
+            else:
+                print(f"✓ {name}")
+
+    if tmp_dir is not None:
+        tmp_dir.cleanup()
+
+    print()
+    if failures:
+        print(f"❌ {failures} 项检查未通过")
+        sys.exit(1)
+    print("✓ 所有查询均使用索引")
+
+
+if __name__ == "__main__":
+    main()
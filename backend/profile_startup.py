@@ -0,0 +1,144 @@
+"""
+启动耗时分析
+对Flask应用工厂、run.py和CLI脚本分别测量冷启动耗时，并用 python -X importtime
+统计导入耗时最多的模块，以及jieba/numpy/joblib等重依赖是否在启动时被导入
+
+用法:
+    python profile_startup.py                 # 控制台输出
+    python profile_startup.py --repeat 10 --top 15
+    python profile_startup.py --markdown      # 输出Markdown表格（用于STARTUP_PROFILE.md）
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 名称 -> 子进程参数
+TARGETS = {
+    'create_app()': ['-c', 'from app import create_app; create_app()'],
+    'import run': ['-c', 'import run'],
+    'run_sentiment_analysis.py --help': ['run_sentiment_analysis.py', '--help'],
+}
+
+HEAVY_MODULES = ['jieba', 'sklearn', 'joblib', 'numpy', 'lightgbm', 'apscheduler', 'selenium']
+
+
+def run_once(args, env, importtime=False):
+    command = [sys.executable] + (['-X', 'importtime'] if importtime else []) + args
+    start = time.perf_counter()
+    completed = subprocess.run(command, cwd=BACKEND_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    elapsed = time.perf_counter() - start
+    if completed.returncode != 0:
+        raise RuntimeError(f"{' '.join(args)} 退出码 {completed.returncode}:\n{completed.stderr[-2000:]}")
+    return elapsed, completed.stderr
+
+
+def parse_importtime(stderr):
+    """解析 -X importtime 输出，返回 {模块: (自身微秒, 累计微秒, 层级)}"""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_part, cumulative_part, raw_name = line.split('|', 2)
+        self_us = int(self_part.split(':', 1)[1])
+        cumulative_us = int(cumulative_part)
+        # 模块名前的缩进表示嵌套层级: 顶层为1个空格，每深一层多2个空格
+        depth = (len(raw_name) - len(raw_name.lstrip(' ')) - 1) // 2
+        modules[raw_name.strip()] = (self_us, cumulative_us, depth)
+    return modules
+
+
+def profile_target(name, args, env, repeat, top):
+    # 先跑一次预热（建表、.pyc编译），之后测量
+    run_once(args, env)
+    timings = [run_once(args, env)[0] for _ in range(repeat)]
+    _, stderr = run_once(args, env, importtime=True)
+    modules = parse_importtime(stderr)
+
+    total_import = sum(cumulative for _, cumulative, depth in modules.values() if depth == 0)
+    # 顶层模块及其直接依赖（如 app -> flask / sqlalchemy / app.api）
+    top_level = sorted(
+        ((module, cumulative) for module, (_, cumulative, depth) in modules.items() if depth <= 1),
+        key=lambda item: item[1], reverse=True
+    )[:top]
+    heavy = {module: module in modules for module in HEAVY_MODULES}
+
+    return {
+        'name': name,
+        'median': statistics.median(timings),
+        'min': min(timings),
+        'import_total': total_import / 1e6,
+        'top': [(module, cumulative / 1e6) for module, cumulative in top_level],
+        'heavy': heavy
+    }
+
+
+def print_console(results):
+    print("="*70)
+    print("启动耗时分析")
+    print("="*70)
+    for result in results:
+        print(f"\n{result['name']}")
+        print(f"  冷启动: 中位数 {result['median']:.3f}s, 最快 {result['min']:.3f}s, "
+              f"导入合计 {result['import_total']:.3f}s")
+        loaded = [module for module, is_loaded in result['heavy'].items() if is_loaded]
+        print(f"  启动时导入的重依赖: {', '.join(loaded) if loaded else '无'}")
+        print("  导入耗时最多的模块:")
+        for module, seconds in result['top']:
+            print(f"    {seconds:8.3f}s  {module}")
+    print("="*70)
+
+
+def print_markdown(results):
+    print("| 入口 | 冷启动中位数 | 最快 | 导入合计 | 启动时导入的重依赖 |")
+    print("| --- | --- | --- | --- | --- |")
+    for result in results:
+        loaded = [module for module, is_loaded in result['heavy'].items() if is_loaded]
+        print(f"| `{result['name']}` | {result['median']:.3f}s | {result['min']:.3f}s | "
+              f"{result['import_total']:.3f}s | {', '.join(loaded) if loaded else '无'} |")
+    for result in results:
+        print(f"\n`{result['name']}` 导入耗时最多的模块:\n")
+        print("| 模块 | 累计导入耗时 |")
+        print("| --- | --- |")
+        for module, seconds in result['top']:
+            print(f"| `{module}` | {seconds:.3f}s |")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='启动耗时分析')
+    parser.add_argument('--repeat', type=int, default=5, help='每个入口测量次数')
+    parser.add_argument('--top', type=int, default=10, help='列出导入耗时最多的前N个模块')
+    parser.add_argument('--targets', nargs='+', choices=list(TARGETS), default=list(TARGETS))
+    parser.add_argument('--database-uri', help='测量使用的数据库（默认临时SQLite文件，避免改动实际数据库）')
+    parser.add_argument('--markdown', action='store_true', help='输出Markdown表格')
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    tmp_dir = None
+    if args.database_uri:
+        env['DATABASE_URI'] = args.database_uri
+    elif 'DATABASE_URI' not in env:
+        tmp_dir = tempfile.TemporaryDirectory()
+        env['DATABASE_URI'] = f"sqlite:///{os.path.join(tmp_dir.name, 'startup.db')}"
+
+    try:
+        results = [profile_target(name, TARGETS[name], env, args.repeat, args.top)
+                   for name in args.targets]
+    finally:
+        if tmp_dir:
+            tmp_dir.cleanup()
+
+    if args.markdown:
+        print_markdown(results)
+    else:
+        print_console(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -13,6 +13,7 @@ with app.app_context():
     print(f"状态: {result['status']}")
     print(f"新增: {result['posts_added']}条")
     print(f"跳过: {result['posts_skipped']}条")
+    print(f"出错: {result.get('posts_failed', 0)}条, 待重试: {result.get('retry_pending', 0)}条")
     print(f"消息: {result['message']}")
     
     if result['posts_added'] > 0:
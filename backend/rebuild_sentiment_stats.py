@@ -0,0 +1,47 @@
+"""
+重建话题情感汇总表（topic_sentiment_stats）、小时汇总表（topic_hourly_stats）和地域汇总表（topic_region_stats）
+
+汇总表随微博同步、情感结果写入增量维护；批量删除、手工改库、绕过同步服务写入微博等操作
+可能造成偏差，用本脚本从 weibo_posts / sentiment_results 重新统计并报告哪些话题的计数有偏差。
+
+用法:
+    python rebuild_sentiment_stats.py               # 重建全部话题
+    python rebuild_sentiment_stats.py --topic-id 3  # 只重建一个话题
+"""
+import argparse
+import sys
+sys.path.insert(0, '.')
+
+from app import create_app
+from app.services.hourly_stats import rebuild_hourly_stats
+from app.services.region_stats import rebuild_region_stats
+from app.services.sentiment_stats import rebuild_sentiment_stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='重建话题情感/小时/地域汇总表')
+    parser.add_argument('--topic-id', type=int, default=None, help='只重建指定话题，默认全部')
+    args = parser.parse_args()
+
+    app = create_app()
+
+    with app.app_context():
+        result = rebuild_sentiment_stats(topic_id=args.topic_id)
+        hourly = rebuild_hourly_stats(topic_id=args.topic_id)
+        regions = rebuild_region_stats(topic_id=args.topic_id)
+
+    print("="*70)
+    print("话题汇总重建完成")
+    print("="*70)
+    print(f"话题数: {result['topics']}")
+    print(f"情感结果数: {result['results']}")
+    print(f"小时汇总: {hourly['rows']} 行, {hourly['posts']} 条微博")
+    print(f"地域汇总: {regions['rows']} 行, 回填地域 {regions['backfilled']} 条微博")
+    if result['drifted']:
+        print(f"⚠️  计数有偏差并已修复的话题: {', '.join(str(tid) for tid in result['drifted'])}")
+    else:
+        print("✓ 所有话题计数一致")
+
+
+if __name__ == "__main__":
+    main()
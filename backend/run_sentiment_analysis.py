@@ -12,16 +12,18 @@ from app import create_app, db
 from app.models import Topic, WeiboPost, SentimentResult
 from app.services.sentiment_service import SentimentAnalysisService
 from app.services.data_processing_service import DataProcessingService
+from app.services.sentiment_writer import SentimentResultWriter
 from datetime import datetime
 
 
-def analyze_sentiment_for_topic(topic_id, use_cleaned_text=True):
+def analyze_sentiment_for_topic(topic_id, use_cleaned_text=True, flush_size=5000):
     """
     对指定话题进行情感分析（使用清洗后的文本）
     
     Args:
         topic_id: 话题ID
         use_cleaned_text: 是否使用清洗后的文本
+        flush_size: 结果批量写入的提交粒度
     
     Returns:
         分析结果统计
@@ -50,60 +52,54 @@ def analyze_sentiment_for_topic(topic_id, use_cleaned_text=True):
             print("\n使用数据清洗服务处理文本")
             data_service = DataProcessingService()
         
-        # 获取该话题下所有微博
-        posts = WeiboPost.query.filter_by(topic_id=topic_id).all()
-        print(f"\n找到 {len(posts)} 条微博/评论")
+        # 统计该话题下微博总数（不加载行）
+        total_posts = WeiboPost.query.filter_by(topic_id=topic_id).count()
+        print(f"\n找到 {total_posts} 条微博/评论")
         
         analyzed_count = 0
-        skipped_count = 0
+        writer = SentimentResultWriter(flush_size=flush_size)
         
         print("\n开始情感分析...")
-        for i, post in enumerate(posts, 1):
-            # 检查是否已经分析过
-            existing_result = SentimentResult.query.filter_by(weibo_id=post.id).first()
-            if existing_result:
-                skipped_count += 1
-                continue
-            
-            # 获取文本内容
-            text = post.comment_text or post.content
-            if not text or len(text.strip()) < 3:
-                skipped_count += 1
-                continue
+        # 只流式读取尚未分析的行（LEFT JOIN + 键集分页）
+        for rows in sentiment_service.iter_pending_posts(topic_id, fallback_to_content=True):
+            post_ids = []
+            texts = []
             
-            # 如果使用清洗，先清洗文本
+            raw_texts = [row.text for row in rows]
+            # 如果使用清洗，整批清洗文本
             if use_cleaned_text:
-                text = data_service.clean_text(text)
-                if not text or len(text.strip()) < 3:
-                    skipped_count += 1
-                    continue
+                raw_texts = data_service.clean_batch(raw_texts)
             
-            # 预测情感
-            result = sentiment_service.predict(text)
+            for row, text in zip(rows, raw_texts):
+                if use_cleaned_text and (not text or len(text.strip()) < 3):
+                    continue
+                
+                post_ids.append(row.id)
+                texts.append(text)
             
-            # 保存结果
-            sentiment_result = SentimentResult(
-                weibo_id=post.id,
-                sentiment_label=result['label'],
-                sentiment_score=result['score'],
-                sentiment_intensity=result['intensity'],
-                analyzed_at=datetime.utcnow()
-            )
-            db.session.add(sentiment_result)
-            analyzed_count += 1
+            if not texts:
+                continue
             
-            # 每10条提交一次
-            if analyzed_count % 10 == 0:
-                db.session.commit()
-                print(f"  已分析: {analyzed_count}/{len(posts)}")
+            # 整批预测情感，结果缓冲后按flush_size批量写入
+            results = sentiment_service._predict_chunk(texts)
+            analyzed_count += writer.add_results(post_ids, results)
+            print(f"  已分析: {analyzed_count}/{total_posts}")
         
-        db.session.commit()
+        writer.flush()
+        sentiment_service.featurizer.flush()
+        
+        skipped_count = total_posts - analyzed_count
         
         print(f"\n{'='*70}")
         print(f"分析完成！")
         print(f"  [+] 新分析: {analyzed_count} 条")
         print(f"  [i] 跳过: {skipped_count} 条（已分析或无效文本）")
         
+        cache_stats = sentiment_service.get_feature_cache_stats()
+        if 'hits' in cache_stats:
+            print(f"  [i] 特征缓存: 命中 {cache_stats['hits']} 次, 未命中 {cache_stats['misses']} 次 "
+                  f"(命中率 {cache_stats['hit_rate']:.1%})")
+        
         # 获取情感分布
         distribution = sentiment_service.get_sentiment_distribution(topic_id)
         
@@ -123,7 +119,7 @@ def analyze_sentiment_for_topic(topic_id, use_cleaned_text=True):
         }
 
 
-def analyze_all_topics(use_cleaned_text=True):
+def analyze_all_topics(use_cleaned_text=True, flush_size=5000):
     """批量分析所有话题"""
     app = create_app()
     
@@ -137,7 +133,7 @@ def analyze_all_topics(use_cleaned_text=True):
         results = []
         for i, topic in enumerate(topics, 1):
             print(f"\n[{i}/{len(topics)}] 处理话题: {topic.topic_name}")
-            result = analyze_sentiment_for_topic(topic.id, use_cleaned_text)
+            result = analyze_sentiment_for_topic(topic.id, use_cleaned_text, flush_size)
             if result:
                 results.append(result)
         
@@ -175,6 +171,8 @@ def main():
                        help='话题ID（single模式需要）')
     parser.add_argument('--no-clean', action='store_true',
                        help='不使用文本清洗（直接使用原始文本）')
+    parser.add_argument('--flush-size', type=int, default=5000,
+                       help='每累计多少条结果批量写入并提交一次')
     
     args = parser.parse_args()
     
@@ -193,10 +191,10 @@ def main():
                     print("❌ 数据库中没有话题")
                     return
         
-        analyze_sentiment_for_topic(args.topic_id, use_cleaned)
+        analyze_sentiment_for_topic(args.topic_id, use_cleaned, args.flush_size)
     
     elif args.mode == 'all':
-        analyze_all_topics(use_cleaned)
+        analyze_all_topics(use_cleaned, args.flush_size)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,287 @@
+"""
+SQLite并发读写压测 - 同步/情感分析批量写入期间，看板接口的读延迟和锁错误
+
+一个写线程模拟同步流程（按批写入微博并计入汇总、写入情感结果，每批一个事务），
+若干读线程在写入期间通过测试客户端反复请求情感分布和趋势接口；另有若干长读进程（独立的
+操作系统进程，与写入方抢同一个数据库文件的锁）模拟导出/报表，逐批慢速读取weibo_posts，
+每次读事务持续 --hold-ms 毫秒。回滚日志模式下长读持有共享锁期间写事务无法提交，
+超过busy_timeout即报 "database is locked"；WAL模式下读写互不阻塞。
+
+每种模式在子进程中运行（journal_mode由SQLITE_WAL环境变量控制，busy_timeout由
+SQLITE_BUSY_TIMEOUT_MS控制），各使用一个新的临时数据库；结果分别统计写入、看板读取、
+长读中 "database is locked" 的次数。
+
+用法:
+    python stress_sqlite.py                          # 两种模式各跑一次并对比
+    python stress_sqlite.py --rows 50000 --readers 8 --batch-size 1000
+    python stress_sqlite.py --long-readers 4 --hold-ms 5000
+    python stress_sqlite.py --busy-timeout-ms 0      # 不排队等待，直接观察锁冲突
+    python stress_sqlite.py --modes wal
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+LOCATIONS = ['发布于 北京', '来自上海', '广东', '四川 成都', '其他', '美国']
+LABELS = ['正面', '负面', '中性']
+
+
+def is_locked(message: str) -> bool:
+    return 'database is locked' in message
+
+
+def percentile(values, ratio):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * ratio))]
+
+
+def write_posts(app, topic_id, first, rows, batch_size, stats):
+    """写线程: 按批写入微博（含小时/地域汇总）并写入情感结果"""
+    from app import db
+    from app.models import WeiboPost
+    from app.services import hourly_stats, region_stats
+    from app.services.sentiment_writer import SentimentResultWriter
+
+    start = datetime(2024, 12, 1)
+    began = time.perf_counter()
+    with app.app_context():
+        for offset in range(first, first + rows, batch_size):
+            mappings = [{
+                'topic_id': topic_id,
+                'weibo_id': f'stress-{i}',
+                'content': f'压测微博{i}',
+                'comment_text': f'压测微博{i}',
+                'publish_time': start + timedelta(minutes=i),
+                'likes_count': i % 7,
+                'reposts_count': i % 3,
+                'comments_count': i % 5,
+                'location': LOCATIONS[i % len(LOCATIONS)]
+            } for i in range(offset, min(offset + batch_size, first + rows))]
+            try:
+                db.session.bulk_insert_mappings(WeiboPost, mappings)
+                hourly_stats.record_posts(mappings)
+                region_stats.record_posts(mappings)
+                db.session.commit()
+
+                ids = [post_id for (post_id,) in db.session.query(WeiboPost.id).filter(
+                    WeiboPost.weibo_id.in_([mapping['weibo_id'] for mapping in mappings])
+                )]
+                with SentimentResultWriter() as writer:
+                    writer.add(ids, [LABELS[post_id % 3] for post_id in ids],
+                               [0.8] * len(ids), [0.5] * len(ids))
+                stats['rows'] += len(mappings)
+            except Exception as e:
+                db.session.rollback()
+                stats['errors'].append(str(e).splitlines()[0])
+        db.session.remove()
+    stats['seconds'] = time.perf_counter() - began
+
+
+def read_dashboard(app, topic_id, writer_done, latencies, errors):
+    """读线程: 写入期间反复请求看板接口"""
+    client = app.test_client()
+    urls = [
+        f'/api/visualization/topics/{topic_id}/sentiments',
+        f'/api/visualization/trend?topic_id={topic_id}&period=day',
+    ]
+    index = 0
+    while not writer_done.is_set():
+        began = time.perf_counter()
+        response = client.get(urls[index % len(urls)])
+        elapsed = (time.perf_counter() - began) * 1000
+        index += 1
+        if response.status_code == 200:
+            latencies.append(elapsed)
+        else:
+            body = response.get_json(silent=True) or {}
+            errors.append((body.get('message') or f'HTTP {response.status_code}').splitlines()[0])
+
+
+def long_reads(topic_id, hold_ms, stop, results):
+    """
+    长读进程: 在独立进程中反复执行慢速读事务，直到stop被设置
+
+    每个读事务逐批取出该话题的微博，批与批之间休眠，读完后保持事务直到持续约hold_ms毫秒
+    （回滚日志模式下整个事务期间持有共享锁，WAL模式下持有读快照）。
+    """
+    from sqlalchemy import select
+
+    from app import create_app, db
+    from app.models import WeiboPost
+
+    app = create_app()
+    query = select(WeiboPost.id, WeiboPost.content).where(WeiboPost.topic_id == topic_id).order_by(WeiboPost.id)
+    transactions, locked, other_errors, durations = 0, 0, [], []
+    with app.app_context():
+        engine = db.engine
+        while not stop.is_set():
+            began = time.perf_counter()
+            deadline = began + hold_ms / 1000
+            try:
+                with engine.connect() as connection:
+                    # pysqlite不会为SELECT开启事务，显式BEGIN才能让锁/快照持续到事务结束
+                    connection.exec_driver_sql('BEGIN')
+                    result = connection.execute(query)
+                    while result.fetchmany(200) and time.perf_counter() < deadline:
+                        time.sleep(0.05)
+                    result.close()
+                    while time.perf_counter() < deadline and not stop.is_set():
+                        time.sleep(0.05)
+                    connection.rollback()
+                transactions += 1
+                durations.append((time.perf_counter() - began) * 1000)
+            except Exception as e:
+                message = str(e).splitlines()[0]
+                if is_locked(message):
+                    locked += 1
+                else:
+                    other_errors.append(message)
+    results.put({'transactions': transactions, 'locked': locked, 'errors': other_errors,
+                 'max_ms': max(durations) if durations else 0.0})
+
+
+def run_worker(args):
+    """子进程: 在新的临时数据库上执行一轮压测，结果以JSON输出到最后一行"""
+    tmp_dir = tempfile.TemporaryDirectory()
+    os.environ['DATABASE_URI'] = f"sqlite:///{os.path.join(tmp_dir.name, 'stress.db')}"
+
+    from app import create_app, db
+    from app.models import Topic
+    from app.utils.sqlite_profile import pragma_status
+
+    app = create_app()
+    with app.app_context():
+        topic = Topic(topic_name='并发压测', topic_tag='#并发压测#')
+        db.session.add(topic)
+        db.session.commit()
+        topic_id = topic.id
+        pragmas = pragma_status(db.engine)
+        db.session.remove()
+
+    # 先写入一批，使读接口从一开始就有数据可查
+    warmup = {'rows': 0, 'errors': [], 'seconds': 0.0}
+    write_posts(app, topic_id, 0, args.batch_size, args.batch_size, warmup)
+    for url in (f'/api/visualization/topics/{topic_id}/sentiments', f'/api/visualization/trend?topic_id={topic_id}'):
+        app.test_client().get(url)
+
+    writer_stats = {'rows': 0, 'errors': [], 'seconds': 0.0}
+    writer_done = threading.Event()
+    latencies, read_errors = [], []
+
+    # 长读进程用spawn启动，继承DATABASE_URI和SQLITE_*环境变量，各自创建应用和连接池
+    context = multiprocessing.get_context('spawn')
+    stop_long_reads = context.Event()
+    long_read_results = context.Queue()
+    long_readers = [context.Process(target=long_reads,
+                                    args=(topic_id, args.hold_ms, stop_long_reads, long_read_results))
+                    for _ in range(args.long_readers)]
+    for process in long_readers:
+        process.start()
+    # 等长读进程启动并进入第一个读事务
+    time.sleep(min(args.hold_ms / 1000, 3.0) if long_readers else 0)
+
+    readers = [threading.Thread(target=read_dashboard, args=(app, topic_id, writer_done, latencies, read_errors))
+               for _ in range(args.readers)]
+    for reader in readers:
+        reader.start()
+    writer = threading.Thread(target=write_posts,
+                              args=(app, topic_id, args.batch_size, args.rows, args.batch_size, writer_stats))
+    writer.start()
+    writer.join()
+    writer_done.set()
+    stop_long_reads.set()
+    for reader in readers:
+        reader.join()
+    long_read_stats = [long_read_results.get() for _ in long_readers]
+    for process in long_readers:
+        process.join()
+
+    wal_path = os.path.join(tmp_dir.name, 'stress.db-wal')
+    wal_mb = os.path.getsize(wal_path) / 1024 / 1024 if os.path.exists(wal_path) else 0.0
+    tmp_dir.cleanup()
+    result = {
+        'journal_mode': pragmas.get('journal_mode'),
+        'busy_timeout': pragmas.get('busy_timeout'),
+        'writer_rows': writer_stats['rows'],
+        'writer_seconds': writer_stats['seconds'],
+        'writer_errors': writer_stats['errors'],
+        'writer_locked': sum(1 for error in writer_stats['errors'] if is_locked(error)),
+        'reads': len(latencies),
+        'read_errors': read_errors,
+        'read_locked': sum(1 for error in read_errors if is_locked(error)),
+        'long_reads': sum(stats['transactions'] for stats in long_read_stats),
+        'long_read_locked': sum(stats['locked'] for stats in long_read_stats),
+        'long_read_errors': [error for stats in long_read_stats for error in stats['errors']],
+        'long_read_max_ms': max((stats['max_ms'] for stats in long_read_stats), default=0.0),
+        'wal_mb': wal_mb,
+        'p50_ms': percentile(latencies, 0.5),
+        'p95_ms': percentile(latencies, 0.95),
+        'max_ms': max(latencies) if latencies else 0.0,
+    }
+    print(json.dumps(result, ensure_ascii=False))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SQLite并发读写压测（WAL vs 回滚日志）')
+    parser.add_argument('--rows', type=int, default=20000, help='写线程写入的微博数')
+    parser.add_argument('--batch-size', type=int, default=500, help='每个写事务的微博数')
+    parser.add_argument('--readers', type=int, default=4, help='读线程数')
+    parser.add_argument('--long-readers', type=int, default=2, help='长读进程数')
+    parser.add_argument('--hold-ms', type=int, default=3000, help='每个长读事务持续的毫秒数')
+    parser.add_argument('--busy-timeout-ms', type=int, default=None,
+                        help='覆盖SQLITE_BUSY_TIMEOUT_MS（默认使用配置值）')
+    parser.add_argument('--modes', nargs='+', choices=['wal', 'delete'], default=['wal', 'delete'])
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args)
+        return
+
+    results = {}
+    for mode in args.modes:
+        print(f"运行 {mode.upper()} 模式: {args.rows} 行, 每批 {args.batch_size}, {args.readers} 个读线程, "
+              f"{args.long_readers} 个长读进程（每次 {args.hold_ms}ms） ...")
+        env = dict(os.environ, SQLITE_WAL='1' if mode == 'wal' else '0')
+        if args.busy_timeout_ms is not None:
+            env['SQLITE_BUSY_TIMEOUT_MS'] = str(args.busy_timeout_ms)
+        command = [sys.executable, os.path.abspath(__file__), '--worker', '--rows', str(args.rows),
+                   '--batch-size', str(args.batch_size), '--readers', str(args.readers),
+                   '--long-readers', str(args.long_readers), '--hold-ms', str(args.hold_ms)]
+        completed = subprocess.run(command, env=env, capture_output=True, text=True)
+        lines = completed.stdout.strip().splitlines()
+        if completed.returncode != 0 or not lines:
+            print(completed.stdout[-2000:])
+            print(completed.stderr[-2000:])
+            sys.exit(1)
+        results[mode] = json.loads(lines[-1])
+
+    print()
+    print("locked列为 \"database is locked\" 次数")
+    print(f"{'模式':<8}{'busy(ms)':>9}{'写入行/秒':>10}{'写locked':>9}{'读请求':>8}{'读locked':>9}"
+          f"{'p50(ms)':>9}{'p95(ms)':>9}{'max(ms)':>9}{'长读':>6}{'长读locked':>11}{'WAL(MB)':>9}")
+    for mode, result in results.items():
+        rate = result['writer_rows'] / result['writer_seconds'] if result['writer_seconds'] else 0
+        print(f"{result['journal_mode']:<8}{result['busy_timeout']:>9}{rate:>10.0f}{result['writer_locked']:>9}"
+              f"{result['reads']:>8}{result['read_locked']:>9}{result['p50_ms']:>9.1f}{result['p95_ms']:>9.1f}"
+              f"{result['max_ms']:>9.1f}{result['long_reads']:>6}{result['long_read_locked']:>11}{result['wal_mb']:>9.1f}")
+    for mode, result in results.items():
+        errors = result['writer_errors'] + result['read_errors'] + result['long_read_errors']
+        if errors:
+            print(f"\n{mode} 模式错误示例: {sorted(set(errors))[:3]}")
+
+
+if __name__ == "__main__":
+    main()
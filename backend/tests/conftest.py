@@ -0,0 +1,36 @@
+"""
+测试公共fixture: 每个测试使用tmp_path下的独立SQLite数据库
+
+    cd backend && python -m pytest -q
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app('testing', {'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}"})
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def topic(app):
+    from app.models import Topic
+    topic = Topic(topic_name='测试话题', topic_tag='#测试话题#')
+    db.session.add(topic)
+    db.session.commit()
+    return topic
@@ -0,0 +1,71 @@
+"""MediaCrawler同步: content保存原文，comment_text保存轻度清洗后的正文；水位线越过的失败行进入重试表"""
+import sqlite3
+
+import pytest
+
+from app import db
+from app.models import SyncRetryRow, Topic, WeiboPost
+from app.services.crawler_service import CrawlerService
+
+
+def test_sync_batch_stores_raw_content_and_cleaned_comment_text(topic):
+    raw = '#测试话题# 太糟糕了！！😡 @客服小王 给个说法 http://t.cn/A6abc123'
+    rows = [{'id': 1, 'note_id': 'note-1', 'content': raw}]
+
+    def build_post(row, weibo_id):
+        return {'topic_id': topic.id, 'weibo_id': weibo_id, 'content': row['content']}
+
+    assert CrawlerService()._sync_batch(rows, 'note_id', build_post) == (1, 0, {})
+    db.session.commit()
+
+    post = db.session.query(WeiboPost).filter_by(weibo_id='note-1').one()
+    assert post.content == raw
+    assert post.comment_text == '#测试话题# 太糟糕了！！😡 给个说法'
+
+
+@pytest.fixture
+def mediacrawler_db(tmp_path, monkeypatch):
+    path = tmp_path / 'mediacrawler.db'
+    connection = sqlite3.connect(path)
+    connection.execute('CREATE TABLE weibo_note (id INTEGER PRIMARY KEY, note_id TEXT, content TEXT, '
+                       'last_modify_ts INTEGER, add_ts INTEGER)')
+    connection.execute('CREATE TABLE weibo_note_comment (id INTEGER PRIMARY KEY, comment_id TEXT, content TEXT, '
+                       'last_modify_ts INTEGER, add_ts INTEGER)')
+    connection.executemany('INSERT INTO weibo_note (note_id, content, last_modify_ts) VALUES (?, ?, ?)',
+                           [('note-1', '#测试话题# 第一条', 100), ('note-2', '#测试话题# 第二条', 200)])
+    connection.commit()
+    connection.close()
+    monkeypatch.setattr(CrawlerService, '_get_mc_db_path', lambda self: str(path))
+    return path
+
+
+def test_unmatched_rows_are_retried_after_a_topic_exists(app, mediacrawler_db):
+    # 没有活跃话题: 水位线越过两行，两行都进入重试表
+    result = CrawlerService().sync_mediacrawler_data()
+    assert (result['posts_added'], result['posts_skipped'], result['retry_pending']) == (0, 2, 2)
+
+    db.session.add(Topic(topic_name='测试话题', topic_tag='#测试话题#'))
+    db.session.commit()
+    result = CrawlerService().sync_mediacrawler_data()
+    assert (result['posts_added'], result['retry_pending']) == (2, 0)
+    assert db.session.query(SyncRetryRow).count() == 0
+
+
+def test_failed_rows_are_counted_and_retried(monkeypatch, topic, mediacrawler_db):
+    build_note_post = CrawlerService._build_note_post
+
+    def broken(self, note, note_id):
+        if note_id == 'note-1':
+            raise ValueError('字段格式错误')
+        return build_note_post(self, note, note_id)
+
+    monkeypatch.setattr(CrawlerService, '_build_note_post', broken)
+    result = CrawlerService().sync_mediacrawler_data()
+    assert (result['posts_added'], result['posts_failed'], result['retry_pending']) == (1, 1, 1)
+    entry = db.session.query(SyncRetryRow).one()
+    assert (entry.reason, entry.last_error) == ('error', '字段格式错误')
+
+    monkeypatch.setattr(CrawlerService, '_build_note_post', build_note_post)
+    result = CrawlerService().sync_mediacrawler_data()
+    assert (result['posts_added'], result['posts_failed'], result['retry_pending']) == (1, 0, 0)
+    assert db.session.query(WeiboPost).count() == 2
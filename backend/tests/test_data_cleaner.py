@@ -0,0 +1,19 @@
+"""文本清洗: 合并扫描的严格清洗与原来逐遍re.sub的结果一致"""
+import pytest
+
+from benchmark_text_cleaning import SAMPLES, legacy_clean_text
+from app.utils.data_cleaner import STRICT_CLEANER, clean_text
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('转发微博//@张三:说得对', '转发微博说得对'),
+    ('你好!@李四 再见', '你好 再见'),
+    ('【@王五】来了', '来了'),
+    ('@@孙七 看这里', '看这里'),
+])
+def test_mentions_after_punctuation_are_removed(text, expected):
+    assert clean_text(text, strip_symbols=True) == expected
+
+
+def test_strict_cleaner_matches_sequential_passes():
+    assert STRICT_CLEANER.clean_batch(SAMPLES) == [legacy_clean_text(text) for text in SAMPLES]
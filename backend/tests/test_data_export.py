@@ -0,0 +1,28 @@
+"""/api/manage/data/export: gzip流式导出每块同步刷新，收到一块即可解压出完整的行"""
+import gzip
+import zlib
+
+from app import db
+from app.models import WeiboPost
+from app.services import data_export
+
+
+def test_gzip_export_flushes_every_chunk(monkeypatch, client, topic):
+    db.session.add_all([WeiboPost(topic_id=topic.id, weibo_id=f'w{i}', content=f'第{i}条微博') for i in range(5)])
+    db.session.commit()
+    monkeypatch.setattr(data_export, 'CHUNK_ROWS', 2)
+
+    response = client.get('/api/manage/data/export',
+                          query_string={'format': 'jsonl', 'topic_id': topic.id, 'gzip': 1})
+    assert response.status_code == 200
+    pieces = list(response.response)
+
+    # 每块单独解压: 每收到一块，已发送的行都能完整解出
+    decompressor = zlib.decompressobj(31)
+    received = []
+    for piece in pieces[:-1]:
+        text = decompressor.decompress(piece).decode('utf-8')
+        assert text.endswith('\n')
+        received.append(text.count('\n') + (received[-1] if received else 0))
+    assert received == [2, 4, 5]
+    assert gzip.decompress(b''.join(pieces)).decode('utf-8').count('\n') == 5
@@ -0,0 +1,95 @@
+"""/api/manage/data/query: 列表和检索返回同一种分页结构，用next_cursor翻页"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db
+from app.models import WeiboPost
+
+
+@pytest.fixture
+def posts(topic):
+    base = datetime(2024, 3, 1, 12)
+    rows = [WeiboPost(topic_id=topic.id, weibo_id=f'w{i}', content=f'第{i}条 今天天气不错' if i % 2 else f'第{i}条 晚饭吃什么',
+                      publish_time=base + timedelta(hours=i)) for i in range(7)]
+    rows.append(WeiboPost(topic_id=topic.id, weibo_id='w-untimed', content='没有发布时间的天气微博'))
+    db.session.add_all(rows)
+    db.session.commit()
+    return rows
+
+
+def _walk(client, **params):
+    """按next_cursor翻完所有页，返回每页的条目id"""
+    pages, cursor = [], None
+    while True:
+        query = dict(params, limit=2, **({'cursor': cursor} if cursor else {}))
+        response = client.get('/api/manage/data/query', query_string=query)
+        assert response.status_code == 200
+        body = response.get_json()
+        assert set(body) == {'success', 'items', 'next_cursor', 'has_more'}
+        assert body['has_more'] == (body['next_cursor'] is not None)
+        pages.append([item['id'] for item in body['items']])
+        cursor = body['next_cursor']
+        if not body['has_more']:
+            return pages
+
+
+def test_list_pages_by_cursor(client, posts):
+    pages = _walk(client)
+    timed = sorted((post for post in posts if post.publish_time), key=lambda post: post.publish_time, reverse=True)
+    expected = [post.id for post in timed] + [posts[-1].id]
+    assert [post_id for page in pages for post_id in page] == expected
+    assert all(len(page) <= 2 for page in pages)
+
+
+def test_search_pages_by_cursor(client, posts):
+    pages = _walk(client, keyword='天气')
+    found = [post_id for page in pages for post_id in page]
+    expected = {post.id for post in posts if '天气' in post.content}
+    assert sorted(found) == sorted(expected) and len(found) == len(expected)
+    assert len(pages) == 2
+
+
+def test_cursor_is_bound_to_mode(client, posts):
+    list_cursor = client.get('/api/manage/data/query', query_string={'limit': 2}).get_json()['next_cursor']
+    response = client.get('/api/manage/data/query', query_string={'keyword': '天气', 'cursor': list_cursor})
+    assert response.status_code == 400
+    assert client.get('/api/manage/data/query', query_string={'cursor': 'not-a-cursor'}).status_code == 400
+
+
+
+@pytest.mark.parametrize('fts', [True, False], ids=['fts', 'like'])
+def test_search_cursor_pages_through_ties(client, topic, monkeypatch, fts):
+    from app.services import post_query
+    monkeypatch.setattr(post_query, 'fts_available', lambda: fts)
+    # 内容和发布时间完全相同，rank/publish_time都相等，只能靠id区分先后
+    rows = [WeiboPost(topic_id=topic.id, weibo_id=f'tie{i}', content='天气晴', publish_time=datetime(2024, 3, 1))
+            for i in range(5)]
+    db.session.add_all(rows)
+    db.session.commit()
+
+    pages = _walk(client, keyword='天气')
+    found = [post_id for page in pages for post_id in page]
+    assert sorted(found) == sorted(row.id for row in rows)
+    assert len(pages) == 3
+
+
+def test_like_search_cursor_survives_new_matches(client, posts, monkeypatch):
+    from app.services import post_query
+    monkeypatch.setattr(post_query, 'fts_available', lambda: False)
+
+    first = client.get('/api/manage/data/query', query_string={'keyword': '天气', 'limit': 2}).get_json()
+    # 翻页期间写入一条排在最前面的新结果，后续页不应重复返回第一页的条目
+    db.session.add(WeiboPost(topic_id=posts[0].topic_id, weibo_id='w-new', content='天气',
+                             publish_time=datetime(2024, 3, 2)))
+    db.session.commit()
+
+    found = [item['id'] for item in first['items']]
+    cursor = first['next_cursor']
+    while cursor:
+        body = client.get('/api/manage/data/query',
+                          query_string={'keyword': '天气', 'limit': 2, 'cursor': cursor}).get_json()
+        found += [item['id'] for item in body['items']]
+        cursor = body['next_cursor']
+
+    assert sorted(found) == sorted(post.id for post in posts if '天气' in post.content)
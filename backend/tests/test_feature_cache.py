@@ -0,0 +1,94 @@
+"""磁盘特征缓存: 多个进程共用同一目录时不会读到其他文本的特征，多线程共用时命中计数不丢失"""
+import json
+import os
+
+import numpy as np
+
+from app.utils.feature_cache import FeatureCache
+
+
+def _vector(dim, value):
+    return np.full(dim, value, dtype=np.float32)
+
+
+def test_writers_sharing_a_directory_do_not_collide(tmp_path):
+    dim = 65536  # max_mb=1 时容量为4行
+    first = FeatureCache(str(tmp_path), dim=dim, max_mb=1)
+    second = FeatureCache(str(tmp_path), dim=dim, max_mb=1)
+
+    first.put('a', _vector(dim, 1))
+    second.put('b', _vector(dim, 2))
+    first.flush()
+    second.flush()
+
+    assert first.get('a')[0] == 1
+    assert second.get('b')[0] == 2
+    reopened = FeatureCache(str(tmp_path), dim=dim, max_mb=1)
+    assert reopened.get('a')[0] == 1
+    assert reopened.get('b')[0] == 2
+
+
+def test_overwritten_slot_is_a_miss(tmp_path):
+    dim = 262144  # max_mb=1 时容量为1行
+    first = FeatureCache(str(tmp_path), dim=dim, max_mb=1)
+    second = FeatureCache(str(tmp_path), dim=dim, max_mb=1)
+
+    first.put('a', _vector(dim, 1))
+    second.put('b', _vector(dim, 2))
+
+    assert first.get('a') is None
+    assert second.get('b')[0] == 2
+
+
+def test_cached_featurizer_counts_every_lookup_across_threads(tmp_path):
+    import sys
+    import threading
+    from app.services.feature_service import CachedFeaturizer, HashingFeaturizer
+
+    featurizer = CachedFeaturizer(HashingFeaturizer(dim=64), FeatureCache(str(tmp_path), dim=64, max_mb=1))
+    texts = ['正面', '负面', '正面', '中性']
+    threads, calls = 8, 200
+
+    def work():
+        for _ in range(calls):
+            featurizer.transform(texts)
+
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        workers = [threading.Thread(target=work) for _ in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+    finally:
+        sys.setswitchinterval(interval)
+
+    stats = featurizer.stats()
+    assert stats['hits'] + stats['misses'] == threads * calls * len(texts)
+
+
+def test_flush_only_touches_written_rows(tmp_path):
+    dim = 65536
+    cache = FeatureCache(str(tmp_path), dim=dim, max_mb=1)
+    cache.put('a', _vector(dim, 1))
+    cache.flush()
+
+    # 键到行号的映射不落盘，重新打开时从keys.bin恢复
+    assert sorted(os.listdir(tmp_path)) == ['.lock', 'features.f32', 'keys.bin', 'meta.json']
+    assert FeatureCache(str(tmp_path), dim=dim, max_mb=1).get('a')[0] == 1
+
+
+def test_legacy_index_directory_is_reused(tmp_path):
+    dim = 65536
+    cache = FeatureCache(str(tmp_path), dim=dim, max_mb=1)
+    cache.put('a', _vector(dim, 1))
+    cache.flush()
+    # 模拟旧版本目录: 只有index.json，没有meta.json
+    os.remove(tmp_path / 'meta.json')
+    (tmp_path / 'index.json').write_text(json.dumps({'dim': dim, 'capacity': cache.capacity, 'entries': [['a', 0]]}))
+
+    reopened = FeatureCache(str(tmp_path), dim=dim, max_mb=1)
+    assert reopened.get('a')[0] == 1
+    assert not (tmp_path / 'index.json').exists()
+    assert json.loads((tmp_path / 'meta.json').read_text()) == {'dim': dim, 'capacity': cache.capacity}
@@ -0,0 +1,35 @@
+"""任务取消: 批处理循环内的检查点让运行中的话题在当前批次提交后停止"""
+import pytest
+
+from app import db
+from app.models import PostSegment, WeiboPost
+from app.services import data_processing_service
+from app.services.data_processing_service import DataProcessingService
+from app.services.job_manager import JobCancelled, PipelineJob
+from app.services.topic_state import split_changed_topics
+
+
+def test_cancel_stops_segmentation_between_batches(monkeypatch, topic):
+    db.session.add_all([
+        WeiboPost(topic_id=topic.id, weibo_id=f'post-{i}', content=f'#测试话题# 第{i}条关于天气和交通的微博')
+        for i in range(5)
+    ])
+    db.session.commit()
+    monkeypatch.setattr(data_processing_service, 'REFRESH_BATCH_SIZE', 2)
+
+    job = PipelineJob('pipeline', ('keywords',))
+    batches = []
+
+    def checkpoint():
+        batches.append(db.session.query(PostSegment).count())
+        job.cancel()
+        job.check_cancelled()
+
+    with pytest.raises(JobCancelled):
+        DataProcessingService().process_all_topics(method='tf', workers=1, checkpoint=checkpoint)
+
+    # 第一批已提交，剩余微博未分词，话题仍待处理
+    assert batches == [2]
+    assert db.session.query(PostSegment).count() == 2
+    assert split_changed_topics([topic], 'keywords') == ([topic], [])
+
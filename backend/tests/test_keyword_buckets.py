@@ -0,0 +1,74 @@
+"""时间桶关键词: 水位线推进到已检查的最大微博id，与是否有时间桶被重算无关；分词保存失败时不推进"""
+from datetime import datetime
+
+from sqlalchemy.exc import OperationalError
+
+from app import db
+from app.models import KeywordBucket, TopicProcessingState, WeiboPost
+from app.services import segmentation_cache
+from app.services.data_processing_service import DataProcessingService
+from app.services.keyword_bucket_service import KeywordBucketService
+
+NOW = datetime(2024, 3, 10)
+
+
+def _refresh(topic, calls):
+    service = DataProcessingService()
+    refresh_topic_terms = service.refresh_topic_terms
+
+    def counted(topic_id, **kwargs):
+        calls.append(topic_id)
+        return refresh_topic_terms(topic_id, **kwargs)
+
+    service.refresh_topic_terms = counted
+    return KeywordBucketService(service).refresh_topic(topic.id, 'day', now=NOW)
+
+
+def _add_post(topic, weibo_id, publish_time=None):
+    post = WeiboPost(topic_id=topic.id, weibo_id=weibo_id, content=f'{weibo_id} 今天天气不错出门散步',
+                     publish_time=publish_time)
+    db.session.add(post)
+    db.session.commit()
+    return post.id
+
+
+def test_watermark_advances_past_untimed_posts(topic):
+    calls = []
+    _add_post(topic, 'timed', datetime(2024, 3, 1, 8))
+    assert _refresh(topic, calls)['recomputed'] == 1
+
+    # 没有发布时间的新微博不落在任何时间桶，也要推进水位线
+    untimed_id = _add_post(topic, 'untimed')
+    assert _refresh(topic, calls)['recomputed'] == 0
+    assert db.session.get(TopicProcessingState, topic.id).bucket_post_id == untimed_id
+
+    assert _refresh(topic, calls)['recomputed'] == 0
+    assert len(calls) == 2
+
+
+def test_topic_with_only_untimed_posts_is_not_rescanned(topic):
+    calls = []
+    _add_post(topic, 'untimed')
+    _refresh(topic, calls)
+    _refresh(topic, calls)
+    assert len(calls) == 1
+
+
+def test_watermark_held_when_segments_fail_to_store(topic, monkeypatch):
+    calls = []
+    post_id = _add_post(topic, 'timed', datetime(2024, 3, 1, 8))
+    apply_delta = segmentation_cache.apply_delta
+
+    def locked(delta):
+        raise OperationalError('UPDATE term_stats', {}, Exception('database is locked'))
+
+    monkeypatch.setattr(segmentation_cache, 'apply_delta', locked)
+    _refresh(topic, calls)
+    state = db.session.get(TopicProcessingState, topic.id)
+    assert state is None or state.bucket_post_id is None
+
+    # 故障恢复后重新分词，时间桶包含这条微博
+    monkeypatch.setattr(segmentation_cache, 'apply_delta', apply_delta)
+    assert _refresh(topic, calls)['recomputed'] == 1
+    assert db.session.get(TopicProcessingState, topic.id).bucket_post_id == post_id
+    assert KeywordBucket.query.filter_by(topic_id=topic.id).one().post_count == 1
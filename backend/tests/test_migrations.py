@@ -0,0 +1,35 @@
+"""迁移: 只适用于特定数据库的迁移在其他数据库上跳过并登记"""
+from sqlalchemy import text
+
+from app import db
+from app import migrations
+from app.migrations import Migration, applied_versions, run_migrations
+
+
+def test_other_dialect_migration_is_skipped_and_recorded(app, monkeypatch):
+    def upgrade(connection):
+        raise AssertionError('不应在SQLite上执行')
+
+    monkeypatch.setattr(migrations, 'MIGRATIONS', migrations.MIGRATIONS + [
+        Migration('9999', 'postgresql only', upgrade, dialects=('postgresql',))
+    ])
+    assert run_migrations(db) == ['9999']
+    assert '9999' in applied_versions(db)
+    assert run_migrations(db) == []
+
+
+def test_duplicate_results_are_removed_before_unique_index(topic):
+    with db.engine.begin() as connection:
+        connection.execute(text('DROP INDEX ux_sentiment_results_weibo_id'))
+        connection.execute(text("DELETE FROM schema_migrations WHERE version IN ('0003', '0007')"))
+        post_id = connection.execute(text(
+            "INSERT INTO weibo_posts (topic_id, weibo_id, content) VALUES (:topic_id, 'dup', '重复结果')"
+        ), {'topic_id': topic.id}).lastrowid
+        for label in ('负面', '正面'):
+            connection.execute(text(
+                'INSERT INTO sentiment_results (weibo_id, sentiment_label) VALUES (:post_id, :label)'
+            ), {'post_id': post_id, 'label': label})
+
+    assert run_migrations(db) == ['0003', '0007']
+    rows = db.session.execute(text('SELECT sentiment_label FROM sentiment_results')).all()
+    assert rows == [('正面',)]
@@ -0,0 +1,23 @@
+"""情感模型注册表: 加载失败时记录原因"""
+import importlib.util
+
+import pytest
+
+from app.services.model_registry import ModelRegistry
+
+
+@pytest.mark.skipif(importlib.util.find_spec('torch') is not None, reason='已安装torch')
+def test_encoder_without_torch_reports_error(app, capsys):
+    app.config['FEATURIZER_BACKEND'] = 'encoder'
+    registry = ModelRegistry()
+
+    assert registry.sentiment_model() is None
+    assert 'torch' in registry.status()['sentiment_model_error']
+    assert '[ERROR] 情感模型加载失败' in capsys.readouterr().out
+
+
+def test_missing_model_file_reports_error(app, tmp_path):
+    registry = ModelRegistry()
+
+    assert registry.sentiment_model(str(tmp_path / 'missing.joblib')) is None
+    assert 'missing.joblib' in registry.sentiment_model_error
@@ -0,0 +1,18 @@
+"""看板接口和分析流程的查询都走索引（检查项和判定规则见 check_indexes.py）"""
+import pytest
+
+from app import db
+from app.migrations import verify_indexes
+from check_indexes import CHECKS, check_query, seed_sample_data
+
+
+def test_migrations_create_model_indexes(app):
+    assert verify_indexes(db) == []
+
+
+@pytest.mark.parametrize('target, allowed', [check[1:] for check in CHECKS], ids=[check[0] for check in CHECKS])
+def test_query_uses_indexes(client, target, allowed):
+    topic_id = seed_sample_data(db)
+    status_code, problems = check_query(client, target, allowed, topic_id)
+    assert status_code == 200
+    assert problems == []
@@ -0,0 +1,100 @@
+"""汇总表: 迁移0007从已有数据重建，之后写入器/同步的增量在其上累加"""
+from datetime import datetime
+
+from sqlalchemy import text
+
+from app import db
+from app.migrations import run_migrations
+from app.models import SentimentResult, TopicHourlyStat, TopicRegionStat, TopicSentimentStat, WeiboPost
+from app.services import hourly_stats, region_stats
+from app.services.sentiment_writer import SentimentResultWriter
+
+
+def _insert_legacy_posts(topic_id, count, label=None):
+    """绕过汇总维护直接写入微博（和情感结果），模拟引入汇总表之前的数据"""
+    ids = []
+    with db.engine.begin() as connection:
+        for i in range(count):
+            post_id = connection.execute(WeiboPost.__table__.insert().values(
+                topic_id=topic_id, weibo_id=f'legacy-{i}', content=f'旧微博{i}',
+                publish_time=datetime(2024, 1, 1, 8, 30), likes_count=2, location='北京'
+            )).inserted_primary_key[0]
+            if label:
+                connection.execute(SentimentResult.__table__.insert().values(
+                    weibo_id=post_id, sentiment_label=label, sentiment_score=0.9, sentiment_intensity=0.5
+                ))
+            ids.append(post_id)
+    return ids
+
+
+def _rerun_rollup_migration():
+    with db.engine.begin() as connection:
+        connection.execute(text("DELETE FROM schema_migrations WHERE version = '0007'"))
+    return run_migrations(db)
+
+
+def test_migration_rebuilds_rollups_before_new_writes(topic):
+    _insert_legacy_posts(topic.id, 3, label='正面')
+    assert _rerun_rollup_migration() == ['0007']
+
+    new_post = WeiboPost(topic_id=topic.id, weibo_id='new-1', content='新微博', publish_time=datetime(2024, 1, 1, 9, 5))
+    db.session.add(new_post)
+    db.session.commit()
+    with SentimentResultWriter() as writer:
+        writer.add([new_post.id], ['负面'], [0.8], [0.7])
+
+    stat = db.session.get(TopicSentimentStat, topic.id)
+    assert (stat.positive_count, stat.negative_count, stat.neutral_count) == (3, 1, 0)
+    assert stat.positive_intensity_sum == 1.5
+
+    hour = db.session.get(TopicHourlyStat, (topic.id, datetime(2024, 1, 1, 8)))
+    assert (hour.post_count, hour.likes_sum, hour.positive_count) == (3, 6, 3)
+    region = db.session.get(TopicRegionStat, (topic.id, '110000'))
+    assert (region.post_count, region.positive_count) == (3, 3)
+
+
+def test_deltas_accumulate_on_existing_rows(topic):
+    posts = [{'topic_id': topic.id, 'publish_time': datetime(2024, 1, 1, 8, minute),
+              'likes_count': 1, 'location': '上海'} for minute in (0, 30)]
+    hourly_stats.record_posts(posts[:1])
+    region_stats.record_posts(posts[:1])
+    db.session.commit()
+    hourly_stats.record_posts(posts[1:])
+    region_stats.record_posts(posts[1:])
+    db.session.commit()
+
+    hour = db.session.get(TopicHourlyStat, (topic.id, datetime(2024, 1, 1, 8)))
+    assert (hour.post_count, hour.likes_sum) == (2, 2)
+    assert db.session.get(TopicRegionStat, (topic.id, '310000')).post_count == 2
+
+
+def test_orm_inserts_count_into_hourly_rollup(topic):
+    import sync_crawler_data
+    note = {'note_id': 'note-1', 'content': '#测试话题# 今天天气真好', 'create_time': 1704097800,
+            'liked_count': '5', 'ip_location': '广东'}
+    assert sync_crawler_data.sync_note(note) == (1, 0)
+    db.session.commit()
+
+    post = WeiboPost.query.filter_by(weibo_id='note-1').one()
+    hour = db.session.get(TopicHourlyStat, (post.topic_id, post.publish_time.replace(minute=0, second=0)))
+    assert (hour.post_count, hour.likes_sum) == (1, 5)
+
+
+def test_bulk_inserts_are_counted_once(topic):
+    mappings = [{'topic_id': topic.id, 'weibo_id': f'bulk-{i}', 'content': '批量', 'likes_count': 1,
+                 'publish_time': datetime(2024, 1, 2, 10, i)} for i in range(3)]
+    db.session.bulk_insert_mappings(WeiboPost, mappings)
+    hourly_stats.record_posts(mappings)
+    db.session.commit()
+
+    assert db.session.get(TopicHourlyStat, (topic.id, datetime(2024, 1, 2, 10))).post_count == 3
+
+
+def test_orm_inserts_count_into_region_rollup(topic):
+    import sync_crawler_data
+    for i, location in enumerate(('发布于 广东', 'IP属地：广东')):
+        note = {'note_id': f'note-{i}', 'content': '#测试话题# 广东的天气', 'ip_location': location}
+        assert sync_crawler_data.sync_note(note) == (1, 0)
+    db.session.commit()
+
+    assert db.session.get(TopicRegionStat, (topic.id, '440000')).post_count == 2
@@ -0,0 +1,71 @@
+"""分词缓存写入失败: 锁超时/约束冲突回滚并记录，其他异常抛出"""
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app import db
+from app.models import PostSegment, Vocabulary, WeiboPost
+from app.services import segmentation_cache
+from app.services.data_processing_service import DataProcessingService
+
+
+def _pending(topic):
+    post = WeiboPost(topic_id=topic.id, weibo_id='post-1', content='天气不错')
+    db.session.add(post)
+    db.session.commit()
+    cache = DataProcessingService().segment_cache
+    return cache, [(0, post.id, cache.content_hash(post.content), post.content, topic.id)]
+
+
+def test_store_logs_and_rolls_back_database_errors(monkeypatch, capsys, topic):
+    cache, pending = _pending(topic)
+
+    def locked(delta):
+        raise OperationalError('UPDATE term_stats', {}, Exception('database is locked'))
+
+    monkeypatch.setattr(segmentation_cache, 'apply_delta', locked)
+    assert cache.store(pending, [['天气', '不错']]) == 0
+    assert 'database is locked' in capsys.readouterr().out
+    assert db.session.query(PostSegment).count() == 0
+    assert db.session.query(Vocabulary).count() == 0
+
+
+def test_store_raises_unexpected_errors(monkeypatch, topic):
+    cache, pending = _pending(topic)
+
+    def broken(delta):
+        raise KeyError('word')
+
+    monkeypatch.setattr(segmentation_cache, 'apply_delta', broken)
+    with pytest.raises(KeyError):
+        cache.store(pending, [['天气', '不错']])
+    assert db.session.query(PostSegment).count() == 0
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_failed_store_leaves_topic_unprocessed(monkeypatch, topic, workers):
+    from app.models import Topic
+    from app.services.topic_state import split_changed_topics
+
+    other = Topic(topic_name='另一个话题', topic_tag='#另一个话题#')
+    db.session.add(other)
+    db.session.commit()
+    topics = [topic, other]
+    for current in topics:
+        db.session.add(WeiboPost(topic_id=current.id, weibo_id=f'post-{current.id}', content='今天天气不错出门散步'))
+    db.session.commit()
+
+    apply_delta = segmentation_cache.apply_delta
+
+    def locked(delta):
+        raise OperationalError('UPDATE term_stats', {}, Exception('database is locked'))
+
+    monkeypatch.setattr(segmentation_cache, 'apply_delta', locked)
+    results = DataProcessingService().process_all_topics(method='tf', workers=workers, only_changed=True)
+    assert [result['status'] for result in results] == ['error', 'error']
+    assert split_changed_topics(topics, 'keywords') == (topics, [])
+
+    # 故障恢复后两个话题都重新处理
+    monkeypatch.setattr(segmentation_cache, 'apply_delta', apply_delta)
+    results = DataProcessingService().process_all_topics(method='tf', workers=workers, only_changed=True)
+    assert [result['status'] for result in results] == ['success', 'success']
+    assert split_changed_topics(topics, 'keywords') == ([], topics)
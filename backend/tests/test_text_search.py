@@ -0,0 +1,56 @@
+"""全文检索分词（中英文混排）与检索降级"""
+from datetime import datetime
+
+import pytest
+
+from app import db
+from app.models import WeiboPost
+from app.services import post_query
+from app.services.post_query import search_posts
+from app.utils.text_search import cjk_tokens, match_expression
+
+
+@pytest.mark.parametrize('text, tokens', [
+    ('今天天气真好', '今天 天天 天气 气真 真好 好'),
+    ('iPhone15发布会', 'iphone 15 发布 布会 会'),
+    ('5G手机 新品ABC', '5 g 手机 机 新品 品 abc'),
+    ('', ''),
+])
+def test_cjk_tokens(text, tokens):
+    assert cjk_tokens(text) == tokens
+
+
+@pytest.mark.parametrize('keyword, expression', [
+    ('天气真好', '"天气 气真 真好"'),
+    ('iPhone15发布', '"iphone 15 发布"'),
+    ('发布会iPhone', '"发布 布会 会 iphone"'),
+    ('天 气', '"天"* AND "气"*'),
+    ('华为 Mate60', '"华为" AND "mate 60"'),
+    ('！？ ...', None),
+])
+def test_match_expression(keyword, expression):
+    assert match_expression(keyword) == expression
+
+
+@pytest.fixture
+def posts(topic):
+    contents = ['iPhone15发布会今天开始', '华为Mate60也在今天发布', '今天天气真好', 'iphone 用户说发布会无聊']
+    rows = [WeiboPost(topic_id=topic.id, weibo_id=f'w{i}', content=content, publish_time=datetime(2024, 5, 1, i))
+            for i, content in enumerate(contents)]
+    db.session.add_all(rows)
+    db.session.commit()
+    return rows
+
+
+@pytest.mark.parametrize('fts', [True, False], ids=['fts', 'like'])
+@pytest.mark.parametrize('keyword, matched', [
+    ('iPhone15发布', [0]),
+    ('发布会', [0, 3]),
+    ('今天 发布', [0, 1]),
+    ('天气', [2]),
+])
+def test_search_mixed_keywords(posts, monkeypatch, fts, keyword, matched):
+    monkeypatch.setattr(post_query, 'fts_available', lambda: fts)
+    result = search_posts(keyword)
+    assert sorted(item['weibo_id'] for item in result['items']) == [posts[i].weibo_id for i in matched]
+    assert all((item['rank'] is None) != fts for item in result['items'])
@@ -0,0 +1,37 @@
+"""话题变更跟踪: 任何入口写入的新微博都让已处理过的话题重新变脏"""
+import json
+
+from app.services.mediacrawler_wrapper import MediaCrawlerWrapper
+from app.services.topic_state import begin_processing, mark_processed, split_changed_topics
+
+
+def _sync_json(tmp_path, topic_id, note_ids):
+    path = tmp_path / f'notes-{note_ids[0]}.json'
+    notes = [{'note_id': note_id, 'content': f'#测试话题# 第{note_id}条足够长的评论内容',
+              'create_date_time': '2024-01-01 08:00:00', 'ip_location': '北京'} for note_id in note_ids]
+    path.write_text(json.dumps({'notes': notes}, ensure_ascii=False), encoding='utf-8')
+    return MediaCrawlerWrapper().sync_data_from_json(str(path), topic_id)
+
+
+def test_json_sync_marks_processed_topic_dirty(tmp_path, topic):
+    assert _sync_json(tmp_path, topic.id, ['1', '2'])['synced_count'] == 2
+    for stage in ('keywords', 'sentiment'):
+        mark_processed(topic.id, stage, begin_processing(topic.id))
+        assert split_changed_topics([topic], stage) == ([], [topic])
+
+    assert _sync_json(tmp_path, topic.id, ['3'])['synced_count'] == 1
+    for stage in ('keywords', 'sentiment'):
+        assert split_changed_topics([topic], stage) == ([topic], [])
+
+
+def test_crawler_script_sync_marks_processed_topic_dirty(topic):
+    import sync_crawler_data
+    from app import db
+
+    mark_processed(topic.id, 'sentiment', begin_processing(topic.id))
+    assert split_changed_topics([topic], 'sentiment') == ([], [topic])
+
+    note = {'note_id': 'note-1', 'content': '#测试话题# 新同步的微博'}
+    assert sync_crawler_data.sync_note(note) == (1, 0)
+    db.session.commit()
+    assert split_changed_topics([topic], 'sentiment') == ([topic], [])
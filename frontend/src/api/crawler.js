@@ -43,7 +43,7 @@ export default {
     }
   },
 
-  // Pipeline API
+  // Pipeline API（run/process 提交后台任务，返回 job_id，用 getJob 轮询进度）
   pipeline: {
     run(config) {
       return api.post('/api/pipeline/run', config)
@@ -53,6 +53,18 @@ export default {
       return api.post(`/api/pipeline/process/${topicId}`)
     },
 
+    getJob(jobId) {
+      return api.get(`/api/pipeline/jobs/${jobId}`)
+    },
+
+    cancelJob(jobId) {
+      return api.post(`/api/pipeline/jobs/${jobId}/cancel`)
+    },
+
+    listJobs(limit = 20) {
+      return api.get('/api/pipeline/jobs', { params: { limit } })
+    },
+
     getStatus() {
       return api.get('/api/pipeline/status')
     }
@@ -68,6 +80,10 @@ export default {
       return api.get(`/api/visualization/topics/${topicId}/keywords`)
     },
 
+    getKeywordEvolution(topicId, params = {}) {
+      return api.get(`/api/visualization/topics/${topicId}/keywords/evolution`, { params })
+    },
+
     getSentiments(topicId) {
       return api.get(`/api/visualization/topics/${topicId}/sentiments`)
     }
@@ -74,8 +74,8 @@ export const aiApi = {
 
 // 数据管理相关API
 export const dataApi = {
-    // 导出数据
-    exportData: (params) => request.get('/api/manage/data/export', { params }),
+    // 导出数据（流式下载，直接用作链接地址，不经axios读入内存）
+    exportUrl: (params) => request.getUri({ url: '/api/manage/data/export', params }),
 
     // 查询历史数据
     queryData: (params) => request.get('/api/manage/data/query', { params })